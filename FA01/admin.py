@@ -1,27 +1,79 @@
+import ipaddress
+import re
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from .models import (
     Asset, Location, Movement, UserProfile, Sucursal, 
-    DispositivoSucursal, AssetImage, Responsibility
+    DispositivoSucursal, AssetImage, Responsibility, AssetCheckpoint, EmailOutbox, ArchivedAsset,
+    StocktakeSession,
 )
+from .archive import RestoreError, restore_assets
+from .oui import enrich_vendors, vendor_for
+
+PARTIAL_IP_RE = re.compile(r'^[0-9a-fA-F.:]+$')
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que, sin filtros aplicados, usa la estimación de filas de PostgreSQL
+    (pg_class.reltuples) en lugar de un COUNT(*) sobre toda la tabla.
+    """
+    # Por debajo de este número de filas el COUNT(*) exacto es barato
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return row[0]
+        return super().count
+
+class PerformanceAdmin(admin.ModelAdmin):
+    """Configuración común para los listados de tablas grandes"""
+    paginator = EstimatedCountPaginator
+    # Evita el segundo COUNT(*) para mostrar el total sin filtros
+    show_full_result_count = False
 
 # Register your models here.
 @admin.register(Asset)
-class AssetAdmin(admin.ModelAdmin):
+class AssetAdmin(PerformanceAdmin):
     list_display = ['name', 'serial_number', 'category', 'status', 'location', 'assigned_to']
     list_filter = ['category', 'status', 'location', 'purchase_date']
+    list_select_related = ['location', 'assigned_to']
+    autocomplete_fields = ['location', 'assigned_to']
     search_fields = ['name', 'serial_number', 'brand', 'model']
     date_hierarchy = 'created_at'
+    readonly_fields = ['mac_vendor']
+
+    @admin.display(description='Fabricante (según MAC)')
+    def mac_vendor(self, obj):
+        return vendor_for(obj.mac_address) or '-'
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
-    list_display = ['name', 'location_type', 'created_at']
+    list_display = ['name', 'location_type', 'parent', 'created_at']
     list_filter = ['location_type']
+    list_select_related = ['parent']
+    autocomplete_fields = ['parent']
     search_fields = ['name']
+    readonly_fields = ['path']
 
 @admin.register(Movement)
-class MovementAdmin(admin.ModelAdmin):
+class MovementAdmin(PerformanceAdmin):
     list_display = ['asset', 'movement_date', 'from_location', 'to_location']
     list_filter = ['movement_date']
+    list_select_related = ['asset', 'from_location', 'to_location']
+    autocomplete_fields = ['asset', 'from_location', 'to_location', 'from_user']
+    search_fields = ['asset__name', 'asset__serial_number']
     date_hierarchy = 'movement_date'
 
 @admin.register(UserProfile)
@@ -34,20 +86,118 @@ class SucursalAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'codigo', 'responsable']
     search_fields = ['nombre', 'codigo']
 
+class SucursalCodigoFilter(admin.SimpleListFilter):
+    """Filtro por código de sucursal escrito en un campo, sin listar todas las sucursales"""
+    title = 'sucursal'
+    parameter_name = 'sucursal_codigo'
+    template = 'admin/FA01/text_filter.html'
+
+    def lookups(self, request, model_admin):
+        return []
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        # Los demás parámetros del listado se conservan como campos ocultos del formulario
+        yield {
+            'value': self.value() or '',
+            'parameter_name': self.parameter_name,
+            'hidden': [
+                (name, value)
+                for name, values in changelist.params.items() if name not in (self.parameter_name, 'p')
+                for value in (values if isinstance(values, list) else [values])
+            ],
+        }
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(sucursal__codigo__iexact=self.value().strip())
+        return queryset
+
 @admin.register(DispositivoSucursal)
-class DispositivoSucursalAdmin(admin.ModelAdmin):
-    list_display = ['hostname', 'ip', 'mac', 'sucursal', 'fecha_envio']
-    list_filter = ['sucursal', 'fecha_envio']
-    search_fields = ['hostname', 'ip', 'mac']
+class DispositivoSucursalAdmin(PerformanceAdmin):
+    list_display = ['hostname', 'ip', 'mac', 'vendor', 'sucursal', 'fecha_envio', 'asset', 'match_method']
+    list_filter = [SucursalCodigoFilter, 'fecha_envio', 'match_method']
+    list_select_related = ['sucursal', 'asset']
+    autocomplete_fields = ['sucursal', 'asset']
+    search_fields = ['hostname', 'mac']
+    actions = ['fill_vendor']
+
+    @admin.action(description='Completar fabricante según la MAC')
+    def fill_vendor(self, request, queryset):
+        updated = enrich_vendors(queryset)
+        self.message_user(request, f'{updated} dispositivos actualizados')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Una IP completa se busca por igualdad para aprovechar el índice de la columna ip
+        term = search_term.strip()
+        try:
+            ipaddress.ip_address(term)
+        except ValueError:
+            pass
+        else:
+            return queryset.filter(ip=term), False
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        # Una IP parcial ("192.168.3.") se busca por prefijo, además de hostname y MAC
+        if PARTIAL_IP_RE.match(term):
+            results |= queryset.filter(ip__startswith=term)
+        return results, may_have_duplicates
 
 @admin.register(AssetImage)
 class AssetImageAdmin(admin.ModelAdmin):
     list_display = ['asset', 'uploaded_at']
+    list_select_related = ['asset']
+    autocomplete_fields = ['asset']
     list_filter = ['uploaded_at']
     date_hierarchy = 'uploaded_at'
 
 @admin.register(Responsibility)
 class ResponsibilityAdmin(admin.ModelAdmin):
     list_display = ['asset', 'uploaded_at']
+    list_select_related = ['asset']
+    autocomplete_fields = ['asset']
     list_filter = ['uploaded_at']
     date_hierarchy = 'uploaded_at'
+
+@admin.register(AssetCheckpoint)
+class AssetCheckpointAdmin(PerformanceAdmin):
+    list_display = ['asset', 'taken_at', 'location', 'assigned_to_name', 'status']
+    list_select_related = ['asset', 'location']
+    autocomplete_fields = ['asset', 'location']
+    list_filter = ['taken_at']
+    date_hierarchy = 'taken_at'
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject']
+    readonly_fields = ['attempts', 'sent_at', 'last_error']
+
+@admin.register(ArchivedAsset)
+class ArchivedAssetAdmin(PerformanceAdmin):
+    list_display = ['name', 'serial_number', 'category', 'status', 'location', 'archived_at', 'media_archived']
+    list_filter = ['status', 'category', 'media_archived', 'archived_at']
+    list_select_related = ['location']
+    search_fields = ['name', 'serial_number']
+    date_hierarchy = 'archived_at'
+    readonly_fields = ['asset_id', 'archived_at', 'media_archived', 'data', 'related']
+    actions = ['restore']
+
+    @admin.action(description='Restaurar al inventario')
+    def restore(self, request, queryset):
+        try:
+            counts = restore_assets(queryset)
+        except RestoreError as e:
+            self.message_user(request, str(e), level='error')
+            return
+        self.message_user(request, f'{counts["assets"]} activos restaurados')
+
+@admin.register(StocktakeSession)
+class StocktakeSessionAdmin(admin.ModelAdmin):
+    list_display = ['location', 'status', 'opened_by', 'opened_at', 'closed_at']
+    list_filter = ['status', 'opened_at']
+    list_select_related = ['location', 'opened_by']
+    autocomplete_fields = ['location', 'opened_by']
+    date_hierarchy = 'opened_at'
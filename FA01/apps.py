@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class Fa01Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'FA01'
+
+    def ready(self):
+        from . import signals  # noqa: F401
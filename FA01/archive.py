@@ -0,0 +1,220 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.core.files.storage import InvalidStorageError, default_storage, storages
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import ArchivedAsset, Asset, AssetCheckpoint, AssetImage, Movement, Responsibility, StocktakeEntry
+
+# Estados que salen del inventario vivo y días sin cambios antes de archivarlos
+ARCHIVED_STATUSES = ['retired', 'lost']
+ARCHIVE_AFTER_DAYS = 90
+BATCH_SIZE = 500
+# Alias en STORAGES del almacenamiento frío para los archivos de los activos archivados
+ARCHIVE_STORAGE = 'archive'
+
+# Registros que se archivan y restauran junto con el activo, en orden de inserción
+RELATED_MODELS = {
+    'movements': Movement,
+    'images': AssetImage,
+    'responsibilities': Responsibility,
+    'checkpoints': AssetCheckpoint,
+}
+# Registros que no se borran con el activo (SET_NULL): related guarda sus ids para volver a vincularlos
+LINKED_MODELS = {
+    'stocktake_entries': StocktakeEntry,
+}
+
+
+class RestoreError(ValueError):
+    pass
+
+
+def archivable_assets(days=ARCHIVE_AFTER_DAYS):
+    """Activos retirados o perdidos que no cambiaron en los últimos `days` días"""
+    cutoff = timezone.now() - timedelta(days=days)
+    return Asset.objects.filter(status__in=ARCHIVED_STATUSES, updated_at__lt=cutoff)
+
+
+def archive_storage():
+    try:
+        return storages[ARCHIVE_STORAGE]
+    except InvalidStorageError:
+        raise InvalidStorageError(
+            f"Configure STORAGES['{ARCHIVE_STORAGE}'] (p. ej. ARCHIVE_MEDIA_ROOT) para mover los archivos"
+        ) from None
+
+
+def file_fields(model):
+    return [field.attname for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+
+
+def copy_files(rows, model, source, target):
+    """
+    Copia los archivos de las filas a otro almacenamiento y actualiza el nombre en cada fila.
+
+    Devuelve los nombres originales para borrarlos de `source` una vez confirmada la transacción.
+    """
+    copied = []
+    fields = file_fields(model)
+    for row in rows:
+        for field in fields:
+            name = row.get(field)
+            if not name or not source.exists(name):
+                continue
+            with source.open(name, 'rb') as file:
+                row[field] = target.save(name, file)
+            copied.append(name)
+    return copied
+
+
+def delete_files_on_commit(storage, names):
+    def delete():
+        for name in names:
+            storage.delete(name)
+    if names:
+        transaction.on_commit(delete)
+
+
+def archive_assets(assets=None, batch_size=BATCH_SIZE, move_media=False):
+    """
+    Mueve activos a ArchivedAsset en lotes por id, un lote por transacción.
+
+    Por omisión archiva archivable_assets(). Con move_media los archivos se copian al
+    almacenamiento 'archive' y se borran del principal al confirmar el lote. Devuelve un
+    Counter con los activos, registros relacionados y archivos movidos.
+    """
+    if assets is None:
+        assets = archivable_assets()
+    storage = archive_storage() if move_media else None
+    ids = assets.order_by('id').values_list('id', flat=True)
+    counts = Counter()
+    last_id = 0
+    while batch := list(ids.filter(id__gt=last_id)[:batch_size]):
+        last_id = batch[-1]
+        counts += archive_batch(batch, storage)
+    return counts
+
+
+def archive_batch(ids, storage=None):
+    counts = Counter()
+    with transaction.atomic():
+        # El estado se vuelve a comprobar con la fila bloqueada: pudo cambiar desde que se eligió el lote
+        assets = list(
+            Asset.objects.select_for_update().filter(id__in=ids, status__in=ARCHIVED_STATUSES).order_by('id').values()
+        )
+        ids = [asset['id'] for asset in assets]
+        related = {asset_id: {name: [] for name in RELATED_MODELS} for asset_id in ids}
+        copied = []
+        for name, model in RELATED_MODELS.items():
+            rows = list(model.objects.filter(asset_id__in=ids).order_by('id').values())
+            if storage is not None:
+                copied += copy_files(rows, model, default_storage, storage)
+            for row in rows:
+                related[row['asset_id']][name].append(row)
+            counts[name] += len(rows)
+        for name, model in LINKED_MODELS.items():
+            for asset_id, pk in model.objects.filter(asset_id__in=ids).order_by('id').values_list('asset_id', 'id'):
+                related[asset_id].setdefault(name, []).append(pk)
+                counts[name] += 1
+
+        ArchivedAsset.objects.bulk_create([
+            ArchivedAsset(
+                asset_id=asset['id'],
+                name=asset['name'],
+                serial_number=asset['serial_number'],
+                category=asset['category'],
+                status=asset['status'],
+                location_id=asset['location_id'],
+                media_archived=storage is not None,
+                data=asset,
+                related=related[asset['id']],
+            )
+            for asset in assets
+        ])
+        Asset.objects.filter(id__in=ids).delete()
+        delete_files_on_commit(default_storage, copied)
+    counts['assets'] += len(assets)
+    counts['files'] += len(copied)
+    return counts
+
+
+def drop_missing_references(model, rows):
+    """Anula las claves foráneas a filas borradas mientras el activo estaba archivado"""
+    for field in model._meta.concrete_fields:
+        if not field.is_relation or field.name == 'asset':
+            continue
+        referenced = {row[field.attname] for row in rows if row.get(field.attname) is not None}
+        if not referenced:
+            continue
+        existing = set(field.related_model._base_manager.filter(pk__in=referenced).values_list('pk', flat=True))
+        for row in rows:
+            if row.get(field.attname) is not None and row[field.attname] not in existing:
+                row[field.attname] = None
+
+
+def insert_rows(model, rows):
+    """
+    Inserta las filas archivadas conservando id y fechas de creación.
+
+    bulk_create asigna la hora actual a los campos auto_now_add; se reponen con un bulk_update.
+    Los campos auto_now (updated_at) quedan con la hora de la restauración para el feed de cambios.
+    """
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    drop_missing_references(model, rows)
+    objects = [
+        model(**{name: field.to_python(row[name]) for name, field in fields.items() if name in row})
+        for row in rows
+    ]
+    preserved = [field.attname for field in fields.values() if getattr(field, 'auto_now_add', False)]
+    originals = [[getattr(obj, name) for name in preserved] for obj in objects]
+    model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+    if preserved and objects:
+        for obj, values in zip(objects, originals):
+            for name, value in zip(preserved, values):
+                setattr(obj, name, value)
+        model.objects.bulk_update(objects, preserved, batch_size=BATCH_SIZE)
+    return len(objects)
+
+
+def restore_assets(archived):
+    """
+    Devuelve al inventario los activos archivados, con sus registros relacionados y archivos.
+
+    Lanza RestoreError si ya existe un activo con el mismo id o número de serie. Las entradas de
+    inventario físico vuelven a apuntar al activo si siguen sin vincular; los reportes de red
+    quedaron sin vincular y se recuperan con reconcile_devices --all.
+    """
+    archived = list(archived)
+    counts = Counter()
+    with transaction.atomic():
+        conflicts = Asset.objects.filter(
+            Q(id__in=[item.asset_id for item in archived]) |
+            Q(serial_number__in=[item.serial_number for item in archived])
+        ).values_list('serial_number', flat=True)
+        if conflicts:
+            raise RestoreError(f'Ya existen activos con los números de serie: {", ".join(sorted(conflicts))}')
+
+        storage = archive_storage() if any(item.media_archived for item in archived) else None
+        rows = defaultdict(list)
+        copied = []
+        for item in archived:
+            for name, model in RELATED_MODELS.items():
+                item_rows = item.related.get(name, [])
+                if item.media_archived:
+                    copied += copy_files(item_rows, model, storage, default_storage)
+                rows[name] += item_rows
+
+        counts['assets'] = insert_rows(Asset, [item.data for item in archived])
+        for name, model in RELATED_MODELS.items():
+            counts[name] = insert_rows(model, rows[name])
+        for name, model in LINKED_MODELS.items():
+            for item in archived:
+                counts[name] += model.objects.filter(
+                    pk__in=item.related.get(name, []), asset__isnull=True,
+                ).update(asset_id=item.asset_id)
+        ArchivedAsset.objects.filter(pk__in=[item.pk for item in archived]).delete()
+        if storage is not None:
+            delete_files_on_commit(storage, copied)
+    counts['files'] = len(copied)
+    return counts
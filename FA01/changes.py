@@ -0,0 +1,119 @@
+import base64
+import json
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Asset, Location, Movement, Tombstone
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+# updated_at y deleted_at se asignan al guardar, no al confirmar la transacción: una fila puede
+# aparecer con una fecha que un lector ya pasó. Solo se entregan las filas más antiguas que este
+# margen, que debe superar la duración de las transacciones de escritura
+SETTLE_DELAY = timedelta(seconds=5)
+
+# Recursos expuestos en el feed de cambios y los campos que se envían de cada uno
+RESOURCES = {
+    'assets': {
+        'model': Asset,
+        'fields': [
+            'id', 'name', 'serial_number', 'brand', 'model', 'category', 'status',
+            'purchase_date', 'warranty_expiration', 'quantity', 'preferred_usage_period',
+            'location_id', 'assigned_to_id', 'assigned_to_name', 'description',
+            'specifications', 'specs', 'notes', 'created_at', 'updated_at',
+        ],
+    },
+    'locations': {
+        'model': Location,
+        'fields': ['id', 'name', 'location_type', 'description', 'parent_id', 'created_at', 'updated_at'],
+    },
+    'movements': {
+        'model': Movement,
+        'fields': [
+            'id', 'asset_id', 'movement', 'from_location_id', 'to_location_id', 'from_user_id',
+            'assigned_to_name', 'notes', 'movement_date', 'updated_at',
+        ],
+    },
+}
+
+RESOURCE_BY_MODEL = {spec['model']: name for name, spec in RESOURCES.items()}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position):
+    """Codifica las posiciones {'u': [fecha, id], 'd': [fecha, id]} como un token opaco"""
+    data = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return {'u': None, 'd': None}
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(data)
+        for key in ('u', 'd'):
+            if position.get(key) is not None:
+                timestamp, pk = position[key]
+                position[key] = [parse_datetime(timestamp), int(pk)]
+                if position[key][0] is None:
+                    raise ValueError
+            else:
+                position[key] = None
+        return position
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidCursor('Cursor inválido')
+
+
+def _dump(position):
+    if position is None:
+        return None
+    return [position[0].isoformat(), position[1]]
+
+
+def after(queryset, field, position):
+    """Filtra las filas posteriores a (fecha, id) siguiendo el orden del índice (field, id)"""
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    return queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk}))
+
+
+def get_changes(resource, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Devuelve los objetos creados o modificados y los ids eliminados después de `cursor`.
+
+    Los cambios se ordenan por (updated_at, id) y las bajas por (deleted_at, id), de modo que
+    cada consulta es un recorrido de índice que solo toca las filas nuevas. Las altas y
+    modificaciones deben aplicarse antes que las bajas del mismo lote. Las filas de los últimos
+    SETTLE_DELAY segundos se entregan en una consulta posterior.
+    """
+    spec = RESOURCES[resource]
+    limit = max(1, min(limit, MAX_LIMIT))
+    position = decode_cursor(cursor)
+    settled = timezone.now() - SETTLE_DELAY
+
+    changed = after(spec['model'].objects.filter(updated_at__lt=settled), 'updated_at', position['u'])
+    changed = list(changed.order_by('updated_at', 'id').values(*spec['fields'])[:limit + 1])
+
+    deleted = after(Tombstone.objects.filter(resource=resource, deleted_at__lt=settled), 'deleted_at', position['d'])
+    deleted = list(deleted.order_by('deleted_at', 'id').values_list('deleted_at', 'id', 'object_id')[:limit + 1])
+
+    has_more = len(changed) > limit or len(deleted) > limit
+    changed = changed[:limit]
+    deleted = deleted[:limit]
+
+    next_position = {
+        'u': [changed[-1]['updated_at'].isoformat(), changed[-1]['id']] if changed else _dump(position['u']),
+        'd': [deleted[-1][0].isoformat(), deleted[-1][1]] if deleted else _dump(position['d']),
+    }
+    return {
+        'changed': changed,
+        'deleted': [object_id for _, _, object_id in deleted],
+        'next_cursor': encode_cursor(next_position),
+        'has_more': has_more,
+    }
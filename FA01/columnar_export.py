@@ -0,0 +1,216 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.utils import timezone
+from .changes import SETTLE_DELAY
+from .models import Asset, Movement, Location, DispositivoSucursal
+
+PARQUET = 'parquet'
+ARROW = 'arrow'
+FORMATS = {
+    PARQUET: ('application/vnd.apache.parquet', 'parquet'),
+    ARROW: ('application/vnd.apache.arrow.file', 'arrow'),
+}
+
+BATCH_SIZE = 5000
+
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+# Columnas exportadas por cada dataset. `watermark` es el campo usado para la exportación incremental.
+DATASETS = {
+    'assets': {
+        'model': Asset,
+        'watermark': 'updated_at',
+        'columns': [
+            ('id', pa.int64()),
+            ('name', pa.string()),
+            ('serial_number', pa.string()),
+            ('brand', pa.string()),
+            ('model', pa.string()),
+            ('category', pa.string()),
+            ('status', pa.string()),
+            ('purchase_date', pa.date32()),
+            ('warranty_expiration', pa.date32()),
+            ('quantity', pa.int32()),
+            ('preferred_usage_period', pa.int32()),
+            ('location_id', pa.int64()),
+            ('assigned_to_id', pa.int64()),
+            ('assigned_to_name', pa.string()),
+            ('description', pa.string()),
+            ('specifications', pa.string()),
+            ('notes', pa.string()),
+            ('created_at', TIMESTAMP),
+            ('updated_at', TIMESTAMP),
+        ],
+    },
+    'movements': {
+        'model': Movement,
+        'watermark': 'updated_at',
+        'columns': [
+            ('id', pa.int64()),
+            ('asset_id', pa.int64()),
+            ('movement', pa.string()),
+            ('from_location_id', pa.int64()),
+            ('to_location_id', pa.int64()),
+            ('from_user_id', pa.int64()),
+            ('assigned_to_name', pa.string()),
+            ('notes', pa.string()),
+            ('movement_date', TIMESTAMP),
+            ('updated_at', TIMESTAMP),
+        ],
+    },
+    'locations': {
+        'model': Location,
+        'watermark': 'updated_at',
+        'columns': [
+            ('id', pa.int64()),
+            ('name', pa.string()),
+            ('location_type', pa.string()),
+            ('description', pa.string()),
+            ('parent_id', pa.int64()),
+            ('path', pa.string()),
+            ('created_at', TIMESTAMP),
+            ('updated_at', TIMESTAMP),
+        ],
+    },
+    'devices': {
+        'model': DispositivoSucursal,
+        'watermark': 'fecha_recepcion',
+        'columns': [
+            ('id', pa.int64()),
+            ('sucursal_id', pa.int64()),
+            ('sucursal__codigo', pa.string()),
+            ('ip', pa.string()),
+            ('mac', pa.string()),
+            ('hostname', pa.string()),
+            ('fecha_envio', TIMESTAMP),
+            ('fecha_recepcion', TIMESTAMP),
+        ],
+    },
+}
+
+
+class StreamSink:
+    """Archivo de solo escritura que acumula los bytes hasta que se vacían con drain()"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ColumnarExport:
+    """
+    Exporta un dataset a Parquet o Arrow IPC leyendo la base de datos por lotes
+    con un cursor del lado del servidor.
+
+    Con `since` solo se exportan las filas cuyo campo `watermark` es posterior a ese valor;
+    después de escribir, `watermark` contiene el valor a usar en la siguiente exportación.
+    Como en el feed de cambios, las filas de los últimos SETTLE_DELAY segundos quedan para la
+    siguiente exportación: su transacción pudo no haberse confirmado todavía.
+    """
+
+    def __init__(self, dataset, fmt=PARQUET, since=None, batch_size=BATCH_SIZE):
+        if dataset not in DATASETS:
+            raise ValueError(f'Dataset desconocido: {dataset}')
+        if fmt not in FORMATS:
+            raise ValueError(f'Formato desconocido: {fmt}')
+        self.dataset = dataset
+        self.spec = DATASETS[dataset]
+        self.fmt = fmt
+        self.since = since
+        self.batch_size = batch_size
+        self.schema = pa.schema([
+            (name.replace('__', '_'), arrow_type) for name, arrow_type in self.spec['columns']
+        ])
+        self.rows = 0
+        self.watermark = since
+        self.settled = timezone.now() - SETTLE_DELAY
+
+    @property
+    def content_type(self):
+        return FORMATS[self.fmt][0]
+
+    @property
+    def filename(self):
+        return f'{self.dataset}.{FORMATS[self.fmt][1]}'
+
+    def get_queryset(self):
+        watermark = self.spec['watermark']
+        queryset = self.spec['model'].objects.filter(**{f'{watermark}__lt': self.settled})
+        if self.since is not None:
+            queryset = queryset.filter(**{f'{watermark}__gt': self.since})
+        fields = [name for name, _ in self.spec['columns']]
+        return queryset.order_by(watermark, 'id').values_list(*fields)
+
+    def open_writer(self, sink):
+        if self.fmt == PARQUET:
+            return pq.ParquetWriter(sink, self.schema, compression='snappy')
+        return pa.ipc.new_file(sink, self.schema)
+
+    def build_batch(self, rows):
+        columns = list(zip(*rows))
+        return pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+
+    def iter_write(self, sink):
+        """Escribe el dataset en `sink` y cede el control después de cada lote"""
+        watermark_index = [name for name, _ in self.spec['columns']].index(self.spec['watermark'])
+        writer = self.open_writer(sink)
+        rows = []
+        try:
+            for row in self.get_queryset().iterator(chunk_size=self.batch_size):
+                rows.append(row)
+                if len(rows) >= self.batch_size:
+                    writer.write_batch(self.build_batch(rows))
+                    self.rows += len(rows)
+                    self.watermark = rows[-1][watermark_index]
+                    rows = []
+                    yield
+            if rows:
+                writer.write_batch(self.build_batch(rows))
+                self.rows += len(rows)
+                self.watermark = rows[-1][watermark_index]
+        finally:
+            writer.close()
+        yield
+
+    def write(self, sink):
+        for _ in self.iter_write(sink):
+            pass
+        return self.rows
+
+    def stream(self):
+        """Generador de bytes para StreamingHttpResponse"""
+        sink = StreamSink()
+        for _ in self.iter_write(sink):
+            data = sink.drain()
+            if data:
+                yield data
+        data = sink.drain()
+        if data:
+            yield data
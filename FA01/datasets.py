@@ -0,0 +1,275 @@
+import itertools
+import json
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from .models import Asset, Location
+from .tabular import (
+    BULK_BATCH_SIZE, CHOICE, DATE, INTEGER, ChoiceMap, Column, Dataset, ImportReport, bulk_upsert,
+)
+
+CATEGORY_MAP = ChoiceMap(Asset.CATEGORIES, default='other')
+STATUS_MAP = ChoiceMap(Asset.STATUS_CHOICES, default='active')
+LOCATION_TYPE_MAP = ChoiceMap(Location.LOCATION_TYPES, default='office')
+
+ASSET_DATASET = Dataset('Inventario', [
+    Column('ID', source='id', kind=INTEGER, width=6),
+    Column('Nombre', 'name', required=True),
+    Column('Categoría', 'category', kind=CHOICE, choices=CATEGORY_MAP),
+    Column('Número de Serie', 'serial_number', required=True),
+    Column('Fecha de Compra', 'purchase_date', kind=DATE),
+    Column('Estado', 'status', kind=CHOICE, choices=STATUS_MAP),
+    # Al importar se guarda el nombre; import_assets lo resuelve a una ubicación
+    Column('Ubicación', 'location', source='location__name', null=True),
+    Column('Responsable', 'assigned_to_name', source='assigned_to__username', null=True),
+    Column('Descripción', 'description'),
+    Column('Especificaciones', 'specifications'),
+    Column('Cantidad', 'quantity', kind=INTEGER, default=1, width=8),
+    Column('Período de Uso Preferente', 'preferred_usage_period', kind=INTEGER, default=36, width=4),
+    Column('Vencimiento de Garantía', 'warranty_expiration', kind=DATE),
+], key='serial_number')
+
+LOCATION_DATASET = Dataset('Ubicaciones', [
+    Column('Nombre', 'name', required=True),
+    Column('Tipo de Ubicación', 'location_type', kind=CHOICE, choices=LOCATION_TYPE_MAP),
+    Column('Descripción', 'description'),
+], key='name')
+
+ASSET_TEMPLATE_ROWS = [
+    ['', 'Laptop Dell Inspiron', 'Laptop', 'DELL123456', '15/01/2023', 'Activo', 'Oficina Principal', 'Juan Pérez', 'Laptop para desarrollo', 'Intel i5, 8GB RAM, 256GB SSD', 1, 36, '15/01/2026'],
+    ['', 'Monitor HP 24"', 'Monitor', 'HP789012', '20/02/2023', 'En Uso', 'Sala de Reuniones', 'María García', 'Monitor para presentaciones', '24 pulgadas, Full HD', 1, 48, '20/02/2026'],
+    ['', 'Impresora HP LaserJet', 'Impresora', 'HP345678', '10/03/2023', 'Activo', 'Recepción', 'Carlos López', 'Impresora principal', 'Láser, monocromática', 1, 60, '10/03/2026'],
+]
+
+
+def collect_records(dataset, parsed, report):
+    """Agrupa los registros por la clave del dataset; si una clave se repite gana la última fila"""
+    records = {}
+    for row_number, record, error in parsed:
+        if error:
+            report.add_error(row_number, error)
+            continue
+        key = record[dataset.key]
+        if key in records:
+            report.add_error(row_number, f'"{key}" está repetido, se usa la última fila')
+        records[key] = record
+    return records
+
+
+def resolve_locations(names):
+    """Devuelve {nombre: ubicación}, creando en bloque las que no existen"""
+    locations = {}
+    for location in Location.objects.filter(name__in=names).order_by('-id'):
+        locations[location.name] = location
+    missing = [Location(name=name, location_type='office', description='') for name in names if name not in locations]
+    for location in Location.objects.bulk_create(missing):
+        locations[location.name] = location
+    if missing:
+        Location.fill_missing_paths()
+    return locations
+
+
+# Campos que se comparan para decidir si un activo existente cambió
+ASSET_COMPARED_FIELDS = [field for field in ASSET_DATASET.fields if field != 'serial_number']
+ASSET_FIELD_LABELS = {column.field: column.header for column in ASSET_DATASET.import_columns}
+ASSET_FIELD_CHOICES = {column.field: column.choices for column in ASSET_DATASET.import_columns if column.choices}
+
+
+def display_change(field, old, new):
+    """(etiqueta del campo, valor anterior, valor nuevo) con las etiquetas de los choices"""
+    choices = ASSET_FIELD_CHOICES.get(field)
+    if choices:
+        old, new = choices.label(old), choices.label(new)
+    return ASSET_FIELD_LABELS[field], old, new
+
+
+def _normalize(value):
+    return None if value == '' else value
+
+
+class AssetImportPlan:
+    """
+    Diferencias por campo entre los registros del archivo y los activos actuales.
+
+    Los activos existentes se cargan con una sola consulta por número de serie y la
+    comparación se hace en memoria; solo las filas nuevas o con cambios se escriben.
+    """
+
+    def __init__(self, records, report):
+        self.records = list(records)
+        self.report = report
+        self.new = []
+        self.changed = []
+        self.unchanged = 0
+
+        current = {
+            row['serial_number']: row
+            for row in Asset.objects.filter(serial_number__in=[record['serial_number'] for record in self.records])
+            .values('id', 'serial_number', 'location__name', *[f for f in ASSET_COMPARED_FIELDS if f != 'location'])
+        }
+        for record in self.records:
+            existing = current.get(record['serial_number'])
+            if existing is None:
+                self.new.append(record)
+                continue
+            existing['location'] = existing['location__name']
+            changes = {
+                field: (existing[field], record[field])
+                for field in ASSET_COMPARED_FIELDS
+                if _normalize(existing[field]) != _normalize(record[field])
+            }
+            if changes:
+                self.changed.append((existing['id'], record, changes))
+            else:
+                self.unchanged += 1
+
+    def apply(self):
+        """Crea los activos nuevos y actualiza solo los campos que cambiaron"""
+        now = timezone.now()
+        with transaction.atomic():
+            locations = resolve_locations({
+                record['location']
+                for record in itertools.chain(self.new, (record for _, record, _ in self.changed))
+                if record['location']
+            })
+
+            def build(record):
+                asset = Asset(**dict(record, location=locations.get(record['location'])))
+                asset.compute_end_of_life_date()
+                asset.compute_specs()
+                return asset
+
+            created = [build(record) for record in self.new]
+            updated = []
+            fields = set()
+            for pk, record, changes in self.changed:
+                asset = build(record)
+                asset.pk = pk
+                asset.updated_at = now
+                updated.append(asset)
+                fields.update(changes)
+            if fields & {'purchase_date', 'preferred_usage_period'}:
+                fields.add('end_of_life_date')
+            if fields & {'specifications', 'category'}:
+                fields.add('specs')
+
+            Asset.objects.bulk_create(created, batch_size=BULK_BATCH_SIZE)
+            if updated:
+                Asset.objects.bulk_update(updated, sorted(fields) + ['updated_at'], batch_size=BULK_BATCH_SIZE)
+
+        self.report.created = len(created)
+        self.report.updated = len(updated)
+        self.report.unchanged = self.unchanged
+        return self.report
+
+
+def plan_asset_import(parsed):
+    """Agrupa las filas convertidas por número de serie y calcula el plan de importación"""
+    report = ImportReport()
+    records = collect_records(ASSET_DATASET, parsed, report)
+    return AssetImportPlan(records.values(), report)
+
+
+def import_assets(rows):
+    """Importa activos desde filas (número de fila, valores), escribiendo solo lo que cambió"""
+    return import_parsed_assets(ASSET_DATASET.parse_rows(rows))
+
+
+def import_parsed_assets(parsed):
+    """Igual que import_assets, a partir de filas ya convertidas (número de fila, registro, error)"""
+    return plan_asset_import(parsed).apply()
+
+
+# Campos que devuelve la API masiva; `location` es el nombre de la ubicación, como al importar
+ASSET_API_FIELDS = [
+    'id', 'serial_number', 'name', 'category', 'status', 'purchase_date', 'warranty_expiration', 'quantity',
+    'preferred_usage_period', 'location', 'assigned_to_name', 'description', 'specifications', 'specs',
+    'updated_at',
+]
+
+
+def asset_api_rows(queryset):
+    sources = [field if field != 'location' else 'location__name' for field in ASSET_API_FIELDS]
+    for values in queryset.order_by('id').values_list(*sources).iterator(chunk_size=BULK_BATCH_SIZE):
+        yield dict(zip(ASSET_API_FIELDS, values))
+
+
+def stream_asset_upserts(lines, batch_size=BULK_BATCH_SIZE):
+    """
+    Aplica líneas NDJSON (un activo completo por línea) en lotes de `batch_size`, cada lote en su
+    propia transacción, y devuelve el estado de cada línea: created, updated, unchanged, skipped o error.
+    """
+    totals = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'error': 0}
+
+    def flush(rows, results):
+        records = {}
+        lines_by_serial = {}
+        for row_number, record, error in ASSET_DATASET.parse_rows(rows):
+            if error:
+                results[row_number] = {'line': row_number, 'status': 'error', 'error': error}
+                continue
+            serial_number = record['serial_number']
+            if serial_number in lines_by_serial:
+                # Dentro de un lote gana la última línea con el mismo número de serie
+                previous = lines_by_serial[serial_number]
+                results[previous] = {
+                    'line': previous, 'serial_number': serial_number, 'status': 'skipped',
+                    'error': f'reemplazada por la línea {row_number}',
+                }
+            records[serial_number] = record
+            lines_by_serial[serial_number] = row_number
+
+        try:
+            plan = AssetImportPlan(records.values(), ImportReport())
+            plan.apply()
+        except DatabaseError as e:
+            # El lote se revirtió completo (p. ej. un valor demasiado largo): los anteriores ya
+            # quedaron guardados, así que se informa el error en cada línea y se sigue con el próximo
+            for serial_number, row_number in lines_by_serial.items():
+                results[row_number] = {
+                    'line': row_number, 'serial_number': serial_number, 'status': 'error',
+                    'error': f'lote no guardado: {e}'.strip(),
+                }
+        else:
+            statuses = {record['serial_number']: 'created' for record in plan.new}
+            statuses.update((record['serial_number'], 'updated') for _, record, _ in plan.changed)
+            for serial_number, row_number in lines_by_serial.items():
+                results[row_number] = {
+                    'line': row_number, 'serial_number': serial_number,
+                    'status': statuses.get(serial_number, 'unchanged'),
+                }
+
+        for row_number in sorted(results):
+            totals[results[row_number]['status']] += 1
+            yield results[row_number]
+
+    rows = []
+    results = {}
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('se esperaba un objeto')
+            rows.append((line_number, ASSET_DATASET.values_from_mapping(record)))
+        except ValueError as e:
+            results[line_number] = {'line': line_number, 'status': 'error', 'error': f'JSON inválido: {e}'}
+        if len(rows) + len(results) >= batch_size:
+            yield from flush(rows, results)
+            rows, results = [], {}
+    if rows or results:
+        yield from flush(rows, results)
+
+    yield {'summary': totals}
+
+
+def import_locations(rows):
+    report = ImportReport()
+    records = collect_records(LOCATION_DATASET, LOCATION_DATASET.parse_rows(rows), report)
+    report.created, report.updated = bulk_upsert(
+        Location, [Location(**record) for record in records.values()], 'name', ['location_type', 'description'],
+    )
+    if report.created:
+        Location.fill_missing_paths()
+    return report
@@ -0,0 +1,285 @@
+import ipaddress
+import os
+import re
+import shutil
+import subprocess
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from .oui import vendors_for
+from .reconciliation import AssetIndex, match_scanned_devices, normalize_hostname, normalize_ip, normalize_mac
+
+# Vecino visto por una fuente pasiva; mac y hostname pueden venir vacíos
+Neighbor = namedtuple('Neighbor', ['ip', 'mac', 'hostname'])
+
+# Flag ATF_COM de /proc/net/arp: la entrada tiene una MAC resuelta
+ARP_COMPLETE = 0x2
+NEIGH_LINE_RE = re.compile(r'^(\S+)\s.*?\blladdr\s+(\S+)(?:.*\s(\S+))?\s*$')
+NEIGH_UNREACHABLE = {'FAILED', 'INCOMPLETE'}
+ISC_LEASE_RE = re.compile(r'lease\s+(\S+)\s*\{(.*?)\}', re.DOTALL)
+ISC_FIELD_RES = {
+    'mac': re.compile(r'hardware\s+ethernet\s+([0-9A-Fa-f:]+)'),
+    'hostname': re.compile(r'client-hostname\s+"([^"]*)"'),
+    'state': re.compile(r'(?<!next )binding\s+state\s+(\w+)'),
+    'ends': re.compile(r'ends\s+(?:\d\s+(\d{4}/\d{2}/\d{2}\s+\d{2}:\d{2}:\d{2})|epoch\s+(\d+))'),
+}
+
+# Datos que el descubrimiento pasivo no conoce; mismos valores que usa NetworkScanner
+UNKNOWN = 'Unknown'
+
+
+class DiscoverySource:
+    """Fuente pasiva de vecinos de red. Las subclases implementan read()"""
+    name = ''
+
+    def available(self):
+        return True
+
+    def read(self):
+        raise NotImplementedError
+
+
+class FileSource(DiscoverySource):
+    path = ''
+
+    def __init__(self, path=None):
+        if path:
+            self.path = path
+
+    def available(self):
+        return os.access(self.path, os.R_OK)
+
+    def read(self):
+        with open(self.path, encoding='utf-8', errors='replace') as file:
+            return list(self.parse(file.read()))
+
+    def parse(self, text):
+        raise NotImplementedError
+
+
+class ProcArpSource(FileSource):
+    """Tabla ARP del kernel de Linux"""
+    name = 'arp'
+    path = '/proc/net/arp'
+
+    def parse(self, text):
+        # IP address  HW type  Flags  HW address  Mask  Device
+        for line in text.splitlines()[1:]:
+            fields = line.split()
+            if len(fields) >= 4 and int(fields[2], 16) & ARP_COMPLETE:
+                yield Neighbor(fields[0], fields[3], '')
+
+
+class IpNeighSource(DiscoverySource):
+    """Salida de `ip -4 neigh show` (iproute2)"""
+    name = 'neigh'
+    command = ('ip', '-4', 'neigh', 'show')
+    timeout = 5
+
+    def available(self):
+        return shutil.which(self.command[0]) is not None
+
+    def read(self):
+        output = subprocess.run(self.command, capture_output=True, text=True, timeout=self.timeout, check=True).stdout
+        return list(self.parse(output))
+
+    def parse(self, text):
+        # 192.168.1.1 dev eth0 lladdr aa:bb:cc:dd:ee:ff REACHABLE
+        for line in text.splitlines():
+            match = NEIGH_LINE_RE.match(line.strip())
+            if match and match[3] not in NEIGH_UNREACHABLE:
+                yield Neighbor(match[1], match[2], '')
+
+
+class IscDhcpLeaseSource(FileSource):
+    """Archivo dhcpd.leases de ISC DHCP; la última concesión de cada IP es la vigente"""
+    name = 'isc'
+    path = '/var/lib/dhcp/dhcpd.leases'
+
+    def parse(self, text, now=None):
+        now = now or datetime.now(dt_timezone.utc)
+        leases = {}
+        for match in ISC_LEASE_RE.finditer(text):
+            body = match[2]
+            fields = {name: regex.search(body) for name, regex in ISC_FIELD_RES.items()}
+            if fields['state'] and fields['state'][1] != 'active':
+                leases.pop(match[1], None)
+                continue
+            ends = fields['ends']
+            if ends:
+                if ends[1]:
+                    expires = datetime.strptime(ends[1], '%Y/%m/%d %H:%M:%S').replace(tzinfo=dt_timezone.utc)
+                else:
+                    expires = datetime.fromtimestamp(int(ends[2]), dt_timezone.utc)
+                if expires < now:
+                    leases.pop(match[1], None)
+                    continue
+            leases[match[1]] = Neighbor(
+                match[1],
+                fields['mac'][1] if fields['mac'] else '',
+                fields['hostname'][1] if fields['hostname'] else '',
+            )
+        return leases.values()
+
+
+class DnsmasqLeaseSource(FileSource):
+    """Archivo de concesiones de dnsmasq: "expiración mac ip hostname client-id" por línea"""
+    name = 'dnsmasq'
+    path = '/var/lib/misc/dnsmasq.leases'
+
+    def parse(self, text, now=None):
+        now = (now or datetime.now(dt_timezone.utc)).timestamp()
+        for line in text.splitlines():
+            fields = line.split()
+            if len(fields) < 4 or not fields[0].isdigit():
+                continue
+            # Una expiración 0 es una concesión sin vencimiento
+            if fields[0] != '0' and int(fields[0]) < now:
+                continue
+            yield Neighbor(fields[2], fields[1], '' if fields[3] == '*' else fields[3])
+
+
+# Fuentes disponibles para DISCOVERY_SOURCES ("nombre" o "nombre:ruta")
+SOURCE_TYPES = {
+    source.name: source
+    for source in (ProcArpSource, IpNeighSource, IscDhcpLeaseSource, DnsmasqLeaseSource)
+}
+
+
+def build_sources(specs):
+    sources = []
+    for spec in specs:
+        name, _, path = spec.strip().partition(':')
+        if name:
+            source_type = SOURCE_TYPES[name]
+            sources.append(source_type(path) if path else source_type())
+    return sources
+
+
+def default_sources():
+    return build_sources(getattr(settings, 'DISCOVERY_SOURCES', None) or ['arp'])
+
+
+def default_networks():
+    return [ipaddress.ip_network(network, strict=False) for network in getattr(settings, 'DISCOVERY_NETWORKS', [])]
+
+
+def discover(sources=None, networks=None):
+    """
+    Dispositivos vistos por las fuentes pasivas, en el formato de NetworkScanner.scan_network.
+
+    Las fuentes se consultan en orden: la primera que informa una IP define su MAC y las
+    siguientes solo completan el nombre de host. Devuelve None si ninguna fuente está disponible.
+    """
+    sources = [source for source in (default_sources() if sources is None else sources) if source.available()]
+    if not sources:
+        return None
+    networks = default_networks() if networks is None else networks
+
+    found = {}
+    hostnames_by_mac = {}
+    for source in sources:
+        for neighbor in source.read():
+            ip = normalize_ip(neighbor.ip)
+            if not ip or (networks and not any(ipaddress.ip_address(ip) in network for network in networks)):
+                continue
+            mac = normalize_mac(neighbor.mac)
+            hostname = neighbor.hostname.strip() if normalize_hostname(neighbor.hostname) else ''
+            if mac and hostname:
+                hostnames_by_mac.setdefault(mac, hostname)
+
+            entry = found.get(ip)
+            if entry is None:
+                found[ip] = {'ip': ip, 'mac': mac, 'hostname': hostname, 'sources': [source.name]}
+                continue
+            if source.name not in entry['sources']:
+                entry['sources'].append(source.name)
+            if not entry['mac']:
+                entry['mac'] = mac
+            # Una concesión de otra MAC para la misma IP ya no describe al equipo conectado
+            if not entry['hostname'] and (not mac or mac == entry['mac']):
+                entry['hostname'] = hostname
+
+    entries = sorted(found.values(), key=lambda entry: ipaddress.ip_address(entry['ip']))
+    vendors = vendors_for([entry['mac'] for entry in entries])
+    return [
+        {
+            'ip': entry['ip'],
+            'hostname': entry['hostname'] or hostnames_by_mac.get(entry['mac']) or UNKNOWN,
+            'mac': entry['mac'] or UNKNOWN,
+            'vendor': vendor or UNKNOWN,
+            'type': UNKNOWN,
+            'os': UNKNOWN,
+            'services': [],
+            'model': UNKNOWN,
+            'status': 'Activo',
+            'source': ', '.join(entry['sources']),
+        }
+        for entry, vendor in zip(entries, vendors)
+    ]
+
+
+def new_scanner():
+    """
+    NetworkScanner importado recién al usarlo.
+
+    nmap y scapy tardan cerca de un segundo en cargarse y ocupan decenas de MB: importarlos
+    al inicio lo pagaría cada worker y cada comando de manage.py aunque nunca escanee la red.
+    """
+    from .network_scanner import NetworkScanner
+    return NetworkScanner()
+
+
+def iter_probes(devices, scanner=None, limit=None, index=None):
+    """
+    Sondeo activo (nmap -sV -O) solo de los dispositivos que no coinciden con un activo.
+
+    Entrega cada dispositivo al terminar su sondeo. Los datos de nmap reemplazan a los pasivos
+    salvo cuando nmap no los conoce; el escáner se crea solo si hay algún host que sondear.
+    """
+    limit = getattr(settings, 'DISCOVERY_MAX_PROBES', 10) if limit is None else limit
+    unknown = [device for device in devices if not device.get('asset_id')][:limit]
+    if not unknown:
+        return
+    if scanner is None:
+        scanner = new_scanner()
+    if index is None:
+        index = AssetIndex.build()
+
+    for device in unknown:
+        mac = device['mac'] if device['mac'] != UNKNOWN else None
+        for key, value in scanner.probe_host(device['ip'], mac).items():
+            if value and value != UNKNOWN:
+                device[key] = value
+        device['source'] += ', nmap'
+        # El sondeo puede revelar un nombre de host que sí está en el inventario
+        match_scanned_devices([device], index)
+        yield device
+
+
+def probe_unknown(devices, scanner=None, limit=None, index=None):
+    """Sondea los dispositivos desconocidos y devuelve la cantidad de hosts sondeados"""
+    return sum(1 for _ in iter_probes(devices, scanner, limit, index))
+
+
+def iter_device_events(active=False, network=None):
+    """
+    Eventos ("device" o "update", dispositivo) de un escaneo, en el orden en que se obtienen.
+
+    En modo pasivo se entregan primero todos los dispositivos descubiertos y luego, como
+    "update", los desconocidos a medida que nmap los sondea. En modo activo (o si no hay fuentes
+    pasivas disponibles) cada host se entrega al terminar su escaneo detallado.
+    """
+    index = AssetIndex.build()
+    devices = None if active else discover()
+    if devices is None:
+        for device in new_scanner().iter_network(network):
+            match_scanned_devices([device], index)
+            yield 'device', device
+        return
+
+    match_scanned_devices(devices, index)
+    for device in devices:
+        yield 'device', device
+    for device in iter_probes(devices, index=index):
+        yield 'update', device
@@ -0,0 +1,87 @@
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber
+from .models import Asset, AssetCheckpoint, Location, Movement
+
+# Estado en el que queda el activo después de cada tipo de movimiento (ver movement_create)
+MOVEMENT_STATUS = {
+    'maintenance': 'maintenance',
+    'return': 'active',
+    'retirement': 'retired',
+}
+
+STATUS_LABELS = dict(Asset.STATUS_CHOICES)
+
+
+def latest_per_asset(movements):
+    """Conserva solo el movimiento más reciente de cada activo usando una consulta de ventana"""
+    return movements.annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=F('asset_id'),
+            order_by=[F('movement_date').desc(), F('id').desc()],
+        )
+    ).filter(row_number=1)
+
+
+def latest_checkpoint_time(at):
+    """Fecha del último punto de control tomado antes de `at`"""
+    return AssetCheckpoint.objects.filter(taken_at__lte=at).aggregate(Max('taken_at'))['taken_at__max']
+
+
+def inventory_state_at(at, assets=None):
+    """
+    Reconstruye la ubicación, el responsable y el estado de cada activo en el instante `at`.
+
+    Parte del último punto de control anterior a `at` y aplica únicamente los movimientos
+    registrados entre ese punto y `at`. Los campos sin información en el historial quedan en None.
+    """
+    if assets is None:
+        assets = Asset.objects.all()
+    assets = assets.filter(created_at__lte=at)
+
+    state = {}
+    for asset_id, name, serial_number in assets.values_list('id', 'name', 'serial_number').order_by('id'):
+        state[asset_id] = {
+            'asset_id': asset_id,
+            'name': name,
+            'serial_number': serial_number,
+            'location_id': None,
+            'assigned_to_name': None,
+            'status': None,
+        }
+
+    movements = Movement.objects.filter(asset__in=assets, movement_date__lte=at)
+    checkpoint_time = latest_checkpoint_time(at)
+    if checkpoint_time:
+        checkpoints = AssetCheckpoint.objects.filter(taken_at=checkpoint_time, asset__in=assets)
+        for asset_id, location_id, assigned_to_name, status in checkpoints.values_list(
+            'asset_id', 'location_id', 'assigned_to_name', 'status'
+        ):
+            state[asset_id].update(location_id=location_id, assigned_to_name=assigned_to_name, status=status)
+        movements = movements.filter(movement_date__gt=checkpoint_time)
+
+    # Ubicación: último movimiento con destino registrado
+    for asset_id, location_id in latest_per_asset(
+        movements.filter(to_location__isnull=False)
+    ).values_list('asset_id', 'to_location_id'):
+        state[asset_id]['location_id'] = location_id
+
+    # Responsable: último movimiento que asignó un nombre
+    for asset_id, assigned_to_name in latest_per_asset(
+        movements.exclude(assigned_to_name__isnull=True).exclude(assigned_to_name='')
+    ).values_list('asset_id', 'assigned_to_name'):
+        state[asset_id]['assigned_to_name'] = assigned_to_name
+
+    # Estado: último movimiento que cambia el estado del activo
+    for asset_id, movement in latest_per_asset(
+        movements.filter(movement__in=MOVEMENT_STATUS)
+    ).values_list('asset_id', 'movement'):
+        state[asset_id]['status'] = MOVEMENT_STATUS[movement]
+
+    location_ids = {row['location_id'] for row in state.values() if row['location_id']}
+    location_names = dict(Location.objects.filter(id__in=location_ids).values_list('id', 'name'))
+    for row in state.values():
+        row['location'] = location_names.get(row['location_id'])
+        row['status_display'] = STATUS_LABELS.get(row['status'])
+
+    return list(state.values())
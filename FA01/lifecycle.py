@@ -0,0 +1,152 @@
+import numpy as np
+from django.utils import timezone
+from .models import Asset
+
+# Mismo criterio que Asset.is_nearing_end_of_life
+END_OF_LIFE_MARGIN = Asset.END_OF_LIFE_MARGIN
+WARRANTY_WARNING_DAYS = Asset.WARRANTY_WARNING_DAYS
+
+WARRANTY_LABELS = {
+    'none': 'Sin garantía',
+    'expired': 'Vencida',
+    'expiring': 'Por vencer',
+    'active': 'Vigente',
+}
+
+
+class LifecycleArrays:
+    """Columnas de los activos necesarias para el análisis de ciclo de vida"""
+
+    def __init__(self, ids, serial_number, purchase_date, preferred_usage_period, warranty_expiration, category,
+                 location_id):
+        self.ids = ids
+        self.serial_number = serial_number
+        self.purchase_date = purchase_date
+        self.preferred_usage_period = preferred_usage_period
+        self.warranty_expiration = warranty_expiration
+        self.category = category
+        self.location_id = location_id
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_queryset(cls, queryset=None):
+        if queryset is None:
+            queryset = Asset.objects.all()
+        rows = list(queryset.order_by().values_list(
+            'id', 'serial_number', 'purchase_date', 'preferred_usage_period', 'warranty_expiration', 'category',
+            'location_id',
+        ).iterator(chunk_size=10000))
+        columns = list(zip(*rows)) if rows else [()] * 7
+        return cls(
+            np.array(columns[0], dtype=np.int64),
+            np.array(columns[1], dtype=object),
+            np.array(columns[2], dtype='datetime64[D]'),
+            np.array(columns[3], dtype=np.int32),
+            np.array(columns[4], dtype='datetime64[D]'),
+            np.array(columns[5], dtype=object),
+            # Sin ubicación se representa como 0
+            np.array([location_id or 0 for location_id in columns[6]], dtype=np.int64),
+        )
+
+
+def split_dates(dates):
+    """Devuelve año, mes y día de un arreglo datetime64[D]"""
+    months = dates.astype('datetime64[M]')
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (dates - months).astype(np.int64) + 1
+    return years, month, day
+
+
+def compute_lifecycle(arrays, today=None):
+    """
+    Calcula en lote edad, vida restante, fin de vida y estado de garantía de todos los activos.
+
+    Reproduce Asset.get_age e Asset.is_nearing_end_of_life sin instanciar los modelos.
+    """
+    if today is None:
+        today = timezone.now().date()
+    today = np.datetime64(today, 'D')
+    today_year, today_month, today_day = split_dates(np.array([today]))
+
+    purchase = arrays.purchase_date
+    has_purchase = ~np.isnat(purchase)
+    year, month, day = split_dates(purchase)
+
+    before_anniversary = (month > today_month) | ((month == today_month) & (day > today_day))
+    age = np.where(has_purchase, np.maximum(today_year - year - before_anniversary, 0), 0)
+
+    months_since_purchase = (today_year - year) * 12 + today_month - month
+    period = arrays.preferred_usage_period.astype(np.int64)
+    remaining_months = np.where(has_purchase, period - months_since_purchase, 0)
+    nearing_end_of_life = has_purchase & (months_since_purchase >= period - END_OF_LIFE_MARGIN)
+    end_of_life_month = purchase.astype('datetime64[M]') + period
+
+    warranty = arrays.warranty_expiration
+    has_warranty = ~np.isnat(warranty)
+    warranty_days_left = np.where(has_warranty, (warranty - today).astype(np.int64), 0)
+    warranty_status = np.full(len(arrays), 'none', dtype=object)
+    warranty_status[has_warranty & (warranty_days_left < 0)] = 'expired'
+    warranty_status[has_warranty & (warranty_days_left >= 0) & (warranty_days_left <= WARRANTY_WARNING_DAYS)] = 'expiring'
+    warranty_status[has_warranty & (warranty_days_left > WARRANTY_WARNING_DAYS)] = 'active'
+
+    return {
+        'age': age,
+        'months_since_purchase': np.where(has_purchase, months_since_purchase, 0),
+        'remaining_months': remaining_months,
+        'nearing_end_of_life': nearing_end_of_life,
+        'end_of_life_month': end_of_life_month,
+        'warranty_days_left': warranty_days_left,
+        'warranty_status': warranty_status,
+        'has_purchase': has_purchase,
+    }
+
+
+def current_quarter_index(today=None):
+    """Número de trimestre contado desde 1970-T1"""
+    if today is None:
+        today = timezone.now().date()
+    return int(np.datetime64(today, 'M').astype(np.int64)) // 3
+
+
+def quarter_label(index):
+    return f'{index // 4 + 1970}-T{index % 4 + 1}'
+
+
+def upcoming_quarters(quarters=8, today=None):
+    start = current_quarter_index(today)
+    return [quarter_label(start + offset) for offset in range(quarters)]
+
+
+def replacement_forecast(arrays, metrics, quarters=8, today=None):
+    """
+    Cuenta los activos que alcanzan su fin de vida en cada uno de los próximos trimestres,
+    agrupados por ubicación y categoría. Los activos ya vencidos se cuentan en el trimestre actual.
+    """
+    current_quarter = current_quarter_index(today)
+
+    eol_quarter = metrics['end_of_life_month'].astype(np.int64) // 3
+    quarter_offset = np.maximum(eol_quarter - current_quarter, 0)
+    selected = metrics['has_purchase'] & (quarter_offset < quarters)
+
+    categories, category_codes = np.unique(arrays.category[selected].astype(str), return_inverse=True)
+    locations, location_codes = np.unique(arrays.location_id[selected], return_inverse=True)
+    offsets = quarter_offset[selected]
+
+    # Una sola clave entera por combinación (trimestre, ubicación, categoría)
+    keys = (offsets * len(locations) + location_codes) * len(categories) + category_codes
+    unique_keys, counts = np.unique(keys, return_counts=True)
+
+    forecast = []
+    for key, count in zip(unique_keys.tolist(), counts.tolist()):
+        rest, category_code = divmod(key, len(categories))
+        offset, location_code = divmod(rest, len(locations))
+        forecast.append({
+            'quarter': quarter_label(current_quarter + offset),
+            'location_id': int(locations[location_code]) or None,
+            'category': str(categories[category_code]),
+            'count': count,
+        })
+    return forecast
@@ -0,0 +1,72 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count
+from .models import Asset, Location
+
+
+def location_tree(locations=None):
+    """
+    Ubicaciones en orden de árbol (cada una seguida de sus sububicaciones, hermanas por nombre).
+
+    Devuelve una lista de (ubicación, profundidad) armada con una sola consulta.
+    """
+    if locations is None:
+        locations = Location.objects.all()
+    children = defaultdict(list)
+    for location in locations.order_by('name', 'id'):
+        children[location.parent_id].append(location)
+
+    ordered = []
+    stack = [(location, 0) for location in reversed(children[None])]
+    while stack:
+        location, depth = stack.pop()
+        ordered.append((location, depth))
+        stack.extend((child, depth + 1) for child in reversed(children[location.pk]))
+    return ordered
+
+
+def rolled_up_counts(counts, paths):
+    """
+    Suma los conteos de cada ubicación a todos sus ancestros.
+
+    `counts` es {id: conteo propio} y `paths` {id: ruta}; devuelve {id: conteo del subárbol}.
+    """
+    totals = defaultdict(int)
+    for location_id, count in counts.items():
+        path = paths.get(location_id)
+        if not path:
+            continue
+        for ancestor_id in path.split(Location.PATH_SEPARATOR)[:-1]:
+            totals[int(ancestor_id)] += count
+    return totals
+
+
+def subtree_asset_counts(assets=None):
+    """Activos de cada ubicación incluyendo sus sububicaciones: un GROUP BY y la suma por ruta"""
+    if assets is None:
+        assets = Asset.objects.all()
+    counts = dict(
+        assets.exclude(location=None).order_by().values_list('location_id').annotate(total=Count('id'))
+    )
+    paths = dict(Location.objects.filter(id__in=counts).values_list('id', 'path'))
+    return rolled_up_counts(counts, paths)
+
+
+def move_locations(locations, parent):
+    """
+    Mueve las ubicaciones (con sus subárboles) bajo `parent`, o a la raíz si es None.
+
+    Cada subárbol se reescribe con un UPDATE sobre location_path_idx. Lanza ValueError si
+    `parent` está dentro de alguna de las ubicaciones movidas; devuelve la cantidad movida.
+    """
+    moved = 0
+    with transaction.atomic():
+        # Se releen bloqueadas: mover una ubicación cambia la ruta de las que están debajo
+        for location in Location.objects.select_for_update().filter(pk__in=[location.pk for location in locations]):
+            location.refresh_from_db(fields=['path', 'parent'])
+            if location.parent_id == (parent.pk if parent else None):
+                continue
+            location.parent = parent
+            location.save(update_fields=['parent', 'updated_at'])
+            moved += 1
+    return moved
@@ -0,0 +1,30 @@
+import time
+from django.core.files.storage import InvalidStorageError
+from django.core.management.base import BaseCommand, CommandError
+from FA01.archive import ARCHIVE_AFTER_DAYS, BATCH_SIZE, LINKED_MODELS, RELATED_MODELS, archivable_assets, archive_assets
+
+class Command(BaseCommand):
+    help = 'Move retired and lost assets, with their movements, images and letters, out of the inventory tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS, help='Only assets unchanged for this many days')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--move-media', action='store_true', help="Move their files to the 'archive' storage")
+        parser.add_argument('--dry-run', action='store_true', help='Only count the assets that would be archived')
+
+    def handle(self, *args, **options):
+        assets = archivable_assets(options['days'])
+        if options['dry_run']:
+            self.stdout.write(f'{assets.count()} assets would be archived')
+            return
+
+        started = time.perf_counter()
+        try:
+            counts = archive_assets(assets, batch_size=options['batch_size'], move_media=options['move_media'])
+        except InvalidStorageError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for name in [*RELATED_MODELS, *LINKED_MODELS, 'files']:
+            self.stdout.write(f'  {name}: {counts[name]}')
+        self.stdout.write(self.style.SUCCESS(f'Successfully archived {counts["assets"]} assets in {elapsed:.2f}s'))
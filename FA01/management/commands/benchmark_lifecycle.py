@@ -0,0 +1,42 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from FA01.lifecycle import LifecycleArrays, compute_lifecycle, replacement_forecast
+from FA01.models import Asset
+
+class Command(BaseCommand):
+    help = 'Time the vectorized lifecycle analytics on a synthetic fleet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--locations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        rng = np.random.default_rng(0)
+        purchase = np.datetime64('2015-01-01') + rng.integers(0, 4000, rows)
+        purchase[rng.random(rows) < 0.05] = np.datetime64('NaT')
+        warranty = purchase + rng.integers(365, 1500, rows)
+        categories = np.array([value for value, _ in Asset.CATEGORIES], dtype=object)
+
+        arrays = LifecycleArrays(
+            np.arange(rows, dtype=np.int64),
+            np.full(rows, '', dtype=object),
+            purchase,
+            rng.choice([24, 36, 48, 60], rows).astype(np.int32),
+            warranty,
+            categories[rng.integers(0, len(categories), rows)],
+            rng.integers(0, options['locations'], rows),
+        )
+
+        started = time.perf_counter()
+        metrics = compute_lifecycle(arrays)
+        computed = time.perf_counter()
+        forecast = replacement_forecast(arrays, metrics)
+        finished = time.perf_counter()
+
+        self.stdout.write(f'compute_lifecycle: {computed - started:.3f}s')
+        self.stdout.write(f'replacement_forecast: {finished - computed:.3f}s ({len(forecast)} groups)')
+        self.stdout.write(
+            self.style.SUCCESS(f'Processed {rows} assets in {finished - started:.3f}s')
+        )
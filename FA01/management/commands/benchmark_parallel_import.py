@@ -0,0 +1,42 @@
+import io
+import os
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from FA01.datasets import ASSET_DATASET
+from FA01.parallel_import import parse_xlsx_parallel
+from FA01.tabular import write_xlsx
+
+class Command(BaseCommand):
+    help = 'Measure workbook parse throughput (rows/s) of the asset import for several worker counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        start = date(2015, 1, 1)
+        sink = io.BytesIO()
+        write_xlsx(sink, ASSET_DATASET, (
+            [
+                '', f'Activo {index}', 'Laptop', f'SN{index:08d}', start + timedelta(days=index % 4000), 'Activo',
+                f'Sucursal {index % 200}', f'Responsable {index % 500}', 'Descripción', 'Intel i5, 8GB RAM', 1, 36,
+                (start + timedelta(days=index % 5000)).strftime('%d/%m/%Y'),
+            ]
+            for index in range(rows)
+        ))
+        data = sink.getvalue()
+        self.stdout.write(f'Workbook: {rows} rows, {len(data) / 1e6:.1f} MB, {os.cpu_count()} cores available')
+
+        baseline = None
+        for workers in options['workers']:
+            started = time.perf_counter()
+            parsed = parse_xlsx_parallel(data, 'ASSET_DATASET', workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f'{workers} workers: {elapsed:.2f}s, {len(parsed) / elapsed:,.0f} rows/s, speedup {baseline / elapsed:.2f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished'))
@@ -0,0 +1,57 @@
+import io
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from FA01.datasets import ASSET_DATASET
+from FA01.models import Asset
+from FA01.tabular import READERS, WRITERS
+
+class Command(BaseCommand):
+    help = 'Measure the per-row cost of the tabular import/export pipeline on synthetic asset rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+
+    def timed(self, label, rows, function):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label}: {elapsed:.3f}s ({elapsed / rows * 1e6:.1f} µs/row)')
+        return result
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        rng = random.Random(0)
+        categories = [value for value, _ in Asset.CATEGORIES]
+        statuses = [value for value, _ in Asset.STATUS_CHOICES]
+        start = date(2015, 1, 1)
+
+        # Filas tal como las devuelve values_list
+        values = [
+            (
+                index, f'Activo {index}', rng.choice(categories), f'SN{index:08d}',
+                start + timedelta(days=rng.randrange(4000)), rng.choice(statuses), f'Sucursal {index % 200}',
+                None, 'Descripción', 'Intel i5, 8GB RAM', 1, rng.choice([24, 36, 48, 60]),
+                start + timedelta(days=rng.randrange(5000)),
+            )
+            for index in range(rows)
+        ]
+
+        exported = self.timed('export_rows', rows, lambda: list(ASSET_DATASET.export_rows(values)))
+        numbered = list(enumerate(exported, 2))
+        self.timed('parse_rows', rows, lambda: sum(1 for _ in ASSET_DATASET.parse_rows(numbered)))
+
+        for fmt in WRITERS:
+            sink = io.BytesIO() if fmt == 'xlsx' else io.StringIO()
+            self.timed(f'write {fmt}', rows, lambda: WRITERS[fmt](sink, ASSET_DATASET, exported))
+            data = sink.getvalue()
+            source = io.BytesIO(data if isinstance(data, bytes) else data.encode())
+            self.timed(
+                f'read + parse {fmt}', rows,
+                lambda: sum(1 for _ in ASSET_DATASET.parse_rows(READERS[fmt](source, ASSET_DATASET))),
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Benchmarked {rows} rows ({len(ASSET_DATASET.columns)} columns)')
+        )
@@ -0,0 +1,61 @@
+import csv
+import gzip
+import re
+from django.core.management.base import BaseCommand, CommandError
+from FA01.oui import DEFAULT_DATABASE_PATH, PREFIX_BITS, OuiDatabase
+
+# Registros del IEEE (oui.csv, mam.csv, oui36.csv) y su longitud de prefijo
+IEEE_REGISTRIES = {'MA-L': 24, 'MA-M': 28, 'MA-S': 36}
+# Formato manuf de Wireshark: "00:55:DA:10/28<TAB>Corto<TAB>Nombre completo"
+MANUF_LINE_RE = re.compile(r'^([0-9A-Fa-f:\-.]+)(?:/(\d+))?\s*\t([^\t]*)(?:\t(.*))?$')
+
+class Command(BaseCommand):
+    help = 'Build the bundled OUI vendor database from IEEE registry CSV files or a Wireshark manuf file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='+', help='IEEE oui.csv / mam.csv / oui36.csv or manuf files')
+        parser.add_argument('--output', default=str(DEFAULT_DATABASE_PATH))
+
+    def read_ieee(self, path):
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                bits = IEEE_REGISTRIES.get(row.get('Registry'))
+                assignment = (row.get('Assignment') or '').strip()
+                if bits and len(assignment) * 4 == bits:
+                    yield assignment.upper(), row['Organization Name'].strip()
+
+    def read_manuf(self, path):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                match = MANUF_LINE_RE.match(line.rstrip('\n'))
+                if not match or line.startswith('#'):
+                    continue
+                digits = re.sub(r'[^0-9A-Fa-f]', '', match[1]).upper()
+                bits = int(match[2] or 24)
+                if bits in PREFIX_BITS and len(digits) * 4 >= bits:
+                    yield digits[:bits // 4], (match[4] or match[3]).strip()
+
+    def handle(self, *args, **options):
+        entries = {}
+        for path in options['sources']:
+            with open(path, encoding='utf-8', errors='replace') as file:
+                first_line = file.readline()
+            reader = self.read_ieee if first_line.startswith('Registry,') else self.read_manuf
+            count = 0
+            for prefix, vendor in reader(path):
+                if vendor:
+                    entries[prefix] = ' '.join(vendor.split())
+                    count += 1
+            self.stdout.write(f'{path}: {count} prefixes')
+        if not entries:
+            raise CommandError('No OUI prefixes found in the given files')
+
+        # Ordenado y sin fecha en el encabezado gzip: el archivo se regenera de forma reproducible
+        output = options['output']
+        with open(output, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as compressed:
+            for prefix in sorted(entries, key=lambda prefix: (len(prefix), prefix)):
+                compressed.write(f'{prefix}\t{entries[prefix]}\n'.encode('utf-8'))
+
+        database = OuiDatabase.load(output)
+        counts = ', '.join(f'/{bits}: {len(prefixes)}' for bits, prefixes, _ in database.tables)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(database)} prefixes ({counts}) to {output}'))
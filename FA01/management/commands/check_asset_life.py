@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from FA01.models import Asset
 
 class Command(BaseCommand):
-    help = 'Check for assets nearing their preferred usage period and send notifications'
+    help = 'Check for assets nearing their preferred usage period and queue notifications for send_outbox'
 
     def handle(self, *args, **options):
         assets = Asset.objects.filter(status='active')
@@ -14,5 +14,5 @@ class Command(BaseCommand):
                 notified_count += 1
 
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully checked {len(assets)} assets and sent {notified_count} notifications')
+            self.style.SUCCESS(f'Successfully checked {len(assets)} assets and queued {notified_count} notifications')
         ) 
\ No newline at end of file
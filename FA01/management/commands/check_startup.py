@@ -0,0 +1,87 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Módulos que no deben cargarse al iniciar un worker: solo los usa el escaneo de red
+DEFAULT_FORBIDDEN = ['nmap', 'scapy']
+# Margen sobre los ~800 ms medidos sin nmap/scapy; con scapy al inicio se superaba holgadamente
+DEFAULT_BUDGET_MS = 1200
+
+# Se ejecuta en un intérprete nuevo: configura Django y carga todas las vistas a través del URLconf
+STARTUP_SCRIPT = '''
+import importlib, json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+importlib.import_module(settings.ROOT_URLCONF)
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": sorted(sys.modules),
+}))
+'''
+
+class Command(BaseCommand):
+    help = 'Measure cold-start import time and memory of a web worker and fail if it exceeds the budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to start; the median is reported')
+        parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+        parser.add_argument('--forbid', nargs='*', default=DEFAULT_FORBIDDEN, help='Top-level modules that must not be imported')
+        parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+
+    def start_worker(self, importtime=False):
+        command = [sys.executable]
+        if importtime:
+            command += ['-X', 'importtime']
+        command += ['-c', STARTUP_SCRIPT]
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'inventario.settings'))
+        started = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=settings.BASE_DIR)
+        wall = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f'Worker failed to start:\n{result.stderr}')
+        return wall, json.loads(result.stdout.splitlines()[-1]), result.stderr
+
+    def slowest_imports(self, stderr, count):
+        """Módulos de primer nivel con mayor tiempo acumulado según -X importtime"""
+        rows = []
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            depth = (len(name) - len(name.lstrip())) // 2
+            if depth == 0:
+                rows.append((int(cumulative), name.strip()))
+        return sorted(rows, reverse=True)[:count]
+
+    def handle(self, *args, **options):
+        runs = [self.start_worker() for _ in range(max(1, options['runs']))]
+        wall = statistics.median(run[0] for run in runs)
+        imports = statistics.median(run[1]['seconds'] for run in runs)
+        rss = statistics.median(run[1]['max_rss_kb'] for run in runs)
+        modules = runs[-1][1]['modules']
+
+        _, _, stderr = self.start_worker(importtime=True)
+        self.stdout.write('Slowest top-level imports:')
+        for cumulative, name in self.slowest_imports(stderr, options['top']):
+            self.stdout.write(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+        self.stdout.write(f'Cold start: {wall * 1000:.0f} ms (Django setup + URLconf: {imports * 1000:.0f} ms)')
+        self.stdout.write(f'Max RSS: {rss / 1024:.1f} MB')
+
+        forbidden = sorted({
+            module.split('.')[0] for module in modules if module.split('.')[0] in options['forbid']
+        })
+        if forbidden:
+            raise CommandError(f'Modules imported at startup that should load lazily: {", ".join(forbidden)}')
+        if imports * 1000 > options['budget_ms']:
+            raise CommandError(f'Startup imports took {imports * 1000:.0f} ms, over the {options["budget_ms"]:.0f} ms budget')
+        self.stdout.write(self.style.SUCCESS(f'Startup is within the {options["budget_ms"]:.0f} ms import budget'))
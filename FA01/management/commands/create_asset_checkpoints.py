@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from FA01.models import Asset, AssetCheckpoint
+
+class Command(BaseCommand):
+    help = 'Store a snapshot of every asset state so point-in-time queries only replay recent movements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        taken_at = timezone.now()
+        rows = Asset.objects.values_list('id', 'location_id', 'assigned_to_name', 'status')
+        batch = []
+        created = 0
+
+        for asset_id, location_id, assigned_to_name, status in rows.iterator(chunk_size=batch_size):
+            batch.append(AssetCheckpoint(
+                asset_id=asset_id,
+                taken_at=taken_at,
+                location_id=location_id,
+                assigned_to_name=assigned_to_name,
+                status=status,
+            ))
+            if len(batch) >= batch_size:
+                AssetCheckpoint.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            AssetCheckpoint.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully stored {created} asset checkpoints at {taken_at.isoformat()}')
+        )
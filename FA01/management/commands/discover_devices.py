@@ -0,0 +1,42 @@
+import ipaddress
+import time
+from django.core.management.base import BaseCommand
+from FA01.discovery import build_sources, discover, probe_unknown
+from FA01.reconciliation import AssetIndex, match_scanned_devices
+
+class Command(BaseCommand):
+    help = 'List the devices seen by the passive discovery sources (ARP table, neighbours, DHCP leases)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', action='append', dest='sources', help='Source as "name" or "name:path"; repeatable')
+        parser.add_argument('--network', action='append', dest='networks', help='Only include this CIDR; repeatable')
+        parser.add_argument('--probe', action='store_true', help='Probe devices not in the inventory with nmap')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum hosts to probe')
+
+    def handle(self, *args, **options):
+        sources = build_sources(options['sources']) if options['sources'] else None
+        networks = [ipaddress.ip_network(network, strict=False) for network in options['networks'] or []] or None
+
+        started = time.perf_counter()
+        devices = discover(sources, networks)
+        if devices is None:
+            self.stdout.write(self.style.WARNING('No passive discovery source is available'))
+            return
+        discovered = time.perf_counter()
+        index = AssetIndex.build()
+        match_scanned_devices(devices, index)
+        matched = time.perf_counter()
+        probed = probe_unknown(devices, limit=options['limit'], index=index) if options['probe'] else 0
+
+        for device in devices:
+            self.stdout.write(
+                f"{device['ip']:<16}{device['mac']:<19}{device['hostname'][:24]:<26}"
+                f"{device['vendor'][:30]:<32}{'inventory' if device['asset_id'] else 'unknown':<11}{device['source']}"
+            )
+        unknown = sum(1 for device in devices if not device['asset_id'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Discovered {len(devices)} devices in {(discovered - started) * 1000:.1f} ms '
+                f'(matched in {(matched - discovered) * 1000:.1f} ms; {unknown} unknown, {probed} probed)'
+            )
+        )
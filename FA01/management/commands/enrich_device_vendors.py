@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from FA01.models import DispositivoSucursal
+from FA01.oui import BATCH_SIZE, enrich_vendors, get_database
+
+class Command(BaseCommand):
+    help = 'Fill in the vendor of reported network devices from the bundled OUI database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Look up every report again, not only those without vendor')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        database = get_database()
+        loaded = time.perf_counter()
+
+        reports = DispositivoSucursal.objects.all() if options['all'] else None
+        updated = enrich_vendors(reports, batch_size=options['batch_size'])
+        finished = time.perf_counter()
+
+        self.stdout.write(f'OUI database loaded in {loaded - started:.2f}s ({len(database)} prefixes)')
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully updated the vendor of {updated} reports in {finished - loaded:.2f}s')
+        )
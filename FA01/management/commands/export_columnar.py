@@ -0,0 +1,54 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from FA01.columnar_export import ColumnarExport, DATASETS, FORMATS, PARQUET, BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Export assets, movements, locations and branch devices as Parquet or Arrow IPC files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir')
+        parser.add_argument('--dataset', action='append', choices=sorted(DATASETS), dest='datasets',
+                            help='Dataset to export (repeatable, defaults to all)')
+        parser.add_argument('--format', choices=sorted(FORMATS), default=PARQUET)
+        parser.add_argument('--since', help='Only export rows changed after this ISO timestamp')
+        parser.add_argument('--state-file',
+                            help='JSON file holding the last exported watermark per dataset (incremental export)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since value: {options['since']}")
+
+        state = {}
+        state_file = options['state_file']
+        if state_file and os.path.exists(state_file):
+            with open(state_file) as f:
+                state = json.load(f)
+
+        for dataset in options['datasets'] or sorted(DATASETS):
+            dataset_since = since
+            if dataset_since is None and dataset in state:
+                dataset_since = parse_datetime(state[dataset])
+
+            export = ColumnarExport(dataset, options['format'], dataset_since, options['batch_size'])
+            path = os.path.join(output_dir, export.filename)
+            with open(path, 'wb') as f:
+                export.write(f)
+
+            if export.watermark is not None:
+                state[dataset] = export.watermark.isoformat()
+            self.stdout.write(f'{dataset}: {export.rows} rows -> {path}')
+
+        if state_file:
+            with open(state_file, 'w') as f:
+                json.dump(state, f, indent=2)
+
+        self.stdout.write(self.style.SUCCESS('Columnar export finished'))
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from FA01.datasets import ASSET_DATASET, import_assets, import_parsed_assets
+from FA01.parallel_import import parse_xlsx_parallel
+from FA01.tabular import format_for_filename, read_rows
+
+class Command(BaseCommand):
+    help = 'Import assets from an XLSX, CSV or JSON Lines file, parsing large workbooks in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: IMPORT_WORKERS or one per core)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with open(options['path'], 'rb') as f:
+            if format_for_filename(options['path']) == 'xlsx':
+                report = import_parsed_assets(parse_xlsx_parallel(f.read(), 'ASSET_DATASET', options['workers']))
+            else:
+                report = import_assets(read_rows(f, ASSET_DATASET, format_for_filename(options['path'])))
+        elapsed = time.perf_counter() - started
+
+        for line in report.error_lines(limit=50):
+            self.stdout.write(self.style.WARNING(line))
+        self.stdout.write(
+            self.style.SUCCESS(f'Imported {report.created} new and {report.updated} updated assets in {elapsed:.1f}s')
+        )
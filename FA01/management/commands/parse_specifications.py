@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from FA01.models import Asset
+from FA01.specs import BATCH_SIZE, backfill_specs
+
+class Command(BaseCommand):
+    help = 'Extract structured specifications from the free-text specifications of every asset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--category', action='append', help='Only assets of this category (repeatable)')
+
+    def handle(self, *args, **options):
+        assets = Asset.objects.all()
+        if options['category']:
+            assets = assets.filter(category__in=options['category'])
+
+        started = time.perf_counter()
+        updated = backfill_specs(assets, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Successfully updated the specifications of {updated} assets in {elapsed:.2f}s'))
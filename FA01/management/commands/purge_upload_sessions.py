@@ -0,0 +1,25 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from FA01.models import UploadSession
+from FA01.uploads import discard
+
+class Command(BaseCommand):
+    help = 'Delete old chunked upload sessions together with any staged file that was never attached'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        sessions = UploadSession.objects.filter(updated_at__lt=cutoff)
+        purged = 0
+
+        for session in sessions.iterator():
+            discard(session)
+            session.delete()
+            purged += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully purged {purged} upload sessions')
+        )
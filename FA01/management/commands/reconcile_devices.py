@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand
+from FA01.models import DispositivoSucursal
+from FA01.reconciliation import MISSING_AFTER_DAYS, AssetIndex, missing_assets, reconcile
+
+class Command(BaseCommand):
+    help = 'Link reported network devices to assets by MAC, serial number, hostname or IP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reconcile every report again, not only pending ones')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--missing-days', type=int, default=MISSING_AFTER_DAYS)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = AssetIndex.build()
+        indexed = time.perf_counter()
+
+        reports = DispositivoSucursal.objects.all() if options['all'] else None
+        result = reconcile(reports, index=index, batch_size=options['batch_size'])
+        finished = time.perf_counter()
+
+        self.stdout.write(f'Asset index built in {indexed - started:.2f}s')
+        for method, count in result.methods.most_common():
+            self.stdout.write(f'  matched by {method}: {count}')
+        self.stdout.write(f'Unknown devices: {result.unknown}')
+        self.stdout.write(f'Assets not seen in {options["missing_days"]} days: {missing_assets(options["missing_days"]).count()}')
+        rate = result.total / (finished - indexed) if finished > indexed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully reconciled {result.total} reports in {finished - indexed:.2f}s ({rate:,.0f} reports/s)'
+            )
+        )
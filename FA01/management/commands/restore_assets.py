@@ -0,0 +1,28 @@
+from django.core.files.storage import InvalidStorageError
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from FA01.archive import LINKED_MODELS, RELATED_MODELS, RestoreError, restore_assets
+from FA01.models import ArchivedAsset
+
+class Command(BaseCommand):
+    help = 'Bring archived assets back into the inventory by serial number or original id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assets', nargs='+', help='Serial numbers or original asset ids')
+
+    def handle(self, *args, **options):
+        keys = options['assets']
+        archived = list(ArchivedAsset.objects.filter(
+            Q(serial_number__in=keys) | Q(asset_id__in=[key for key in keys if key.isdigit()])
+        ))
+        if not archived:
+            raise CommandError('No archived assets match the given serial numbers or ids')
+
+        try:
+            counts = restore_assets(archived)
+        except (RestoreError, InvalidStorageError) as e:
+            raise CommandError(str(e))
+
+        for name in [*RELATED_MODELS, *LINKED_MODELS, 'files']:
+            self.stdout.write(f'  {name}: {counts[name]}')
+        self.stdout.write(self.style.SUCCESS(f'Successfully restored {counts["assets"]} assets'))
@@ -0,0 +1,103 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from FA01.models import EmailOutbox
+
+class Command(BaseCommand):
+    help = 'Deliver queued notification emails, reusing one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--backoff', type=int, default=60,
+                            help='Base retry delay in seconds, doubled after every failed attempt')
+        parser.add_argument('--lease', type=int, default=600,
+                            help='Seconds a claimed batch stays reserved for this worker while it is sent')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting')
+        parser.add_argument('--interval', type=int, default=30, help='Polling interval in seconds with --loop')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        sent = failed = 0
+
+        while True:
+            batch_sent, batch_failed = self.send_batch(options)
+            sent += batch_sent
+            failed += batch_failed
+            if batch_sent or batch_failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        elapsed = time.monotonic() - started
+        rate = sent / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully sent {sent} emails ({failed} failed) in {elapsed:.2f}s ({rate:.1f} emails/s)')
+        )
+
+    def send_batch(self, options):
+        now = timezone.now()
+        # El lote se reserva en una transacción corta: skip_locked permite varios workers y el
+        # plazo de reserva evita que otro lo tome mientras se envía. Si el worker se cae, los
+        # correos no enviados vuelven a estar disponibles al vencer la reserva.
+        with transaction.atomic():
+            batch = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:options['batch_size']]
+            )
+            if not batch:
+                return 0, 0
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=now + timedelta(seconds=options['lease']),
+            )
+
+        sent = failed = 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for email in batch:
+                self.record_failure(email, e, now, options)
+            return 0, len(batch)
+
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    self.record_failure(email, e, now, options)
+                    failed += 1
+                    continue
+                # Cada correo enviado se confirma en su propia transacción (autocommit): un error
+                # posterior en el lote no puede revertirlo y provocar un reenvío
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+                sent += 1
+        finally:
+            connection.close()
+        return sent, failed
+
+    def record_failure(self, email, error, now, options):
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= options['max_attempts']:
+            email.status = 'failed'
+        else:
+            email.next_attempt_at = now + timedelta(seconds=options['backoff'] * 2 ** (email.attempts - 1))
+        email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
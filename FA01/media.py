@@ -0,0 +1,185 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from functools import lru_cache
+from urllib.parse import quote
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+# Nombres generados por HashedMediaStorage: "foto.3f2a9c1b07de.jpg"
+HASH_LENGTH = 12
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}\.[^./]+$' % HASH_LENGTH)
+# Un nombre con hash nunca cambia de contenido; el resto se revalida con ETag/Last-Modified.
+# Son privados: los archivos requieren sesión y no deben quedar en cachés compartidas
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """
+    Almacenamiento de archivos subidos con el hash del contenido en el nombre.
+
+    Si el nombre ya existe (mismo archivo subido dos veces) Django agrega su sufijo aleatorio antes
+    del hash: cada registro conserva su propia copia para que borrar uno no afecte al otro.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks(HASH_BLOCK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = posixpath.split(name.replace('\\', '/'))
+        stem, extension = os.path.splitext(filename)
+        suffix = f'.{digest.hexdigest()[:HASH_LENGTH]}{extension.lower()}'
+        if filename.endswith(suffix):
+            # Archivo que vuelve con su nombre original (p. ej. al restaurar un activo archivado)
+            stem = filename[:-len(suffix)]
+        if max_length:
+            # El hash se conserva completo; se recorta el nombre original
+            stem = stem[:max(1, max_length - len(directory) - 1 - len(suffix))]
+        return super().save(posixpath.join(directory, stem + suffix), content, max_length)
+
+
+@lru_cache(maxsize=None)
+def served_directories():
+    """Directorios de MEDIA_ROOT que usan los campos de archivo de la aplicación"""
+    directories = set()
+    for model in apps.get_app_config('FA01').get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, FileField) and isinstance(field.upload_to, str) and field.upload_to:
+                directories.add(field.upload_to.split('/')[0] + '/')
+    return tuple(sorted(directories))
+
+
+def resolve_media(path):
+    """Ruta absoluta de un archivo subido; Http404 fuera de los directorios servidos (p. ej. uploads/tmp)"""
+    path = posixpath.normpath(path).lstrip('/')
+    if path.startswith('..') or not path.startswith(served_directories()):
+        raise Http404('Archivo no encontrado')
+    full_path = os.path.join(settings.MEDIA_ROOT, *path.split('/'))
+    if not os.path.isfile(full_path):
+        raise Http404('Archivo no encontrado')
+    return path, full_path
+
+
+def parse_range(header, size):
+    """
+    (inicio, fin) inclusivos de un encabezado Range de un solo tramo.
+
+    Devuelve None si no hay rango utilizable (se envía el archivo completo) y lanza
+    ValueError si el rango no se puede satisfacer.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # "bytes=-500": los últimos 500 bytes
+        if int(end) == 0:
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFile:
+    """
+    Tramo de un archivo para FileResponse.
+
+    No expone fileno() para que el servidor WSGI no use sendfile sobre el archivo completo.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def media_response(request, path):
+    """
+    Respuesta para un archivo subido ya autorizado.
+
+    Con MEDIA_ACCEL = 'nginx' o 'sendfile' la transferencia la hace el proxy (X-Accel-Redirect o
+    X-Sendfile); sin proxy (desarrollo) Django envía el archivo con soporte de rangos.
+    """
+    path, full_path = resolve_media(path)
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = http_date(stat.st_mtime)
+
+    if_none_match = request.headers.get('If-None-Match')
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if (if_none_match and etag in if_none_match) or (
+        not if_none_match and if_modified_since and int(stat.st_mtime) <= if_modified_since
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = _file_response(request, path, full_path, stat.st_size, etag, last_modified)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(path) else REVALIDATE_CACHE_CONTROL
+    return response
+
+
+def _file_response(request, path, full_path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    accel = getattr(settings, 'MEDIA_ACCEL', '')
+    if accel == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + path)
+        return response
+    if accel == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    # If-Range: el rango solo vale si el archivo no cambió desde que el cliente lo pidió
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range in (etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(RangeFile(open(full_path, 'rb'), start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
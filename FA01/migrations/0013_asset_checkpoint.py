@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-19 03:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0012_asset_assigned_to_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('assigned_to_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('active', 'Activo'), ('in_use', 'En Uso'), ('maintenance', 'En Mantenimiento'), ('repair', 'En Reparación'), ('retired', 'Retirado'), ('lost', 'Perdido')], max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Punto de Control',
+                'verbose_name_plural': 'Puntos de Control',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='movement',
+            index=models.Index(fields=['asset', 'movement_date'], name='movement_asset_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='assetcheckpoint',
+            name='asset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='FA01.asset'),
+        ),
+        migrations.AddField(
+            model_name='assetcheckpoint',
+            name='location',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='FA01.location'),
+        ),
+        migrations.AddIndex(
+            model_name='assetcheckpoint',
+            index=models.Index(fields=['taken_at', 'asset'], name='checkpoint_taken_asset_idx'),
+        ),
+    ]
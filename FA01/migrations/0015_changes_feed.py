@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_movement_date(apps, schema_editor):
+    Movement = apps.get_model('FA01', 'Movement')
+    Movement.objects.update(updated_at=F('movement_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0014_asset_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registro Eliminado',
+                'verbose_name_plural': 'Registros Eliminados',
+            },
+        ),
+        migrations.AddField(
+            model_name='movement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_movement_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['updated_at', 'id'], name='asset_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['updated_at', 'id'], name='location_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movement',
+            index=models.Index(fields=['updated_at', 'id'], name='movement_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['resource', 'deleted_at', 'id'], name='tombstone_resource_idx'),
+        ),
+    ]
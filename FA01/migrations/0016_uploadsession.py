@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:05
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0015_changes_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('image', 'Imagen'), ('responsibility', 'Responsiva')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.PositiveIntegerField()),
+                ('received_size', models.PositiveIntegerField(default=0)),
+                ('content_type', models.CharField(blank=True, max_length=50)),
+                ('status', models.CharField(choices=[('uploading', 'Subiendo'), ('complete', 'Completa'), ('attached', 'Adjuntada'), ('failed', 'Fallida')], default='uploading', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='FA01.asset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida de Archivo',
+                'verbose_name_plural': 'Subidas de Archivos',
+            },
+        ),
+    ]
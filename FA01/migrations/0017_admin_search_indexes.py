@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:06
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0016_uploadsession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('brand'), name='gin_trgm_ops'), name='asset_brand_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('model'), name='gin_trgm_ops'), name='asset_model_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dispositivosucursal',
+            index=models.Index(fields=['ip'], name='dispositivo_ip_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dispositivosucursal',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('hostname'), name='gin_trgm_ops'), name='dispositivo_hostname_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dispositivosucursal',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('mac'), name='gin_trgm_ops'), name='dispositivo_mac_trgm_idx'),
+        ),
+    ]
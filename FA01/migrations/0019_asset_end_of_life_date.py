@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:09
+
+import calendar
+from datetime import date
+from django.conf import settings
+from django.db import migrations, models
+
+
+def add_months(day, months):
+    # Copia de FA01.models.add_months: la migración no debe depender del código actual
+    month_index = day.month - 1 + months
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def fill_end_of_life_date(apps, schema_editor):
+    Asset = apps.get_model('FA01', 'Asset')
+    batch = []
+    for asset in Asset.objects.exclude(purchase_date=None).only('id', 'purchase_date', 'preferred_usage_period').iterator():
+        asset.end_of_life_date = add_months(asset.purchase_date, asset.preferred_usage_period)
+        batch.append(asset)
+        if len(batch) >= 1000:
+            Asset.objects.bulk_update(batch, ['end_of_life_date'])
+            batch = []
+    Asset.objects.bulk_update(batch, ['end_of_life_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0018_emailoutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='end_of_life_date',
+            field=models.DateField(blank=True, editable=False, help_text='Fecha de compra más el período de uso preferente', null=True),
+        ),
+        migrations.RunPython(fill_end_of_life_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['end_of_life_date'], name='asset_end_of_life_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['warranty_expiration'], name='asset_warranty_idx'),
+        ),
+    ]
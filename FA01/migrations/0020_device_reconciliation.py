@@ -0,0 +1,58 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0019_asset_end_of_life_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='hostname',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Nombre de host'),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True, verbose_name='Dirección IP'),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Último reporte de red conciliado con el activo', null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='mac_address',
+            field=models.CharField(blank=True, max_length=17, verbose_name='Dirección MAC'),
+        ),
+        migrations.AddField(
+            model_name='dispositivosucursal',
+            name='asset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dispositivos', to='FA01.asset'),
+        ),
+        migrations.AddField(
+            model_name='dispositivosucursal',
+            name='match_method',
+            field=models.CharField(blank=True, choices=[('mac', 'MAC'), ('serial', 'Número de serie'), ('hostname', 'Nombre de host'), ('ip', 'IP')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='dispositivosucursal',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dispositivosucursal',
+            name='serial_number',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='dispositivosucursal',
+            index=models.Index(fields=['reconciled_at'], name='dispositivo_reconciled_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0020_device_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dispositivosucursal',
+            name='vendor',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:53
+
+import FA01.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0021_dispositivosucursal_vendor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_id', models.BigIntegerField(help_text='id que tenía el activo en el inventario', unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('serial_number', models.CharField(max_length=100)),
+                ('category', models.CharField(choices=[('pc', 'PC'), ('laptop', 'Laptop'), ('monitor', 'Monitor'), ('nobreak', 'Nobreak'), ('printer', 'Impresora'), ('network', 'Equipo de Red'), ('peripheral', 'Periférico'), ('server', 'Servidor'), ('other', 'Otro')], max_length=20, verbose_name='Categoría')),
+                ('status', models.CharField(choices=[('active', 'Activo'), ('in_use', 'En Uso'), ('maintenance', 'En Mantenimiento'), ('repair', 'En Reparación'), ('retired', 'Retirado'), ('lost', 'Perdido')], max_length=20)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('media_archived', models.BooleanField(default=False, help_text="Los archivos están en el almacenamiento 'archive'")),
+                ('data', models.JSONField(encoder=FA01.models.ArchiveJSONEncoder)),
+                ('related', models.JSONField(default=dict, encoder=FA01.models.ArchiveJSONEncoder)),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='FA01.location')),
+            ],
+            options={
+                'verbose_name': 'Activo Archivado',
+                'verbose_name_plural': 'Activos Archivados',
+                'indexes': [models.Index(fields=['serial_number'], name='archived_serial_idx'), models.Index(fields=['archived_at', 'id'], name='archived_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Cast, Concat
+
+
+def fill_location_paths(apps, schema_editor):
+    # Todas las ubicaciones existentes son raíces: su ruta es solo su id
+    Location = apps.get_model('FA01', 'Location')
+    Location.objects.update(path=Concat(Cast('id', models.CharField()), Value('/')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0022_archivedasset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='FA01.location', verbose_name='Ubicación superior'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_location_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['path'], name='location_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0023_location_hierarchy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StocktakeSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('include_sublocations', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('open', 'Abierta'), ('closed', 'Cerrada')], default='open', max_length=20)),
+                ('opened_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stocktakes', to='FA01.location')),
+                ('opened_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stocktakes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Inventario Físico',
+                'verbose_name_plural': 'Inventarios Físicos',
+            },
+        ),
+        migrations.CreateModel(
+            name='StocktakeEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('serial_key', models.CharField(max_length=100)),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('expected', models.BooleanField(default=False)),
+                ('scanned_at', models.DateTimeField(blank=True, null=True)),
+                ('asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='FA01.asset')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='FA01.location')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='FA01.stocktakesession')),
+            ],
+            options={
+                'verbose_name': 'Lectura de Inventario Físico',
+                'verbose_name_plural': 'Lecturas de Inventario Físico',
+                'constraints': [models.UniqueConstraint(fields=('session', 'serial_key'), name='stocktake_entry_serial_uniq')],
+            },
+        ),
+    ]
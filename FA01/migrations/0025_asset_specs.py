@@ -0,0 +1,177 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:01
+
+import json
+import re
+from collections import defaultdict
+
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.utils import timezone
+
+# Copia congelada del analizador de FA01/specs.py al momento de esta migración: los cambios
+# posteriores al analizador no deben alterar lo que hace una migración ya aplicada
+COMPUTER_SPECS = ['cpu', 'ram_gb', 'storage_gb', 'storage_type']
+ALL_SPECS = [
+    'cpu', 'ram_gb', 'storage_gb', 'storage_type', 'screen_in', 'resolution',
+    'printer_technology', 'color', 'capacity_va', 'ports',
+]
+CATEGORY_SPECS = {
+    'pc': COMPUTER_SPECS,
+    'laptop': COMPUTER_SPECS + ['screen_in'],
+    'server': COMPUTER_SPECS,
+    'monitor': ['screen_in', 'resolution'],
+    'printer': ['printer_technology', 'color'],
+    'nobreak': ['capacity_va'],
+    'network': ['ports'],
+    'peripheral': [],
+    'other': ALL_SPECS,
+}
+BATCH_SIZE = 5000
+
+UNIT_GB = {'MB': 1 / 1024, 'GB': 1, 'TB': 1024}
+NUMBER_RE = r'(\d+(?:[.,]\d+)?)'
+RAM_RE = re.compile(
+    rf'{NUMBER_RE}\s*(MB|GB|TB)\s*(?:de\s+)?(?:RAM|DDR\d*|memoria)|(?:RAM|memoria)\s*:?\s*(?:de\s+)?{NUMBER_RE}\s*(MB|GB|TB)',
+    re.IGNORECASE,
+)
+STORAGE_RE = re.compile(
+    rf'{NUMBER_RE}\s*(GB|TB)\s*(?:de\s+)?(SSD|NVMe|M\.2|HDD|eMMC|disco(?:\s+duro)?)'
+    rf'|(SSD|NVMe|M\.2|HDD|eMMC|disco(?:\s+duro)?)\s*:?\s*(?:de\s+)?{NUMBER_RE}\s*(GB|TB)',
+    re.IGNORECASE,
+)
+STORAGE_TYPES = {'ssd': 'SSD', 'nvme': 'NVMe', 'm.2': 'NVMe', 'hdd': 'HDD', 'emmc': 'eMMC'}
+CPU_RE = re.compile(
+    r'\b(Intel\s+(?:Core\s+)?(?:i[3579]|Ultra\s+\d|Xeon(?:\s+(?:Bronze|Silver|Gold|Platinum|W|E\d?))?|Celeron|Pentium)(?:[\s-]+\w*\d\w*)?'
+    r'|AMD\s+(?:Ryzen\s+\d|Athlon|EPYC)(?:\s+(?:PRO\s+)?\w*\d\w*)?'
+    r'|Apple\s+M\d(?:\s+(?:Pro|Max|Ultra))?'
+    r'|Core\s+i[3579](?:-\w*\d\w*)?)',
+    re.IGNORECASE,
+)
+SCREEN_RE = re.compile(rf'{NUMBER_RE}\s*(?:"|”|\'\'|pulgadas|pulg\b|in\b|inch)', re.IGNORECASE)
+RESOLUTION_RE = re.compile(r'\b(\d{3,4})\s*[x×]\s*(\d{3,4})\b')
+RESOLUTION_NAMES = [
+    (re.compile(r'\b(?:4K|UHD)\b', re.IGNORECASE), '3840x2160'),
+    (re.compile(r'\b(?:QHD|2K)\b', re.IGNORECASE), '2560x1440'),
+    (re.compile(r'\b(?:Full\s*HD|FHD|1080p)\b', re.IGNORECASE), '1920x1080'),
+]
+VA_RE = re.compile(rf'{NUMBER_RE}\s*(k)?VA\b', re.IGNORECASE)
+PORTS_RE = re.compile(r'(\d+)\s*(?:puertos|ports)\b', re.IGNORECASE)
+LASER_RE = re.compile(r'l[áa]ser', re.IGNORECASE)
+INKJET_RE = re.compile(r'tinta|inkjet|inyecci[óo]n', re.IGNORECASE)
+MONOCHROME_RE = re.compile(r'monocrom|blanco\s+y\s+negro|\bB/N\b', re.IGNORECASE)
+COLOR_RE = re.compile(r'\bcolor\b', re.IGNORECASE)
+
+
+def to_number(text, factor=1):
+    value = float(text.replace(',', '.')) * factor
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def parse_storage(text):
+    match = STORAGE_RE.search(text)
+    if not match:
+        return {}
+    if match[1]:
+        amount, unit, kind = match[1], match[2], match[3]
+    else:
+        kind, amount, unit = match[4], match[5], match[6]
+    specs = {'storage_gb': to_number(amount, UNIT_GB[unit.upper()])}
+    if kind.lower() in STORAGE_TYPES:
+        specs['storage_type'] = STORAGE_TYPES[kind.lower()]
+    elif kind.lower().startswith('disco'):
+        specs['storage_type'] = 'HDD'
+    return specs
+
+
+def parse_all(text):
+    """Todas las especificaciones reconocibles en el texto, sin importar la categoría"""
+    specs = {}
+    match = RAM_RE.search(text)
+    if match:
+        amount, unit = (match[1], match[2]) if match[1] else (match[3], match[4])
+        specs['ram_gb'] = to_number(amount, UNIT_GB[unit.upper()])
+    specs.update(parse_storage(text))
+    match = CPU_RE.search(text)
+    if match:
+        specs['cpu'] = ' '.join(match[1].split())
+    match = SCREEN_RE.search(text)
+    if match:
+        specs['screen_in'] = to_number(match[1])
+    match = RESOLUTION_RE.search(text)
+    if match:
+        specs['resolution'] = f'{match[1]}x{match[2]}'
+    else:
+        for regex, resolution in RESOLUTION_NAMES:
+            if regex.search(text):
+                specs['resolution'] = resolution
+                break
+    match = VA_RE.search(text)
+    if match:
+        specs['capacity_va'] = to_number(match[1], 1000 if match[2] else 1)
+    match = PORTS_RE.search(text)
+    if match:
+        specs['ports'] = int(match[1])
+    if LASER_RE.search(text):
+        specs['printer_technology'] = 'laser'
+    elif INKJET_RE.search(text):
+        specs['printer_technology'] = 'inkjet'
+    if MONOCHROME_RE.search(text):
+        specs['color'] = False
+    elif COLOR_RE.search(text):
+        specs['color'] = True
+    return specs
+
+
+def parse_specifications(text, category):
+    if not text:
+        return {}
+    specs = parse_all(text)
+    return {key: specs[key] for key in CATEGORY_SPECS.get(category, ALL_SPECS) if key in specs}
+
+
+def fill_asset_specs(apps, schema_editor):
+    # Se extraen antes de crear los índices: un UPDATE por cada resultado distinto. Se actualiza
+    # updated_at para que el feed de cambios publique specs de los activos existentes
+    Asset = apps.get_model('FA01', 'Asset')
+    rows = Asset.objects.order_by('id').values_list('id', 'category', 'specifications')
+    now = timezone.now()
+    last_id = 0
+    while batch := list(rows.filter(id__gt=last_id)[:BATCH_SIZE]):
+        last_id = batch[-1][0]
+        ids_by_specs = defaultdict(list)
+        for asset_id, category, text in batch:
+            specs = parse_specifications(text, category)
+            if specs:
+                ids_by_specs[json.dumps(specs, sort_keys=True)].append(asset_id)
+        for specs, ids in ids_by_specs.items():
+            Asset.objects.filter(pk__in=ids).update(specs=json.loads(specs), updated_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0024_stocktake'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='specs',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Especificaciones estructuradas extraídas de specifications según la categoría'),
+        ),
+        migrations.RunPython(fill_asset_specs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='asset',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['specs'], name='asset_specs_gin_idx', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(models.F('category'), django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTextTransform('ram_gb', 'specs'), models.FloatField()), name='asset_spec_ram_gb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(models.F('category'), django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTextTransform('storage_gb', 'specs'), models.FloatField()), name='asset_spec_storage_gb_idx'),
+        ),
+    ]
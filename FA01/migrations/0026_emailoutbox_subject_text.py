@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0025_asset_specs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='subject',
+            field=models.TextField(),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:14
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0026_emailoutbox_subject_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['mac_address'], name='asset_mac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['ip_address'], name='asset_ip_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('hostname'), name='text_pattern_ops'), name='asset_hostname_idx'),
+        ),
+    ]
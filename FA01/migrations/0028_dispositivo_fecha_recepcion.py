@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FA01', '0027_asset_network_identity_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dispositivosucursal',
+            name='fecha_recepcion',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='dispositivosucursal',
+            index=models.Index(fields=['fecha_recepcion', 'id'], name='dispositivo_recepcion_idx'),
+        ),
+    ]
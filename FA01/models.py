@@ -1,10 +1,23 @@
 # type: ignore
-from django.db import models
+from django.db import models, transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Value
+from django.db.models.functions import Cast, Concat, Substr, Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import timedelta
-from django.core.mail import send_mail
-from django.conf import settings
+from datetime import date, datetime, time, timedelta
+import calendar
+import uuid
+from .specs import INDEXED_NUMBERS, parse_specifications, spec_display, spec_number
+
+
+def add_months(day, months):
+    """Suma meses a una fecha, ajustando el día al último del mes cuando no existe"""
+    month_index = day.month - 1 + months
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
 
 class Location(models.Model):
     LOCATION_TYPES = [
@@ -16,15 +29,76 @@ class Location(models.Model):
     name = models.CharField(max_length=100)
     location_type = models.CharField(max_length=20, choices=LOCATION_TYPES)
     description = models.TextField(blank=True)
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True,
+                               related_name='children', verbose_name='Ubicación superior')
+    # Ruta materializada con los ids de los ancestros y el propio ("1/5/12/"): el subárbol de una
+    # ubicación son las filas cuya ruta empieza con la suya, un rango sobre location_path_idx
+    path = models.CharField(max_length=255, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    PATH_SEPARATOR = '/'
+
     def __str__(self):
         return self.name
 
+    def build_path(self):
+        parent_path = Location.objects.values_list('path', flat=True).get(pk=self.parent_id) if self.parent_id else ''
+        return f'{parent_path}{self.pk}{self.PATH_SEPARATOR}'
+
+    def save(self, *args, **kwargs):
+        """Guarda la ubicación y, si cambió de ubicación superior, reescribe las rutas de su subárbol"""
+        # La fila y las rutas del subárbol cambian juntas o no cambian
+        with transaction.atomic():
+            old_path = Location.objects.filter(pk=self.pk).values_list('path', flat=True).first() if self.pk else None
+            if old_path and self.parent_id:
+                parent_path = Location.objects.values_list('path', flat=True).get(pk=self.parent_id)
+                if parent_path.startswith(old_path):
+                    raise ValueError('Una ubicación no puede quedar dentro de sí misma o de una de sus sububicaciones')
+            super().save(*args, **kwargs)
+
+            path = self.build_path()
+            if path == old_path:
+                self.path = path
+                return
+            if old_path:
+                # Una sola consulta para todo el subárbol, sin importar su profundidad. Se actualiza
+                # updated_at para que las exportaciones incrementales y el feed publiquen la nueva ruta
+                Location.objects.filter(path__startswith=old_path).update(
+                    path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+                    updated_at=timezone.now(),
+                )
+            else:
+                Location.objects.filter(pk=self.pk).update(path=path)
+            self.path = path
+
+    @property
+    def depth(self):
+        return self.path.count(self.PATH_SEPARATOR) - 1
+
+    @property
+    def ancestor_ids(self):
+        return [int(pk) for pk in self.path.split(self.PATH_SEPARATOR)[:-2]]
+
+    def subtree(self):
+        """La ubicación y todas sus sububicaciones"""
+        return Location.objects.filter(path__startswith=self.path)
+
+    @classmethod
+    def fill_missing_paths(cls):
+        """Asigna la ruta a las ubicaciones creadas con bulk_create, que no pasan por save()"""
+        return cls.objects.filter(path='', parent__isnull=True).update(
+            path=Concat(Cast('id', models.CharField()), Value(cls.PATH_SEPARATOR))
+        )
+
     class Meta:
         verbose_name = 'Ubicación'
         verbose_name_plural = 'Ubicaciones'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='location_updated_idx'),
+            # varchar_pattern_ops permite usar el índice en LIKE 'prefijo%' con cualquier collation
+            models.Index(fields=['path'], name='location_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
 class Asset(models.Model):
     CATEGORIES = [
@@ -61,18 +135,85 @@ class Asset(models.Model):
         help_text="Período de uso preferente en meses"
     )
     specifications = models.TextField(help_text="Características técnicas del equipo", blank=True)
+    specs = models.JSONField(default=dict, blank=True, editable=False,
+                             help_text="Especificaciones estructuradas extraídas de specifications según la categoría")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     category = models.CharField(max_length=20, choices=CATEGORIES, verbose_name='Categoría')
     location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True)
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     assigned_to_name = models.CharField(max_length=100, blank=True, null=True, help_text="Nombre del responsable (puede no ser usuario del sistema)")
     notes = models.TextField(help_text="Observaciones adicionales", blank=True)
+    # Identidad en la red, usada para conciliar los dispositivos reportados con el inventario
+    mac_address = models.CharField(max_length=17, blank=True, verbose_name='Dirección MAC')
+    hostname = models.CharField(max_length=255, blank=True, verbose_name='Nombre de host')
+    ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name='Dirección IP')
+    last_seen_at = models.DateTimeField(null=True, blank=True, editable=False,
+                                        help_text="Último reporte de red conciliado con el activo")
+    end_of_life_date = models.DateField(null=True, blank=True, editable=False,
+                                        help_text="Fecha de compra más el período de uso preferente")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Meses antes del fin del período de uso en que el activo se considera próximo a su reemplazo
+    END_OF_LIFE_MARGIN = 3
+    # Días antes del vencimiento en que la garantía se considera por vencer
+    WARRANTY_WARNING_DAYS = 90
+
     def __str__(self):
         return f"{self.name} - {self.serial_number}"
 
+    def compute_end_of_life_date(self):
+        """Calcula end_of_life_date; debe llamarse antes de bulk_create/bulk_update"""
+        purchase_date = self.purchase_date
+        if isinstance(purchase_date, str):
+            purchase_date = date.fromisoformat(purchase_date) if purchase_date else None
+        if not purchase_date:
+            self.end_of_life_date = None
+        else:
+            self.end_of_life_date = add_months(purchase_date, int(self.preferred_usage_period))
+        return self.end_of_life_date
+
+    def compute_specs(self):
+        """Calcula specs desde specifications y category; debe llamarse antes de bulk_create/bulk_update"""
+        self.specs = parse_specifications(self.specifications, self.category)
+        return self.specs
+
+    def save(self, *args, **kwargs):
+        self.compute_end_of_life_date()
+        self.compute_specs()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = set()
+            if {'purchase_date', 'preferred_usage_period'} & set(update_fields):
+                derived.add('end_of_life_date')
+            if {'specifications', 'category'} & set(update_fields):
+                derived.add('specs')
+            kwargs['update_fields'] = set(update_fields) | derived
+        super().save(*args, **kwargs)
+
+    @property
+    def spec_items(self):
+        """(etiqueta, valor) de las especificaciones estructuradas, para mostrar"""
+        return spec_display(self.specs)
+
+    @property
+    def warranty_days_left(self):
+        """Días que faltan para el vencimiento de la garantía (negativo si ya venció)"""
+        if not self.warranty_expiration:
+            return None
+        return (self.warranty_expiration - timezone.now().date()).days
+
+    @classmethod
+    def end_of_life_soon_cutoff(cls, today=None):
+        """
+        Primer end_of_life_date que ya no se considera próximo a fin de vida.
+
+        Equivale en SQL a is_nearing_end_of_life: end_of_life_date < cutoff.
+        """
+        if today is None:
+            today = timezone.now().date()
+        return add_months(today.replace(day=1), cls.END_OF_LIFE_MARGIN + 1)
+
     def get_age(self):
         """Calculate the age of the asset in years"""
         today = timezone.now().date()
@@ -115,19 +256,41 @@ class Asset(models.Model):
         """
         
         # Send to all staff users
-        staff_emails = User.objects.filter(is_staff=True).values_list('email', flat=True)
+        staff_emails = list(User.objects.filter(is_staff=True).exclude(email='').values_list('email', flat=True))
         if staff_emails:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                staff_emails,
-                fail_silently=True,
+            # Se encola en el outbox; el comando send_outbox se encarga del envío
+            EmailOutbox.objects.create(
+                subject=subject,
+                body=message,
+                recipients=staff_emails,
+                asset=self,
             )
 
     class Meta:
         verbose_name = 'Activo'
         verbose_name_plural = 'Activos'
+        indexes = [
+            # Índices trigram para búsquedas icontains por nombre y número de serie
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='asset_name_trgm_idx'),
+            GinIndex(OpClass(Upper('serial_number'), name='gin_trgm_ops'), name='asset_serial_trgm_idx'),
+            GinIndex(OpClass(Upper('brand'), name='gin_trgm_ops'), name='asset_brand_trgm_idx'),
+            GinIndex(OpClass(Upper('model'), name='gin_trgm_ops'), name='asset_model_trgm_idx'),
+            models.Index(fields=['updated_at', 'id'], name='asset_updated_idx'),
+            models.Index(fields=['end_of_life_date'], name='asset_end_of_life_idx'),
+            models.Index(fields=['warranty_expiration'], name='asset_warranty_idx'),
+            # Búsqueda de los activos candidatos de un envío de dispositivos (AssetIndex.for_devices)
+            models.Index(fields=['mac_address'], name='asset_mac_idx'),
+            models.Index(fields=['ip_address'], name='asset_ip_idx'),
+            # text_pattern_ops sirve la igualdad y el prefijo "PC-01." del nombre con dominio
+            models.Index(OpClass(Upper('hostname'), name='text_pattern_ops'), name='asset_hostname_idx'),
+            # Contención sobre specs (specs @> '{"storage_type": "HDD"}'); jsonb_path_ops solo sirve @>
+            GinIndex(fields=['specs'], name='asset_specs_gin_idx', opclasses=['jsonb_path_ops']),
+            # Rangos por categoría sobre las especificaciones numéricas (p. ej. laptops con menos de 8 GB de RAM)
+            *[
+                models.Index(F('category'), spec_number(key), name=f'asset_spec_{key}_idx')
+                for key in INDEXED_NUMBERS
+            ],
+        ]
 
 class Movement(models.Model):
     MOVEMENT_TYPES = [
@@ -144,6 +307,7 @@ class Movement(models.Model):
     from_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='movements_from')
     assigned_to_name = models.CharField(max_length=100, blank=True, null=True)
     movement_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True)
     movement = models.CharField(max_length=20,choices=MOVEMENT_TYPES,verbose_name='Movimiento')
     
@@ -153,6 +317,28 @@ class Movement(models.Model):
     class Meta:
         verbose_name = 'Movimiento'
         verbose_name_plural = 'Movimientos'
+        indexes = [
+            models.Index(fields=['asset', 'movement_date'], name='movement_asset_date_idx'),
+            models.Index(fields=['updated_at', 'id'], name='movement_updated_idx'),
+        ]
+
+class AssetCheckpoint(models.Model):
+    """Fotografía periódica del estado de un activo, punto de partida para reconstruir el historial"""
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='checkpoints')
+    taken_at = models.DateTimeField()
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, related_name='+')
+    assigned_to_name = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Asset.STATUS_CHOICES)
+
+    def __str__(self):
+        return f"Checkpoint de {self.asset_id} ({self.taken_at})"
+
+    class Meta:
+        verbose_name = 'Punto de Control'
+        verbose_name_plural = 'Puntos de Control'
+        indexes = [
+            models.Index(fields=['taken_at', 'asset'], name='checkpoint_taken_asset_idx'),
+        ]
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -183,11 +369,28 @@ class Sucursal(models.Model):
         verbose_name_plural = 'Sucursales'
 
 class DispositivoSucursal(models.Model):
+    MATCH_METHODS = [
+        ('mac', 'MAC'),
+        ('serial', 'Número de serie'),
+        ('hostname', 'Nombre de host'),
+        ('ip', 'IP'),
+    ]
+
     sucursal = models.ForeignKey(Sucursal, on_delete=models.CASCADE, related_name='dispositivos')
+    # Fecha que informa el agente (su reloj); fecha_recepcion la asigna el servidor y es la que
+    # usan las exportaciones incrementales, para no saltear reportes atrasados o con el reloj corrido
     fecha_envio = models.DateTimeField()
+    fecha_recepcion = models.DateTimeField(auto_now_add=True)
     ip = models.GenericIPAddressField()
     mac = models.CharField(max_length=50)
+    # Fabricante según el prefijo OUI de la MAC, resuelto al recibir el reporte
+    vendor = models.CharField(max_length=255, blank=True)
     hostname = models.CharField(max_length=255)
+    serial_number = models.CharField(max_length=100, blank=True)
+    # Resultado de la conciliación: sin activo y con reconciled_at es un dispositivo desconocido
+    asset = models.ForeignKey(Asset, on_delete=models.SET_NULL, null=True, blank=True, related_name='dispositivos')
+    match_method = models.CharField(max_length=20, choices=MATCH_METHODS, blank=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.hostname} ({self.ip}) - {self.sucursal.codigo}"
@@ -195,6 +398,13 @@ class DispositivoSucursal(models.Model):
     class Meta:
         verbose_name = 'Dispositivo de Sucursal'
         verbose_name_plural = 'Dispositivos de Sucursal'
+        indexes = [
+            models.Index(fields=['ip'], name='dispositivo_ip_idx'),
+            models.Index(fields=['reconciled_at'], name='dispositivo_reconciled_idx'),
+            models.Index(fields=['fecha_recepcion', 'id'], name='dispositivo_recepcion_idx'),
+            GinIndex(OpClass(Upper('hostname'), name='gin_trgm_ops'), name='dispositivo_hostname_trgm_idx'),
+            GinIndex(OpClass(Upper('mac'), name='gin_trgm_ops'), name='dispositivo_mac_trgm_idx'),
+        ]
 
 class AssetImage(models.Model):
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='images')
@@ -214,4 +424,183 @@ class Responsibility(models.Model):
 
     class Meta:
         verbose_name = 'Responsiva'
-        verbose_name_plural = 'Responsivas'
\ No newline at end of file
+        verbose_name_plural = 'Responsivas'
+
+class Tombstone(models.Model):
+    """Registro de un objeto eliminado, para que el feed de cambios pueda informar las bajas"""
+    resource = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.resource} {self.object_id} eliminado el {self.deleted_at}"
+
+    class Meta:
+        verbose_name = 'Registro Eliminado'
+        verbose_name_plural = 'Registros Eliminados'
+        indexes = [
+            models.Index(fields=['resource', 'deleted_at', 'id'], name='tombstone_resource_idx'),
+        ]
+
+
+class UploadSession(models.Model):
+    """Subida por partes de una imagen o responsiva que se adjunta al activo al completarse"""
+    KINDS = [
+        ('image', 'Imagen'),
+        ('responsibility', 'Responsiva'),
+    ]
+
+    STATUS_CHOICES = [
+        ('uploading', 'Subiendo'),
+        ('complete', 'Completa'),
+        ('attached', 'Adjuntada'),
+        ('failed', 'Fallida'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, null=True, blank=True, related_name='upload_sessions')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveIntegerField()
+    received_size = models.PositiveIntegerField(default=0)
+    content_type = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size})"
+
+    class Meta:
+        verbose_name = 'Subida de Archivo'
+        verbose_name_plural = 'Subidas de Archivos'
+
+
+class EmailOutbox(models.Model):
+    """Correo pendiente de envío; el comando send_outbox lo entrega y registra el resultado"""
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('sent', 'Enviado'),
+        ('failed', 'Fallido'),
+    ]
+
+    # Sin límite de largo: el asunto incluye el nombre del activo (hasta 200 caracteres)
+    subject = models.TextField()
+    body = models.TextField()
+    recipients = models.JSONField(default=list)
+    asset = models.ForeignKey(Asset, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = 'Correo en Cola'
+        verbose_name_plural = 'Correos en Cola'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_pending_idx'),
+        ]
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder sin recortar a milisegundos: las fechas restauradas deben ser idénticas"""
+
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class ArchivedAsset(models.Model):
+    """
+    Activo retirado o perdido sacado de las tablas de inventario.
+
+    data guarda las columnas del activo y related los movimientos, imágenes, responsivas y
+    puntos de control, ambos con los nombres de columna originales para poder restaurarlo,
+    además de los ids de las entradas de inventario físico que apuntaban al activo.
+    """
+    asset_id = models.BigIntegerField(unique=True, help_text="id que tenía el activo en el inventario")
+    name = models.CharField(max_length=200)
+    serial_number = models.CharField(max_length=100)
+    category = models.CharField(max_length=20, choices=Asset.CATEGORIES, verbose_name='Categoría')
+    status = models.CharField(max_length=20, choices=Asset.STATUS_CHOICES)
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    archived_at = models.DateTimeField(default=timezone.now)
+    media_archived = models.BooleanField(default=False, help_text="Los archivos están en el almacenamiento 'archive'")
+    data = models.JSONField(encoder=ArchiveJSONEncoder)
+    related = models.JSONField(encoder=ArchiveJSONEncoder, default=dict)
+
+    def __str__(self):
+        return f"{self.name} - {self.serial_number} (archivado)"
+
+    class Meta:
+        verbose_name = 'Activo Archivado'
+        verbose_name_plural = 'Activos Archivados'
+        indexes = [
+            models.Index(fields=['serial_number'], name='archived_serial_idx'),
+            models.Index(fields=['archived_at', 'id'], name='archived_at_idx'),
+        ]
+
+
+class StocktakeSession(models.Model):
+    """Inventario físico de una ubicación: los números de serie leídos contra lo registrado"""
+    STATUS_CHOICES = [
+        ('open', 'Abierta'),
+        ('closed', 'Cerrada'),
+    ]
+
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name='stocktakes')
+    include_sublocations = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    opened_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stocktakes')
+    opened_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Inventario de {self.location.name} ({self.opened_at:%d/%m/%Y})"
+
+    class Meta:
+        verbose_name = 'Inventario Físico'
+        verbose_name_plural = 'Inventarios Físicos'
+
+
+class StocktakeEntry(models.Model):
+    """
+    Número de serie de un inventario físico.
+
+    Al abrir la sesión se crea una entrada esperada por cada activo de la ubicación (la
+    fotografía del inventario); las lecturas marcan scanned_at o agregan entradas no esperadas.
+    """
+    session = models.ForeignKey(StocktakeSession, on_delete=models.CASCADE, related_name='entries')
+    # Número de serie en mayúsculas y sin espacios, tal como se compara con las lecturas
+    serial_key = models.CharField(max_length=100)
+    asset = models.ForeignKey(Asset, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    name = models.CharField(max_length=200, blank=True)
+    # Ubicación registrada del activo al abrir la sesión (esperados) o al leerlo (mal ubicados)
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    expected = models.BooleanField(default=False)
+    scanned_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.serial_key} ({self.session_id})"
+
+    @property
+    def result(self):
+        if self.expected:
+            return 'found' if self.scanned_at else 'missing'
+        return 'misplaced' if self.asset_id else 'unexpected'
+
+    class Meta:
+        verbose_name = 'Lectura de Inventario Físico'
+        verbose_name_plural = 'Lecturas de Inventario Físico'
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'serial_key'], name='stocktake_entry_serial_uniq'),
+        ]
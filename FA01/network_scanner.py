@@ -1,9 +1,13 @@
+import ipaddress
 import nmap
 import socket
-from scapy.all import ARP, Ether, srp
 import platform
 import subprocess
 import re
+from .oui import vendor_for
+
+# El barrido de descubrimiento se hace por bloques para entregar hosts mientras avanza
+SWEEP_BLOCK_PREFIX = 26
 
 class NetworkScanner:
     def __init__(self):
@@ -29,30 +33,51 @@ class NetworkScanner:
 
     def scan_network(self):
         """Escanea la red y obtiene información de los dispositivos"""
-        network = self.get_network_range()
-        devices = []
+        return list(self.iter_network())
 
-        # Escaneo básico con nmap
-        self.nm.scan(hosts=network, arguments='-sn')
-        
-        for host in self.nm.all_hosts():
-            # Escaneo detallado para cada host
-            self.nm.scan(hosts=host, arguments='-sV -O --version-intensity 5')
-            
-            device_info = {
-                'ip': host,
-                'hostname': self.get_hostname(host),
-                'mac': self.get_mac_address(host),
-                'vendor': self.get_vendor_info(host),
-                'type': self.detect_device_type(host),
-                'os': self.get_os_info(host),
-                'services': self.get_services(host),
-                'model': self.get_device_model(host),
-                'status': 'Activo'
-            }
-            devices.append(device_info)
-
-        return devices
+    def iter_network(self, network=None):
+        """Entrega cada dispositivo apenas termina su escaneo detallado"""
+        for host in self.iter_ping_sweep(network or self.get_network_range()):
+            # La MAC del barrido evita una segunda consulta ARP por host
+            yield self.probe_host(host['ip'], host['mac'] or None)
+
+    def iter_ping_sweep(self, network):
+        """Barrido -sn por bloques; entrega ip, mac y hostname de los hosts que responden"""
+        network = ipaddress.ip_network(network, strict=False)
+        blocks = [network]
+        if network.version == 4 and network.prefixlen < SWEEP_BLOCK_PREFIX:
+            blocks = network.subnets(new_prefix=SWEEP_BLOCK_PREFIX)
+
+        for block in blocks:
+            self.nm.scan(hosts=str(block), arguments='-sn')
+            # Copia de los resultados: el escaneo detallado de cada host los reemplaza
+            hosts = [
+                {
+                    'ip': host,
+                    'mac': self.nm[host]['addresses'].get('mac', ''),
+                    'hostname': self.nm[host].hostname() or '',
+                }
+                for host in sorted(self.nm.all_hosts(), key=ipaddress.ip_address)
+            ]
+            yield from hosts
+
+    def probe_host(self, host, mac=None):
+        """Escaneo detallado de un host; la MAC se consulta por ARP solo si no se conoce"""
+        self.nm.scan(hosts=host, arguments='-sV -O --version-intensity 5')
+        if mac is None:
+            mac = self.get_mac_address(host)
+
+        return {
+            'ip': host,
+            'hostname': self.get_hostname(host),
+            'mac': mac,
+            'vendor': self.get_vendor_info(host, mac),
+            'type': self.detect_device_type(host),
+            'os': self.get_os_info(host),
+            'services': self.get_services(host),
+            'model': self.get_device_model(host),
+            'status': 'Activo'
+        }
 
     def get_hostname(self, ip):
         """Obtiene el nombre del host"""
@@ -63,6 +88,9 @@ class NetworkScanner:
 
     def get_mac_address(self, ip):
         """Obtiene la dirección MAC"""
+        # scapy.all carga todas las capas; para una consulta ARP alcanza con Ethernet/ARP
+        from scapy.layers.l2 import ARP, Ether
+        from scapy.sendrecv import srp
         try:
             arp_request = ARP(pdst=ip)
             broadcast = Ether(dst="ff:ff:ff:ff:ff:ff")
@@ -72,15 +100,17 @@ class NetworkScanner:
         except:
             return "Unknown"
 
-    def get_vendor_info(self, ip):
-        """Obtiene información del fabricante"""
-        try:
+    def get_vendor_info(self, ip, mac=None):
+        """Obtiene información del fabricante: la reportada por nmap o la base OUI local"""
+        if mac is None:
             mac = self.get_mac_address(ip)
-            if mac != "Unknown":
-                return self.nm[ip]['vendor'].get(mac, "Unknown")
+        if mac == "Unknown":
             return "Unknown"
+        try:
+            vendor = self.nm[ip]['vendor'].get(mac)
         except:
-            return "Unknown"
+            vendor = None
+        return vendor or vendor_for(mac) or "Unknown"
 
     def get_os_info(self, ip):
         """Obtiene información del sistema operativo"""
@@ -0,0 +1,137 @@
+import gzip
+import re
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from .models import DispositivoSucursal
+
+# Base de datos de fabricantes incluida con la aplicación (registros MA-L, MA-M y MA-S del IEEE)
+DEFAULT_DATABASE_PATH = Path(__file__).resolve().parent / 'data' / 'oui.tsv.gz'
+
+# Del prefijo más específico al más general: los bloques MA-M y MA-S se asignan dentro de
+# prefijos MA-L registrados a nombre de la autoridad de registro del IEEE
+PREFIX_BITS = (36, 28, 24)
+BATCH_SIZE = 20000
+
+NON_HEX_RE = re.compile(r'[^0-9a-f]')
+
+
+def mac_to_int(value):
+    """Entero de 48 bits de la MAC, sin importar separadores ni mayúsculas; None si no es válida"""
+    digits = NON_HEX_RE.sub('', (value or '').lower())
+    return int(digits, 16) if len(digits) == 12 else None
+
+
+class OuiDatabase:
+    """
+    Prefijos de MAC y fabricantes en arreglos ordenados, uno por longitud de prefijo.
+
+    Cada tabla guarda los prefijos como enteros (array 'Q') y el índice del fabricante en una
+    lista de nombres sin repetir: las ~50.000 entradas ocupan unos pocos MB y cada búsqueda es
+    una búsqueda binaria por tabla.
+    """
+
+    def __init__(self, entries):
+        vendor_ids = {}
+        by_bits = {bits: [] for bits in PREFIX_BITS}
+        for bits, prefix, vendor in entries:
+            by_bits[bits].append((prefix, vendor_ids.setdefault(vendor, len(vendor_ids))))
+
+        self.vendors = list(vendor_ids)
+        self.tables = []
+        for bits in PREFIX_BITS:
+            rows = sorted(by_bits[bits])
+            self.tables.append((
+                bits,
+                array('Q', [prefix for prefix, _ in rows]),
+                array('I', [vendor_id for _, vendor_id in rows]),
+            ))
+
+    def __len__(self):
+        return sum(len(prefixes) for _, prefixes, _ in self.tables)
+
+    @classmethod
+    def load(cls, path):
+        """Lee el archivo generado por build_oui_database: "PREFIJO_HEX<TAB>Fabricante" por línea"""
+        def entries():
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    prefix, _, vendor = line.rstrip('\n').partition('\t')
+                    yield len(prefix) * 4, int(prefix, 16), vendor
+        return cls(entries())
+
+    def lookup_int(self, value):
+        for bits, prefixes, vendor_ids in self.tables:
+            key = value >> (48 - bits)
+            position = bisect_left(prefixes, key)
+            if position < len(prefixes) and prefixes[position] == key:
+                return self.vendors[vendor_ids[position]]
+        return ''
+
+    def lookup(self, mac):
+        """Fabricante de la MAC o '' si no es válida o el prefijo no está registrado"""
+        value = mac_to_int(mac)
+        return '' if value is None else self.lookup_int(value)
+
+    def lookup_many(self, macs):
+        """Fabricantes de una lista de MACs, resueltos con búsquedas binarias vectorizadas"""
+        values = [mac_to_int(mac) for mac in macs]
+        valid = np.array([value is not None for value in values], dtype=bool)
+        numbers = np.array([value or 0 for value in values], dtype=np.uint64)
+        found = np.full(len(values), -1, dtype=np.int64)
+
+        for bits, prefixes, vendor_ids in self.tables:
+            if not prefixes:
+                continue
+            table = np.frombuffer(prefixes, dtype=np.uint64)
+            keys = numbers >> np.uint64(48 - bits)
+            positions = np.minimum(np.searchsorted(table, keys), len(table) - 1)
+            hits = valid & (found < 0) & (table[positions] == keys)
+            found[hits] = np.frombuffer(vendor_ids, dtype=np.uint32)[positions[hits]]
+
+        vendors = self.vendors
+        return [vendors[vendor_id] if vendor_id >= 0 else '' for vendor_id in found.tolist()]
+
+
+@lru_cache(maxsize=None)
+def get_database():
+    """Base de datos cargada una sola vez por proceso"""
+    return OuiDatabase.load(getattr(settings, 'OUI_DATABASE_PATH', None) or DEFAULT_DATABASE_PATH)
+
+
+def vendor_for(mac):
+    return get_database().lookup(mac)
+
+
+def vendors_for(macs):
+    return get_database().lookup_many(macs)
+
+
+def enrich_vendors(reports=None, batch_size=BATCH_SIZE):
+    """
+    Completa el fabricante de los reportes de dispositivos a partir de la MAC.
+
+    Por omisión procesa los reportes sin fabricante. Recorre los reportes en lotes por id y
+    escribe un UPDATE por fabricante; devuelve la cantidad de reportes actualizados.
+    """
+    if reports is None:
+        reports = DispositivoSucursal.objects.filter(vendor='')
+    database = get_database()
+    rows = reports.order_by('id').values_list('id', 'mac')
+    updated = 0
+    last_id = 0
+    while batch := list(rows.filter(id__gt=last_id)[:batch_size]):
+        last_id = batch[-1][0]
+        ids_by_vendor = defaultdict(list)
+        for (report_id, _), vendor in zip(batch, database.lookup_many([mac for _, mac in batch])):
+            if vendor:
+                ids_by_vendor[vendor].append(report_id)
+        with transaction.atomic():
+            for vendor, ids in ids_by_vendor.items():
+                updated += DispositivoSucursal.objects.filter(pk__in=ids).update(vendor=vendor)
+    return updated
@@ -0,0 +1,156 @@
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from openpyxl import load_workbook
+
+try:
+    # API privada de openpyxl, probada con la versión fijada en requirements.txt
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:
+    WorkSheetParser = None
+
+# Libros con menos filas se procesan en un solo proceso: arrancar el pool cuesta más que lo que ahorra
+MIN_PARALLEL_ROWS = 20000
+TASKS_PER_WORKER = 4
+
+ROW_START_RE = re.compile(rb'<row[\s>]')
+ROW_NUMBER_RE = re.compile(rb'<row[^>]*?\sr="\d+"')
+
+# Estado de cada proceso del pool, cargado una sola vez por el inicializador
+_worker = {}
+
+
+def default_workers():
+    return getattr(settings, 'IMPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+class SheetSplit:
+    """
+    XML de la hoja activa dividido en fragmentos de filas completas.
+
+    Cada fragmento conserva el encabezado original (con sus declaraciones de espacios de
+    nombres) para que el parser de openpyxl lo procese como una hoja independiente.
+    """
+
+    def __init__(self, data):
+        self.header = self.footer = None
+        self.starts = []
+        wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            self.xml = wb._archive.read(wb.active._worksheet_path)
+            # Lo que necesita el parser de cada fragmento: textos compartidos y formatos de fecha
+            self.state = {
+                'shared_strings': wb.shared_strings,
+                'epoch': wb.epoch,
+                'date_formats': wb._date_formats,
+                'timedelta_formats': wb._timedelta_formats,
+            }
+        except AttributeError:
+            # Versión de openpyxl sin estos atributos privados: sin filas, se lee en un solo proceso
+            return
+        finally:
+            wb.close()
+
+        opening = self.xml.find(b'<sheetData')
+        if opening < 0:
+            return
+        content_start = self.xml.index(b'>', opening) + 1
+        if self.xml[content_start - 2:content_start] == b'/>':
+            return
+        content_end = self.xml.index(b'</sheetData>', content_start)
+        self.header = self.xml[:content_start]
+        self.footer = b'</sheetData></worksheet>'
+        self.content = (content_start, content_end)
+        self.starts = [match.start() for match in ROW_START_RE.finditer(self.xml, content_start, content_end)]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def chunks(self, count):
+        """Divide las filas en `count` fragmentos; cada uno debe empezar con una fila numerada"""
+        size = -(-len(self.starts) // count)
+        bounds = self.starts[::size] + [self.content[1]]
+        chunks = []
+        for start, end in zip(bounds, bounds[1:]):
+            if not ROW_NUMBER_RE.match(self.xml, start):
+                return None
+            chunks.append(self.header + self.xml[start:end] + self.footer)
+        return chunks
+
+
+def _init_worker(state, dataset_name):
+    """Prepara el proceso; con fork el estado ya se hereda del proceso principal"""
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+    from . import datasets
+
+    _worker.update(state, dataset=getattr(datasets, dataset_name))
+
+
+def _parse_chunk(chunk):
+    dataset = _worker['dataset']
+    parser = WorkSheetParser(
+        io.BytesIO(chunk),
+        _worker['shared_strings'],
+        data_only=True,
+        epoch=_worker['epoch'],
+        date_formats=_worker['date_formats'],
+        timedelta_formats=_worker['timedelta_formats'],
+    )
+    width = len(dataset.columns)
+
+    def rows():
+        for row_number, cells in parser.parse():
+            if row_number < 2:
+                continue
+            values = [None] * width
+            for cell in cells:
+                if cell['column'] <= width:
+                    values[cell['column'] - 1] = cell['value']
+            yield row_number, values
+
+    return list(dataset.parse_rows(rows()))
+
+
+def parse_xlsx_parallel(data, dataset_name, workers=None):
+    """
+    Convierte y valida las filas de un libro en varios procesos y devuelve
+    (número de fila, registro, error) en el orden del archivo.
+
+    Los libros chicos, las hojas que no se pueden dividir con seguridad y las versiones de
+    openpyxl sin el parser interno se leen en un solo proceso con read_xlsx_rows.
+    Solo para comandos de administración: el pool se crea con fork, que no es seguro desde
+    un servidor web con varios hilos y conexiones abiertas.
+    """
+    from . import datasets
+    from .tabular import read_xlsx_rows
+
+    dataset = getattr(datasets, dataset_name)
+    workers = workers or default_workers()
+    chunks = None
+    if WorkSheetParser is not None and workers > 1:
+        split = SheetSplit(data)
+        if len(split) >= MIN_PARALLEL_ROWS:
+            chunks = split.chunks(workers * TASKS_PER_WORKER)
+    if not chunks:
+        return list(dataset.parse_rows(read_xlsx_rows(io.BytesIO(data), dataset)))
+
+    _init_worker(split.state, dataset_name)
+    try:
+        # Con fork los procesos heredan los textos compartidos sin volver a leer el libro
+        if 'fork' in multiprocessing.get_all_start_methods():
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(split.state, dataset_name))
+        with pool:
+            parsed = []
+            for result in pool.map(_parse_chunk, chunks):
+                parsed.extend(result)
+        return parsed
+    finally:
+        _worker.clear()
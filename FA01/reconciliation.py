@@ -0,0 +1,244 @@
+import ipaddress
+import re
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+from .models import Asset, DispositivoSucursal
+
+BATCH_SIZE = 5000
+# Hasta esta cantidad de dispositivos se buscan solo los activos candidatos en lugar de indexar todo el inventario
+TARGETED_LOOKUP_LIMIT = 500
+# Días sin reportes de red a partir de los cuales un activo con identidad de red se considera ausente
+MISSING_AFTER_DAYS = 30
+
+# Orden de confianza: la MAC identifica al equipo, la IP puede cambiar con DHCP
+MATCH_METHODS = ('mac', 'serial', 'hostname', 'ip')
+
+NON_HEX_RE = re.compile(r'[^0-9a-f]')
+SERIAL_SEPARATORS_RE = re.compile(r'[\s\-]')
+# Valores que el escáner y los agentes envían cuando no conocen el dato
+UNKNOWN_VALUES = {'', 'unknown', 'desconocido', 'none', 'n/a', '-'}
+PLACEHOLDER_MACS = {'000000000000', 'ffffffffffff'}
+
+
+def normalize_mac(value):
+    """aa:bb:cc:dd:ee:ff, sin importar separadores ni mayúsculas; '' si no es una MAC válida"""
+    digits = NON_HEX_RE.sub('', (value or '').lower())
+    if len(digits) != 12 or digits in PLACEHOLDER_MACS:
+        return ''
+    return ':'.join(digits[index:index + 2] for index in range(0, 12, 2))
+
+
+def normalize_ip(value):
+    try:
+        return str(ipaddress.ip_address((value or '').strip()))
+    except ValueError:
+        return ''
+
+
+def normalize_hostname(value):
+    """Nombre corto en minúsculas: "PC-01.empresa.local" y "pc-01" son el mismo equipo"""
+    value = (value or '').strip().lower().rstrip('.')
+    if value in UNKNOWN_VALUES or normalize_ip(value):
+        return ''
+    return value.split('.')[0]
+
+
+def normalize_serial(value):
+    value = SERIAL_SEPARATORS_RE.sub('', (value or '').upper())
+    return '' if value.lower() in UNKNOWN_VALUES else value
+
+
+NORMALIZERS = {
+    'mac': normalize_mac,
+    'serial': normalize_serial,
+    'hostname': normalize_hostname,
+    'ip': normalize_ip,
+}
+
+
+class AssetIndex:
+    """
+    Índices en memoria de los activos por MAC, número de serie, hostname e IP normalizados.
+
+    Una clave compartida por varios activos se descarta para no vincular un dispositivo
+    con el activo equivocado.
+    """
+
+    def __init__(self, rows):
+        self.keys = {method: {} for method in MATCH_METHODS}
+        for asset_id, serial_number, mac_address, hostname, ip_address in rows:
+            self._add('mac', mac_address, asset_id)
+            self._add('serial', serial_number, asset_id)
+            self._add('hostname', hostname, asset_id)
+            self._add('ip', ip_address, asset_id)
+
+    def _add(self, method, value, asset_id):
+        key = NORMALIZERS[method](value)
+        if key and self.keys[method].setdefault(key, asset_id) != asset_id:
+            self.keys[method][key] = None
+
+    @classmethod
+    def build(cls, queryset=None):
+        if queryset is None:
+            queryset = Asset.objects.all()
+        return cls(queryset.order_by().values_list(
+            'id', 'serial_number', 'mac_address', 'hostname', 'ip_address',
+        ).iterator(chunk_size=BATCH_SIZE))
+
+    @classmethod
+    def for_devices(cls, devices, limit=TARGETED_LOOKUP_LIMIT):
+        """
+        Índice con solo los activos que pueden coincidir con `devices` (tuplas mac, serie, hostname, ip).
+
+        Para lotes chicos (un envío de agente, un dispositivo agregado a mano) busca las claves
+        reportadas con consultas indexadas en lugar de cargar todo el inventario; por encima de
+        `limit` dispositivos usa build(). Las coincidencias se deciden igual que con build(): los
+        candidatos pasan por los mismos normalizadores.
+        """
+        devices = list(devices)
+        if len(devices) > limit:
+            return cls.build()
+
+        macs, serials, hostnames, ips = set(), set(), set(), set()
+        for mac, serial, hostname, ip in devices:
+            if key := normalize_mac(mac):
+                # Se guardan normalizadas al crear o editar el activo; se cubren las otras grafías comunes
+                macs.update({key, key.upper(), key.replace(':', '-'), key.upper().replace(':', '-')})
+            if key := normalize_serial(serial):
+                serials.update({key, (serial or '').strip().upper()})
+            if key := normalize_hostname(hostname):
+                hostnames.add(key.upper())
+            if key := normalize_ip(ip):
+                ips.add(key)
+
+        condition = Q()
+        if macs:
+            condition |= Q(mac_address__in=macs)
+        if serials:
+            # Upper(serial_number) es la expresión de asset_serial_trgm_idx
+            condition |= Q(serial_upper__in=serials)
+        for hostname in hostnames:
+            # Mismo nombre corto, con o sin dominio ("PC-01" y "pc-01.empresa.local")
+            condition |= Q(hostname_upper=hostname) | Q(hostname_upper__startswith=f'{hostname}.')
+        if ips:
+            condition |= Q(ip_address__in=ips)
+        if not condition:
+            return cls([])
+        return cls.build(
+            Asset.objects.annotate(serial_upper=Upper('serial_number'), hostname_upper=Upper('hostname')).filter(condition)
+        )
+
+    def match(self, mac='', serial='', hostname='', ip=''):
+        """Devuelve (id del activo, método) o (None, '') si el dispositivo es desconocido"""
+        values = {'mac': mac, 'serial': serial, 'hostname': hostname, 'ip': ip}
+        for method in MATCH_METHODS:
+            key = NORMALIZERS[method](values[method])
+            if key:
+                asset_id = self.keys[method].get(key)
+                if asset_id:
+                    return asset_id, method
+        return None, ''
+
+
+class ReconciliationResult:
+    def __init__(self):
+        self.matched = 0
+        self.unknown = 0
+        self.methods = Counter()
+        self.assets_seen = 0
+
+    @property
+    def total(self):
+        return self.matched + self.unknown
+
+
+def reconcile(reports=None, index=None, batch_size=BATCH_SIZE):
+    """
+    Vincula los reportes de dispositivos con los activos usando el índice en memoria.
+
+    Sin `index` se indexa todo el inventario (AssetIndex.build); para pocos reportes conviene
+    pasar AssetIndex.for_devices().
+
+    Por omisión procesa los reportes pendientes. Guarda en cada reporte el activo y el método de
+    coincidencia (o lo marca como desconocido) y actualiza last_seen_at de los activos encontrados.
+    """
+    if index is None:
+        index = AssetIndex.build()
+    if reports is None:
+        reports = DispositivoSucursal.objects.filter(reconciled_at__isnull=True)
+
+    now = timezone.now()
+    result = ReconciliationResult()
+    last_seen = {}
+
+    # Lotes por id en lugar de un cursor abierto: los reportes se actualizan mientras se recorren
+    rows = reports.order_by('id').values_list('id', 'mac', 'serial_number', 'hostname', 'ip', 'fecha_envio')
+    last_id = 0
+    with transaction.atomic():
+        while batch := list(rows.filter(id__gt=last_id)[:batch_size]):
+            last_id = batch[-1][0]
+            # Un UPDATE por activo y método en lugar de bulk_update, que arma un CASE por fila
+            groups = defaultdict(list)
+            for report_id, mac, serial_number, hostname, ip, fecha_envio in batch:
+                asset_id, method = index.match(mac, serial_number, hostname, ip)
+                groups[asset_id, method].append(report_id)
+                if asset_id:
+                    result.matched += 1
+                    result.methods[method] += 1
+                    if asset_id not in last_seen or last_seen[asset_id] < fecha_envio:
+                        last_seen[asset_id] = fecha_envio
+                else:
+                    result.unknown += 1
+            for (asset_id, method), ids in groups.items():
+                DispositivoSucursal.objects.filter(pk__in=ids).update(
+                    asset_id=asset_id, match_method=method, reconciled_at=now,
+                )
+        result.assets_seen = update_last_seen(last_seen, batch_size)
+    return result
+
+
+def update_last_seen(last_seen, batch_size=BATCH_SIZE):
+    """Actualiza last_seen_at solo cuando el reporte es más reciente que el valor guardado"""
+    ids = list(last_seen)
+    # Los reportes de un mismo envío comparten fecha: se agrupan los activos por fecha
+    by_date = defaultdict(list)
+    for start in range(0, len(ids), batch_size):
+        current = Asset.objects.filter(pk__in=ids[start:start + batch_size]).values_list('id', 'last_seen_at')
+        for asset_id, seen_at in current:
+            if seen_at is None or seen_at < last_seen[asset_id]:
+                by_date[last_seen[asset_id]].append(asset_id)
+    # update() no modifica updated_at: verse en la red no es un cambio del activo
+    for seen_at, asset_ids in by_date.items():
+        for start in range(0, len(asset_ids), batch_size):
+            Asset.objects.filter(pk__in=asset_ids[start:start + batch_size]).update(last_seen_at=seen_at)
+    return sum(len(asset_ids) for asset_ids in by_date.values())
+
+
+def unknown_devices():
+    """Reportes conciliados que no coinciden con ningún activo"""
+    return DispositivoSucursal.objects.filter(reconciled_at__isnull=False, asset__isnull=True)
+
+
+def missing_assets(days=MISSING_AFTER_DAYS, now=None):
+    """Activos con identidad de red que no aparecen en ningún reporte desde hace `days` días"""
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return (
+        Asset.objects.exclude(status__in=['retired', 'lost'])
+        .exclude(mac_address='', hostname='', ip_address__isnull=True)
+        .filter(Q(last_seen_at__isnull=True) | Q(last_seen_at__lt=cutoff))
+    )
+
+
+def match_scanned_devices(devices, index=None):
+    """Agrega asset_id y match_method a los dispositivos devueltos por NetworkScanner"""
+    if index is None:
+        index = AssetIndex.build()
+    for device in devices:
+        device['asset_id'], device['match_method'] = index.match(
+            device.get('mac'), device.get('serial_number'), device.get('hostname'), device.get('ip'),
+        )
+    return devices
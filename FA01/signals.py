@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from .changes import RESOURCE_BY_MODEL
+from .models import Tombstone
+
+
+def record_tombstone(sender, instance, **kwargs):
+    """Guarda la baja para que el feed de cambios la informe a los clientes"""
+    Tombstone.objects.create(resource=RESOURCE_BY_MODEL[sender], object_id=instance.pk)
+
+
+for model in RESOURCE_BY_MODEL:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'tombstone_{model.__name__}')
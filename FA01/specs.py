@@ -0,0 +1,305 @@
+import json
+import re
+from collections import defaultdict
+from functools import lru_cache
+from django.db import transaction
+from django.db.models import FloatField
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+NUMBER = 'number'
+CHOICE = 'choice'
+BOOLEAN = 'boolean'
+TEXT = 'text'
+
+BATCH_SIZE = 5000
+PARSE_CACHE_SIZE = 4096
+
+
+class SpecField:
+    """Especificación estructurada: clave en Asset.specs, etiqueta y tipo de valor"""
+
+    def __init__(self, key, label, kind=NUMBER, choices=None, unit=''):
+        self.key = key
+        self.label = label
+        self.kind = kind
+        self.choices = choices or []
+        self.unit = unit
+
+    def display(self, value):
+        if self.kind == BOOLEAN:
+            return 'Sí' if value else 'No'
+        if self.kind == CHOICE:
+            return dict(self.choices).get(value, value)
+        return f'{value} {self.unit}'.strip()
+
+
+SPEC_FIELDS = {
+    field.key: field
+    for field in [
+        SpecField('cpu', 'Procesador', TEXT),
+        SpecField('ram_gb', 'Memoria RAM', unit='GB'),
+        SpecField('storage_gb', 'Almacenamiento', unit='GB'),
+        SpecField('storage_type', 'Tipo de disco', CHOICE, [('SSD', 'SSD'), ('NVMe', 'NVMe'), ('HDD', 'HDD'), ('eMMC', 'eMMC')]),
+        SpecField('screen_in', 'Pantalla', unit='pulgadas'),
+        SpecField('resolution', 'Resolución', TEXT),
+        SpecField('printer_technology', 'Tecnología de impresión', CHOICE, [('laser', 'Láser'), ('inkjet', 'Inyección de tinta')]),
+        SpecField('color', 'Color', BOOLEAN),
+        SpecField('capacity_va', 'Capacidad', unit='VA'),
+        SpecField('ports', 'Puertos'),
+    ]
+}
+
+# Especificaciones que se extraen y se pueden filtrar en cada categoría de Asset.CATEGORIES
+COMPUTER_SPECS = ['cpu', 'ram_gb', 'storage_gb', 'storage_type']
+CATEGORY_SPECS = {
+    'pc': COMPUTER_SPECS,
+    'laptop': COMPUTER_SPECS + ['screen_in'],
+    'server': COMPUTER_SPECS,
+    'monitor': ['screen_in', 'resolution'],
+    'printer': ['printer_technology', 'color'],
+    'nobreak': ['capacity_va'],
+    'network': ['ports'],
+    'peripheral': [],
+    'other': list(SPEC_FIELDS),
+}
+
+# Claves numéricas con índice de expresión (categoría, valor) en Asset para filtrar por rango
+INDEXED_NUMBERS = ['ram_gb', 'storage_gb']
+
+UNIT_GB = {'MB': 1 / 1024, 'GB': 1, 'TB': 1024}
+NUMBER_RE = r'(\d+(?:[.,]\d+)?)'
+RAM_RE = re.compile(
+    rf'{NUMBER_RE}\s*(MB|GB|TB)\s*(?:de\s+)?(?:RAM|DDR\d*|memoria)|(?:RAM|memoria)\s*:?\s*(?:de\s+)?{NUMBER_RE}\s*(MB|GB|TB)',
+    re.IGNORECASE,
+)
+STORAGE_RE = re.compile(
+    rf'{NUMBER_RE}\s*(GB|TB)\s*(?:de\s+)?(SSD|NVMe|M\.2|HDD|eMMC|disco(?:\s+duro)?)'
+    rf'|(SSD|NVMe|M\.2|HDD|eMMC|disco(?:\s+duro)?)\s*:?\s*(?:de\s+)?{NUMBER_RE}\s*(GB|TB)',
+    re.IGNORECASE,
+)
+STORAGE_TYPES = {'ssd': 'SSD', 'nvme': 'NVMe', 'm.2': 'NVMe', 'hdd': 'HDD', 'emmc': 'eMMC'}
+CPU_RE = re.compile(
+    r'\b(Intel\s+(?:Core\s+)?(?:i[3579]|Ultra\s+\d|Xeon(?:\s+(?:Bronze|Silver|Gold|Platinum|W|E\d?))?|Celeron|Pentium)(?:[\s-]+\w*\d\w*)?'
+    r'|AMD\s+(?:Ryzen\s+\d|Athlon|EPYC)(?:\s+(?:PRO\s+)?\w*\d\w*)?'
+    r'|Apple\s+M\d(?:\s+(?:Pro|Max|Ultra))?'
+    r'|Core\s+i[3579](?:-\w*\d\w*)?)',
+    re.IGNORECASE,
+)
+SCREEN_RE = re.compile(rf'{NUMBER_RE}\s*(?:"|”|\'\'|pulgadas|pulg\b|in\b|inch)', re.IGNORECASE)
+RESOLUTION_RE = re.compile(r'\b(\d{3,4})\s*[x×]\s*(\d{3,4})\b')
+RESOLUTION_NAMES = [
+    (re.compile(r'\b(?:4K|UHD)\b', re.IGNORECASE), '3840x2160'),
+    (re.compile(r'\b(?:QHD|2K)\b', re.IGNORECASE), '2560x1440'),
+    (re.compile(r'\b(?:Full\s*HD|FHD|1080p)\b', re.IGNORECASE), '1920x1080'),
+]
+VA_RE = re.compile(rf'{NUMBER_RE}\s*(k)?VA\b', re.IGNORECASE)
+PORTS_RE = re.compile(r'(\d+)\s*(?:puertos|ports)\b', re.IGNORECASE)
+LASER_RE = re.compile(r'l[áa]ser', re.IGNORECASE)
+INKJET_RE = re.compile(r'tinta|inkjet|inyecci[óo]n', re.IGNORECASE)
+MONOCHROME_RE = re.compile(r'monocrom|blanco\s+y\s+negro|\bB/N\b', re.IGNORECASE)
+COLOR_RE = re.compile(r'\bcolor\b', re.IGNORECASE)
+
+
+def to_number(text, factor=1):
+    value = float(text.replace(',', '.')) * factor
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def parse_storage(text):
+    match = STORAGE_RE.search(text)
+    if not match:
+        return {}
+    if match[1]:
+        amount, unit, kind = match[1], match[2], match[3]
+    else:
+        kind, amount, unit = match[4], match[5], match[6]
+    specs = {'storage_gb': to_number(amount, UNIT_GB[unit.upper()])}
+    if kind.lower() in STORAGE_TYPES:
+        specs['storage_type'] = STORAGE_TYPES[kind.lower()]
+    elif kind.lower().startswith('disco'):
+        specs['storage_type'] = 'HDD'
+    return specs
+
+
+def parse_all(text):
+    """Todas las especificaciones reconocibles en el texto, sin importar la categoría"""
+    specs = {}
+    match = RAM_RE.search(text)
+    if match:
+        amount, unit = (match[1], match[2]) if match[1] else (match[3], match[4])
+        specs['ram_gb'] = to_number(amount, UNIT_GB[unit.upper()])
+    specs.update(parse_storage(text))
+    match = CPU_RE.search(text)
+    if match:
+        specs['cpu'] = ' '.join(match[1].split())
+    match = SCREEN_RE.search(text)
+    if match:
+        specs['screen_in'] = to_number(match[1])
+    match = RESOLUTION_RE.search(text)
+    if match:
+        specs['resolution'] = f'{match[1]}x{match[2]}'
+    else:
+        for regex, resolution in RESOLUTION_NAMES:
+            if regex.search(text):
+                specs['resolution'] = resolution
+                break
+    match = VA_RE.search(text)
+    if match:
+        specs['capacity_va'] = to_number(match[1], 1000 if match[2] else 1)
+    match = PORTS_RE.search(text)
+    if match:
+        specs['ports'] = int(match[1])
+    if LASER_RE.search(text):
+        specs['printer_technology'] = 'laser'
+    elif INKJET_RE.search(text):
+        specs['printer_technology'] = 'inkjet'
+    if MONOCHROME_RE.search(text):
+        specs['color'] = False
+    elif COLOR_RE.search(text):
+        specs['color'] = True
+    return specs
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cached(text, category):
+    specs = parse_all(text)
+    allowed = CATEGORY_SPECS.get(category, SPEC_FIELDS)
+    # specs solo se escribe desde aquí (editable=False, se recalcula al guardar): las claves
+    # numéricas deben ser números para que el ::double precision de spec_number nunca falle
+    return json.dumps({
+        key: specs[key] for key in allowed
+        if key in specs and (SPEC_FIELDS[key].kind != NUMBER or is_number(specs[key]))
+    }, sort_keys=True)
+
+
+def parse_specifications(text, category):
+    """
+    Especificaciones estructuradas del texto libre, limitadas al esquema de la categoría.
+
+    "Intel i5, 8GB RAM, 256GB SSD" en una laptop da
+    {'cpu': 'Intel i5', 'ram_gb': 8, 'storage_gb': 256, 'storage_type': 'SSD'}.
+    """
+    if not text:
+        return {}
+    # Los equipos de un mismo lote suelen compartir el texto: se analiza una sola vez
+    return json.loads(_parse_cached(text, category))
+
+
+def spec_number(key):
+    """
+    Valor numérico de una especificación como expresión SQL: (specs ->> key)::double precision.
+
+    Los filtros por rango deben usar esta misma expresión para aprovechar los índices de Asset.
+    El cast es seguro porque parse_specifications solo guarda números en las claves numéricas.
+    """
+    return Cast(KT(f'specs__{key}'), FloatField())
+
+
+def spec_filters():
+    """Filtros de especificaciones en el orden de SPEC_FIELDS (los de texto libre no se filtran)"""
+    return [field for field in SPEC_FIELDS.values() if field.kind != TEXT]
+
+
+def spec_categories(key):
+    return [category for category, keys in CATEGORY_SPECS.items() if key in keys]
+
+
+def parse_bool(value):
+    if value.lower() in ('1', 'true', 'si', 'sí', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(value)
+
+
+def filter_by_specs(queryset, params):
+    """
+    Aplica los filtros de especificaciones de `params` (request.GET o query_params).
+
+    - <clave>_min / <clave>_max: rango sobre una especificación numérica (p. ej. ram_gb_max=8).
+    - <clave>=valor: igualdad de una especificación de opciones o sí/no, como contención en specs.
+    - specs={"...": ...}: contención de un objeto JSON arbitrario.
+
+    La contención (@>) usa asset_specs_gin_idx; los rangos, los índices de expresión de
+    INDEXED_NUMBERS. Devuelve (queryset, filtros aplicados) y lanza ValueError si un valor no es válido.
+    """
+    applied = []
+    contains = {}
+    for field in spec_filters():
+        if field.kind == NUMBER:
+            for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+                value = params.get(f'{field.key}_{suffix}')
+                if value:
+                    try:
+                        number = float(value.replace(',', '.'))
+                    except ValueError:
+                        raise ValueError(f'{field.label}: "{value}" no es un número') from None
+                    # Solo las categorías cuyo esquema tiene la clave: primera columna de los índices de expresión
+                    queryset = queryset.alias(**{f'spec_{field.key}': spec_number(field.key)}).filter(
+                        category__in=spec_categories(field.key), **{f'spec_{field.key}__{lookup}': number}
+                    )
+                    applied.append((f'{field.key}_{suffix}', number))
+        else:
+            value = params.get(field.key)
+            if value:
+                if field.kind == BOOLEAN:
+                    try:
+                        contains[field.key] = parse_bool(value)
+                    except ValueError:
+                        raise ValueError(f'{field.label}: "{value}" debe ser sí o no') from None
+                elif value in dict(field.choices):
+                    contains[field.key] = value
+                else:
+                    raise ValueError(f'{field.label}: opción "{value}" no válida')
+
+    raw = params.get('specs')
+    if raw:
+        try:
+            extra = json.loads(raw)
+        except ValueError:
+            raise ValueError('specs debe ser un objeto JSON') from None
+        if not isinstance(extra, dict):
+            raise ValueError('specs debe ser un objeto JSON')
+        contains.update(extra)
+    if contains:
+        queryset = queryset.filter(specs__contains=contains)
+        applied.append(('specs', json.dumps(contains, sort_keys=True)))
+    return queryset, applied
+
+
+def spec_display(specs):
+    """(etiqueta, valor) de las especificaciones de un activo, en el orden de SPEC_FIELDS"""
+    return [(field.label, field.display(specs[key])) for key, field in SPEC_FIELDS.items() if key in (specs or {})]
+
+
+def backfill_specs(queryset, batch_size=BATCH_SIZE):
+    """
+    Recalcula Asset.specs desde el texto libre de los activos de `queryset`.
+
+    Recorre los activos en lotes por id y escribe un UPDATE por cada resultado distinto: los
+    equipos con el mismo texto y categoría se actualizan juntos. Solo los que cambian reciben un
+    nuevo updated_at, para que el feed de cambios publique el specs recalculado. Devuelve la
+    cantidad actualizada.
+    """
+    model = queryset.model
+    rows = queryset.order_by('id').values_list('id', 'category', 'specifications', 'specs')
+    now = timezone.now()
+    updated = 0
+    last_id = 0
+    while batch := list(rows.filter(id__gt=last_id)[:batch_size]):
+        last_id = batch[-1][0]
+        ids_by_specs = defaultdict(list)
+        for asset_id, category, text, current in batch:
+            specs = parse_specifications(text, category)
+            if specs != current:
+                ids_by_specs[json.dumps(specs, sort_keys=True)].append(asset_id)
+        with transaction.atomic():
+            for specs, ids in ids_by_specs.items():
+                updated += model.objects.filter(pk__in=ids).update(specs=json.loads(specs), updated_at=now)
+    return updated
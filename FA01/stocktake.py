@@ -0,0 +1,162 @@
+import re
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+from .models import Asset, StocktakeEntry, StocktakeSession
+
+# Activos que ya no se esperan encontrar físicamente
+NOT_EXPECTED_STATUSES = ['retired', 'lost']
+SCAN_BATCH_SIZE = 5000
+SNAPSHOT_BATCH_SIZE = 2000
+SERIAL_MAX_LENGTH = StocktakeEntry._meta.get_field('serial_key').max_length
+# En texto plano va una lectura por línea (o por celda al pegar una fila de Excel): los números de
+# serie pueden tener espacios, comas o punto y coma, que se conservan como en serial_key
+SERIAL_SEPARATOR_RE = re.compile(r'[\r\n\t]+')
+
+# Resultado de cada entrada según expected, scanned_at y asset
+RESULTS = {
+    'found': Q(expected=True, scanned_at__isnull=False),
+    'missing': Q(expected=True, scanned_at__isnull=True),
+    'misplaced': Q(expected=False, asset__isnull=False),
+    'unexpected': Q(expected=False, asset__isnull=True),
+}
+RESULT_LABELS = {
+    'found': 'Encontrados',
+    'missing': 'Faltantes',
+    'misplaced': 'Mal ubicados',
+    'unexpected': 'No registrados',
+}
+
+
+def serial_key(value):
+    return value.strip().upper()
+
+
+def split_serials(text):
+    return [key for key in (serial_key(part) for part in SERIAL_SEPARATOR_RE.split(text)) if key]
+
+
+def open_session(location, user=None, include_sublocations=True):
+    """
+    Abre un inventario físico y guarda la fotografía de los activos esperados en la ubicación.
+
+    La fotografía es una fila por activo en StocktakeEntry, indexada por (sesión, número de
+    serie): las lecturas posteriores se comparan contra ella y no contra Asset, que puede cambiar.
+    """
+    assets = Asset.objects.exclude(status__in=NOT_EXPECTED_STATUSES)
+    if include_sublocations:
+        assets = assets.filter(location__path__startswith=location.path)
+    else:
+        assets = assets.filter(location=location)
+
+    with transaction.atomic():
+        session = StocktakeSession.objects.create(
+            location=location, include_sublocations=include_sublocations, opened_by=user,
+        )
+        entries = {}
+        for asset_id, serial_number, name, location_id in assets.values_list('id', 'serial_number', 'name', 'location_id').iterator():
+            # Dos series que solo difieren en mayúsculas se leen igual; se conserva la primera
+            entries.setdefault(serial_key(serial_number), StocktakeEntry(
+                session=session, serial_key=serial_key(serial_number), asset_id=asset_id,
+                name=name, location_id=location_id, expected=True,
+            ))
+        StocktakeEntry.objects.bulk_create(entries.values(), batch_size=SNAPSHOT_BATCH_SIZE)
+    return session
+
+
+def record_scans(session, serials, scanned_at=None):
+    """
+    Registra un lote de números de serie leídos y devuelve un Counter con el resultado de cada uno.
+
+    Cada lote son tres consultas sin importar su tamaño: las entradas de la fotografía que
+    coinciden (por el índice único de sesión y serie), el UPDATE de las encontradas y la búsqueda
+    en Asset de las que no estaban en la fotografía (mal ubicadas si existen, si no no registradas).
+    Las series ya leídas cuentan como 'duplicate' y las demasiado largas como 'invalid'.
+    """
+    scanned_at = scanned_at or timezone.now()
+    counts = Counter()
+    keys = set()
+    for key in serials:
+        if len(key) > SERIAL_MAX_LENGTH:
+            counts['invalid'] += 1
+        elif key in keys:
+            counts['duplicate'] += 1
+        else:
+            keys.add(key)
+    if not keys:
+        return counts
+
+    with transaction.atomic():
+        existing = {
+            key: (entry_id, expected, previous)
+            for entry_id, key, expected, previous in session.entries.filter(serial_key__in=keys).values_list(
+                'id', 'serial_key', 'expected', 'scanned_at',
+            )
+        }
+        pending = [entry_id for entry_id, expected, previous in existing.values() if previous is None]
+        found = 0
+        if pending:
+            # Otra lectura simultánea pudo marcarlas: solo cuentan las que actualiza este lote
+            found = StocktakeEntry.objects.filter(id__in=pending, scanned_at__isnull=True).update(scanned_at=scanned_at)
+        counts['found'] += found
+        counts['duplicate'] += len(existing) - found
+
+        new_keys = keys - existing.keys()
+        if new_keys:
+            # Se compara en mayúsculas como serial_key; la expresión es la de asset_serial_trgm_idx
+            assets = {
+                serial_key(serial_number): (asset_id, name, location_id)
+                for asset_id, serial_number, name, location_id in Asset.objects.annotate(
+                    serial_upper=Upper('serial_number'),
+                ).filter(serial_upper__in=new_keys).values_list('id', 'serial_number', 'name', 'location_id')
+            }
+            StocktakeEntry.objects.bulk_create([
+                StocktakeEntry(
+                    session=session, serial_key=key, asset_id=asset_id, name=name,
+                    location_id=location_id, scanned_at=scanned_at,
+                )
+                for key in new_keys
+                for asset_id, name, location_id in [assets.get(key, (None, '', None))]
+            ], batch_size=SNAPSHOT_BATCH_SIZE, ignore_conflicts=True)
+            counts['misplaced'] += len(assets)
+            counts['unexpected'] += len(new_keys) - len(assets)
+    return counts
+
+
+def iter_text_serials(lines):
+    """Series de un cuerpo de texto leído línea por línea"""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        yield from split_serials(line)
+
+
+def iter_serial_batches(keys, batch_size=SCAN_BATCH_SIZE):
+    """Agrupa en lotes series ya normalizadas con serial_key"""
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stocktake_summary(session):
+    """Cantidad de entradas por resultado, en una sola consulta con agregados filtrados"""
+    return session.entries.aggregate(**{
+        result: Count('id', filter=condition) for result, condition in RESULTS.items()
+    })
+
+
+def stocktake_entries(session, result):
+    return session.entries.filter(RESULTS[result])
+
+
+def close_session(session):
+    session.status = 'closed'
+    session.closed_at = timezone.now()
+    session.save(update_fields=['status', 'closed_at'])
@@ -1,3 +1,759 @@
-from django.test import TestCase
+import gzip
+import io
+import ipaddress
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+import pyarrow as pa
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from .archive import RestoreError, archive_assets, restore_assets
+from .changes import InvalidCursor, decode_cursor, encode_cursor, get_changes
+from .columnar_export import ARROW, ColumnarExport
+from .datasets import ASSET_DATASET, AssetImportPlan, stream_asset_upserts
+from .discovery import (
+    DiscoverySource, DnsmasqLeaseSource, IpNeighSource, IscDhcpLeaseSource, Neighbor, ProcArpSource, discover,
+)
+from .history import inventory_state_at
+from .lifecycle import LifecycleArrays, compute_lifecycle
+from .management.commands.check_startup import DEFAULT_FORBIDDEN, STARTUP_SCRIPT
+from .media import parse_range, resolve_media
+from .models import ArchivedAsset, Asset, AssetCheckpoint, Location, Movement
+from .oui import OuiDatabase
+from .parallel_import import SheetSplit, parse_xlsx_parallel
+from .specs import filter_by_specs, parse_specifications
+from .stocktake import (
+    iter_serial_batches, iter_text_serials, open_session, record_scans, stocktake_entries, stocktake_summary,
+)
+from .tabular import WRITERS, parse_date_text, read_rows, write_xlsx
 
-# Create your tests here.
+
+def at(month, day):
+    return datetime(2024, month, day, 12, tzinfo=dt_timezone.utc)
+
+
+def today_offset(days):
+    return LifecycleVectorizationTests.today + timedelta(days=days)
+
+
+class StartupImportTests(SimpleTestCase):
+    """Un worker nuevo no debe cargar los módulos del escaneo de red (nmap, scapy) al iniciar"""
+
+    def test_network_scan_modules_load_lazily(self):
+        # Intérprete nuevo: en este proceso los módulos pueden estar cargados por otras pruebas
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'inventario.settings'))
+        result = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        modules = {module.split('.')[0] for module in json.loads(result.stdout.splitlines()[-1])['modules']}
+        self.assertIn('FA01', modules)
+        self.assertEqual(sorted(modules & set(DEFAULT_FORBIDDEN)), [], 'módulos cargados al iniciar el worker')
+
+
+class InventoryStateAtTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = Location.objects.create(name='Almacén', location_type='warehouse')
+        cls.repair = Location.objects.create(name='Taller', location_type='office')
+        cls.office = Location.objects.create(name='Oficina', location_type='office')
+        cls.asset = Asset.objects.create(name='Laptop', serial_number='L-1', category='laptop')
+        Asset.objects.filter(pk=cls.asset.pk).update(created_at=at(1, 1))
+        cls.later = Asset.objects.create(name='Monitor', serial_number='M-1', category='monitor')
+        Asset.objects.filter(pk=cls.later.pk).update(created_at=at(6, 1))
+
+        cls.move(at(1, 10), 'location', to_location=cls.first, assigned_to_name='Ana')
+        cls.move(at(2, 1), 'maintenance', to_location=cls.repair)
+        cls.move(at(3, 1), 'return')
+        AssetCheckpoint.objects.create(
+            asset=cls.asset, taken_at=at(2, 15), location=cls.office, assigned_to_name='Beto', status='maintenance',
+        )
+
+    @classmethod
+    def move(cls, when, movement, **fields):
+        # movement_date es auto_now_add: se fija después de crear el movimiento
+        created = Movement.objects.create(asset=cls.asset, movement=movement, **fields)
+        Movement.objects.filter(pk=created.pk).update(movement_date=when)
+
+    def state(self, when):
+        return {row['asset_id']: row for row in inventory_state_at(when)}
+
+    def test_asset_without_history_has_no_state(self):
+        row = self.state(at(1, 5))[self.asset.pk]
+        self.assertEqual((row['location_id'], row['assigned_to_name'], row['status']), (None, None, None))
+
+    def test_applies_latest_movement_per_field(self):
+        row = self.state(at(2, 5))[self.asset.pk]
+        self.assertEqual(row['location'], 'Taller')
+        self.assertEqual(row['assigned_to_name'], 'Ana')
+        self.assertEqual(row['status'], 'maintenance')
+
+    def test_starts_from_latest_checkpoint(self):
+        row = self.state(at(2, 20))[self.asset.pk]
+        self.assertEqual((row['location'], row['assigned_to_name'], row['status']), ('Oficina', 'Beto', 'maintenance'))
+
+    def test_movements_after_checkpoint_override_it(self):
+        row = self.state(at(3, 5))[self.asset.pk]
+        # El retorno no tiene destino: la ubicación sigue siendo la del punto de control
+        self.assertEqual((row['location'], row['status'], row['status_display']), ('Oficina', 'active', 'Activo'))
+
+    def test_excludes_assets_created_later(self):
+        self.assertNotIn(self.later.pk, self.state(at(3, 5)))
+        self.assertIn(self.later.pk, self.state(at(6, 2)))
+
+
+class ChangesFeedTests(TestCase):
+    def setUp(self):
+        # Las filas recién creadas se entregan de inmediato, salvo en test_recent_rows_wait_to_settle
+        patcher = mock.patch('FA01.changes.SETTLE_DELAY', timedelta(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def drain(self, resource, cursor=None, limit=2):
+        """Recorre el feed hasta el final y devuelve (ids cambiados, ids eliminados, cursor)"""
+        changed, deleted = [], []
+        while True:
+            page = get_changes(resource, cursor, limit)
+            changed += [row['id'] for row in page['changed']]
+            deleted += page['deleted']
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                return changed, deleted, cursor
+
+    def test_pages_through_rows_sharing_updated_at(self):
+        ids = [Location.objects.create(name=f'U{i}', location_type='office').pk for i in range(5)]
+        # Mismo updated_at en todas: el desempate por id no debe repetir ni saltear filas
+        Location.objects.update(updated_at=at(1, 1))
+        changed, _, _ = self.drain('locations', limit=2)
+        self.assertEqual(changed, ids)
+
+    def test_cursor_only_returns_later_changes(self):
+        first = Location.objects.create(name='A', location_type='office')
+        second = Location.objects.create(name='B', location_type='office')
+        _, _, cursor = self.drain('locations')
+        self.assertEqual(get_changes('locations', cursor)['changed'], [])
+
+        first.description = 'cambiada'
+        first.save()
+        page = get_changes('locations', cursor)
+        self.assertEqual([row['id'] for row in page['changed']], [first.pk])
+        self.assertNotIn(second.pk, [row['id'] for row in page['changed']])
+
+    def test_deletions_are_reported_through_tombstones(self):
+        asset = Asset.objects.create(name='Laptop', serial_number='L-1', category='laptop')
+        _, _, cursor = self.drain('assets')
+        asset_id = asset.pk
+        asset.delete()
+        changed, deleted, cursor = self.drain('assets', cursor)
+        self.assertEqual((changed, deleted), ([], [asset_id]))
+        self.assertEqual(get_changes('assets', cursor)['deleted'], [])
+
+    def test_recent_rows_wait_to_settle(self):
+        now = timezone.now()
+        settled = Location.objects.create(name='Vieja', location_type='office')
+        # Guardada hace 2 s en una transacción que recién confirma: todavía no se entrega
+        late = Location.objects.create(name='Tardía', location_type='office')
+        Location.objects.filter(pk=settled.pk).update(updated_at=now - timedelta(seconds=60))
+        Location.objects.filter(pk=late.pk).update(updated_at=now - timedelta(seconds=2))
+        Asset.objects.create(name='Laptop', serial_number='L-9', category='laptop').delete()
+
+        with mock.patch('FA01.changes.SETTLE_DELAY', timedelta(seconds=5)), \
+                mock.patch('django.utils.timezone.now', return_value=now):
+            page = get_changes('locations')
+            self.assertEqual([row['id'] for row in page['changed']], [settled.pk])
+            self.assertFalse(page['has_more'])
+            self.assertEqual(get_changes('assets')['deleted'], [])
+        with mock.patch('FA01.changes.SETTLE_DELAY', timedelta(seconds=5)), \
+                mock.patch('django.utils.timezone.now', return_value=now + timedelta(seconds=10)):
+            self.assertEqual([row['id'] for row in get_changes('locations', page['next_cursor'])['changed']], [late.pk])
+            self.assertEqual(len(get_changes('assets')['deleted']), 1)
+
+    def test_cursor_round_trip_and_invalid_cursor(self):
+        position = {'u': ['2024-01-01T12:00:00+00:00', 7], 'd': None}
+        decoded = decode_cursor(encode_cursor(position))
+        self.assertEqual(decoded['u'], [at(1, 1), 7])
+        self.assertIsNone(decoded['d'])
+        for cursor in ['no-es-base64!', encode_cursor({'u': ['ayer', 1]})]:
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+
+class LifecycleVectorizationTests(TestCase):
+    """compute_lifecycle debe coincidir fila por fila con los métodos de Asset"""
+    today = date(2024, 2, 29)
+
+    @classmethod
+    def setUpTestData(cls):
+        purchases = [
+            None, date(2024, 2, 29), date(2023, 2, 28), date(2023, 3, 1), date(2021, 2, 28), date(2020, 2, 29),
+            date(2021, 3, 1), date(2021, 5, 31), date(2019, 12, 31), date(2024, 3, 15), date(2021, 6, 1),
+        ]
+        warranties = [None, today_offset(-1), today_offset(0), today_offset(90), today_offset(91)]
+        Asset.objects.bulk_create([
+            Asset(
+                name=f'A{index}', serial_number=f'S{index}', category='pc', purchase_date=purchase,
+                preferred_usage_period=period, warranty_expiration=warranties[index % len(warranties)],
+            )
+            for index, (purchase, period) in enumerate(
+                (purchase, period) for purchase in purchases for period in (12, 36, 39)
+            )
+        ])
+
+    def test_matches_model_methods(self):
+        assets = list(Asset.objects.order_by('id'))
+        arrays = LifecycleArrays.from_queryset(Asset.objects.order_by('id'))
+        metrics = compute_lifecycle(arrays, today=self.today)
+        now = datetime.combine(self.today, datetime.min.time(), tzinfo=dt_timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            for position, asset in enumerate(assets):
+                with self.subTest(purchase=asset.purchase_date, period=asset.preferred_usage_period):
+                    self.assertEqual(arrays.ids[position], asset.pk)
+                    self.assertEqual(metrics['age'][position], asset.get_age())
+                    self.assertEqual(bool(metrics['nearing_end_of_life'][position]), asset.is_nearing_end_of_life())
+                    if asset.warranty_expiration:
+                        self.assertEqual(metrics['warranty_days_left'][position], asset.warranty_days_left)
+
+    def test_warranty_status_boundaries(self):
+        metrics = compute_lifecycle(LifecycleArrays.from_queryset(Asset.objects.order_by('id')), today=self.today)
+        statuses = dict(zip(Asset.objects.order_by('id').values_list('warranty_expiration', flat=True), metrics['warranty_status']))
+        self.assertEqual(statuses[None], 'none')
+        self.assertEqual(statuses[today_offset(-1)], 'expired')
+        self.assertEqual(statuses[today_offset(0)], 'expiring')
+        self.assertEqual(statuses[today_offset(90)], 'expiring')
+        self.assertEqual(statuses[today_offset(91)], 'active')
+
+
+class TabularRoundTripTests(SimpleTestCase):
+    """Lo que se exporta en cualquier formato debe volver a importarse sin cambios"""
+
+    # Filas como las devuelve export_values (values_list en el orden de las columnas)
+    value_rows = [
+        (1, 'Laptop Dell', 'laptop', 'DELL-1', date(2023, 1, 15), 'in_use', 'Oficina', 'jperez',
+         'Desarrollo', 'Intel i5, 8GB RAM', 1, 36, date(2026, 1, 15)),
+        (2, 'Monitor "24"', 'monitor', 'HP-2', None, 'retired', None, None, '', '', 3, 48, None),
+    ]
+    expected = [
+        {'name': 'Laptop Dell', 'category': 'laptop', 'serial_number': 'DELL-1', 'purchase_date': date(2023, 1, 15),
+         'status': 'in_use', 'location': 'Oficina', 'assigned_to_name': 'jperez', 'description': 'Desarrollo',
+         'specifications': 'Intel i5, 8GB RAM', 'quantity': 1, 'preferred_usage_period': 36,
+         'warranty_expiration': date(2026, 1, 15)},
+        {'name': 'Monitor "24"', 'category': 'monitor', 'serial_number': 'HP-2', 'purchase_date': None,
+         'status': 'retired', 'location': None, 'assigned_to_name': None, 'description': '',
+         'specifications': '', 'quantity': 3, 'preferred_usage_period': 48, 'warranty_expiration': None},
+    ]
+
+    def export(self, fmt):
+        rows = ASSET_DATASET.export_rows(self.value_rows)
+        if fmt == 'xlsx':
+            sink = io.BytesIO()
+            WRITERS[fmt](sink, ASSET_DATASET, rows)
+            return io.BytesIO(sink.getvalue())
+        sink = io.StringIO()
+        WRITERS[fmt](sink, ASSET_DATASET, rows)
+        return io.BytesIO(sink.getvalue().encode('utf-8'))
+
+    def round_trip(self, fmt):
+        parsed = list(ASSET_DATASET.parse_rows(read_rows(self.export(fmt), ASSET_DATASET, fmt)))
+        self.assertEqual([error for _, _, error in parsed], [None, None])
+        return [record for _, record, _ in parsed]
+
+    def test_csv_round_trip(self):
+        self.assertEqual(self.round_trip('csv'), self.expected)
+
+    def test_xlsx_round_trip(self):
+        self.assertEqual(self.round_trip('xlsx'), self.expected)
+
+    def test_jsonl_round_trip(self):
+        self.assertEqual(self.round_trip('jsonl'), self.expected)
+
+    def test_required_columns_and_blank_rows(self):
+        rows = [(2, ['', 'Sin serie']), (3, [None] * 13), (4, ['', 'Router', 'otro', 'R-1', '', 'desconocido'])]
+        parsed = list(ASSET_DATASET.parse_rows(rows))
+        self.assertEqual([(number, error) for number, _, error in parsed], [(2, 'falta Número de Serie'), (4, None)])
+        record = parsed[1][1]
+        self.assertEqual((record['category'], record['status'], record['quantity']), ('other', 'active', 1))
+
+    def test_parse_date_text_formats(self):
+        for text in ['2024-03-05', '2024/03/05', '05/03/2024', '05-03-2024', '2024-3-5']:
+            self.assertEqual(parse_date_text(text), date(2024, 3, 5), text)
+        # Día/mes tiene prioridad; mes/día solo con '/' cuando el día/mes no es válido
+        self.assertEqual(parse_date_text('03/25/2024'), date(2024, 3, 25))
+        self.assertIsNone(parse_date_text('03-25-2024'))
+        self.assertIsNone(parse_date_text('31/02/2024'))
+        self.assertIsNone(parse_date_text('hoy'))
+
+
+class StaticSource(DiscoverySource):
+    def __init__(self, name, neighbors):
+        self.name = name
+        self.neighbors = neighbors
+
+    def read(self):
+        return self.neighbors
+
+
+class DiscoveryParserTests(SimpleTestCase):
+    now = datetime(2024, 6, 1, 12, tzinfo=dt_timezone.utc)
+
+    def test_proc_arp_keeps_complete_entries(self):
+        text = (
+            'IP address       HW type     Flags       HW address            Mask     Device\n'
+            '192.168.1.1      0x1         0x2         aa:bb:cc:dd:ee:01     *        eth0\n'
+            '192.168.1.7      0x1         0x0         00:00:00:00:00:00     *        eth0\n'
+            '192.168.1.9      0x1         0x6         aa:bb:cc:dd:ee:09     *        eth0\n'
+        )
+        self.assertEqual(list(ProcArpSource().parse(text)), [
+            Neighbor('192.168.1.1', 'aa:bb:cc:dd:ee:01', ''),
+            Neighbor('192.168.1.9', 'aa:bb:cc:dd:ee:09', ''),
+        ])
+
+    def test_ip_neigh_skips_unresolved_entries(self):
+        text = (
+            '192.168.1.1 dev eth0 lladdr aa:bb:cc:dd:ee:01 REACHABLE\n'
+            '192.168.1.2 dev eth0 lladdr aa:bb:cc:dd:ee:02 router STALE\n'
+            '192.168.1.3 dev eth0  FAILED\n'
+            '192.168.1.4 dev eth0 lladdr aa:bb:cc:dd:ee:04 INCOMPLETE\n'
+        )
+        self.assertEqual(list(IpNeighSource().parse(text)), [
+            Neighbor('192.168.1.1', 'aa:bb:cc:dd:ee:01', ''),
+            Neighbor('192.168.1.2', 'aa:bb:cc:dd:ee:02', ''),
+        ])
+
+    def test_isc_leases_keep_the_last_active_lease(self):
+        text = '''
+lease 10.0.0.5 {
+  starts 4 2024/05/30 10:00:00;
+  ends 6 2024/06/08 10:00:00;
+  binding state active;
+  next binding state free;
+  hardware ethernet AA:BB:CC:00:00:05;
+  client-hostname "viejo";
+}
+lease 10.0.0.5 {
+  ends epoch 1717329600;
+  binding state active;
+  hardware ethernet AA:BB:CC:00:00:06;
+  client-hostname "nuevo";
+}
+lease 10.0.0.6 {
+  ends 5 2024/05/31 10:00:00;
+  binding state active;
+  hardware ethernet AA:BB:CC:00:00:07;
+}
+lease 10.0.0.7 {
+  ends 6 2024/06/08 10:00:00;
+  binding state active;
+  hardware ethernet AA:BB:CC:00:00:08;
+}
+lease 10.0.0.7 {
+  binding state free;
+}
+'''
+        self.assertEqual(list(IscDhcpLeaseSource().parse(text, now=self.now)), [
+            Neighbor('10.0.0.5', 'AA:BB:CC:00:00:06', 'nuevo'),
+        ])
+
+    def test_dnsmasq_leases_skip_expired_entries(self):
+        expires = int(self.now.timestamp())
+        text = (
+            f'{expires + 60} aa:bb:cc:00:00:01 10.0.0.1 equipo-1 01:aa:bb:cc:00:00:01\n'
+            f'{expires - 60} aa:bb:cc:00:00:02 10.0.0.2 vencido *\n'
+            '0 aa:bb:cc:00:00:03 10.0.0.3 * *\n'
+            'duid 00:01:00:01\n'
+        )
+        self.assertEqual(list(DnsmasqLeaseSource().parse(text, now=self.now)), [
+            Neighbor('10.0.0.1', 'aa:bb:cc:00:00:01', 'equipo-1'),
+            Neighbor('10.0.0.3', 'aa:bb:cc:00:00:03', ''),
+        ])
+
+    @mock.patch('FA01.discovery.vendors_for', lambda macs: [None] * len(macs))
+    def test_discover_merges_sources_in_order(self):
+        arp = StaticSource('arp', [
+            Neighbor('10.0.0.2', 'AA-BB-CC-00-00-02', ''),
+            Neighbor('10.0.0.1', 'aa:bb:cc:00:00:01', ''),
+            Neighbor('192.168.9.9', 'aa:bb:cc:00:00:09', ''),
+        ])
+        leases = StaticSource('dnsmasq', [
+            Neighbor('10.0.0.1', 'aa:bb:cc:00:00:01', 'equipo-1'),
+            # Otra MAC en la misma IP: no aporta el nombre
+            Neighbor('10.0.0.2', 'aa:bb:cc:00:00:99', 'otro'),
+            Neighbor('10.0.0.3', '', 'sin-mac'),
+        ])
+        devices = discover([arp, leases], networks=[ipaddress.ip_network('10.0.0.0/24')])
+        self.assertEqual(
+            [(device['ip'], device['mac'], device['hostname'], device['source']) for device in devices],
+            [
+                ('10.0.0.1', 'aa:bb:cc:00:00:01', 'equipo-1', 'arp, dnsmasq'),
+                ('10.0.0.2', 'aa:bb:cc:00:00:02', 'Unknown', 'arp, dnsmasq'),
+                ('10.0.0.3', 'Unknown', 'sin-mac', 'dnsmasq'),
+            ],
+        )
+        self.assertIsNone(discover([]))
+
+
+class MediaRangeTests(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=500-', 1000), (500, 999))
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_parse_range_without_usable_range(self):
+        for header in [None, '', 'bytes=-', 'items=0-10', 'bytes=0-10,20-30']:
+            self.assertIsNone(parse_range(header, 1000), header)
+
+    def test_parse_range_unsatisfiable(self):
+        for header in ['bytes=1000-', 'bytes=50-10', 'bytes=-0']:
+            with self.assertRaises(ValueError, msg=header):
+                parse_range(header, 1000)
+
+
+class ResolveMediaTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        for name in ['assets/foto.jpg', 'uploads/tmp/parcial.bin', 'privado.txt']:
+            full_path = os.path.join(self.media_root, *name.split('/'))
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as file:
+                file.write(b'x')
+        override = self.settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_resolves_files_in_served_directories(self):
+        path, full_path = resolve_media('assets/foto.jpg')
+        self.assertEqual(path, 'assets/foto.jpg')
+        self.assertEqual(full_path, os.path.join(self.media_root, 'assets', 'foto.jpg'))
+        self.assertEqual(resolve_media('/assets/./otra/../foto.jpg')[0], 'assets/foto.jpg')
+
+    def test_rejects_paths_outside_served_directories(self):
+        for path in [
+            '../settings.py', 'assets/../../settings.py', 'assets/../privado.txt', 'privado.txt',
+            'uploads/tmp/parcial.bin', 'assets/no-existe.jpg', 'assets/',
+        ]:
+            with self.assertRaises(Http404, msg=path):
+                resolve_media(path)
+
+
+class ArchiveRestoreTests(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name='Bodega', location_type='warehouse')
+        self.asset = Asset.objects.create(
+            name='Laptop', serial_number='ARC-1', category='laptop', location=self.location,
+        )
+        Asset.objects.filter(pk=self.asset.pk).update(created_at=at(1, 1))
+        self.movement = Movement.objects.create(asset=self.asset, movement='location', to_location=self.location)
+        self.checkpoint = AssetCheckpoint.objects.create(
+            asset=self.asset, taken_at=at(2, 1), location=self.location, status='active',
+        )
+        self.session = open_session(self.location)
+        self.entry = self.session.entries.get(serial_key='ARC-1')
+        Asset.objects.filter(pk=self.asset.pk).update(status='retired')
+
+    def test_archive_then_restore(self):
+        counts = archive_assets(Asset.objects.filter(pk=self.asset.pk))
+        self.assertEqual((counts['assets'], counts['movements'], counts['checkpoints']), (1, 1, 1))
+        self.assertEqual(counts['stocktake_entries'], 1)
+        self.assertFalse(Asset.objects.filter(pk=self.asset.pk).exists())
+        self.assertFalse(Movement.objects.filter(pk=self.movement.pk).exists())
+        self.entry.refresh_from_db()
+        self.assertIsNone(self.entry.asset_id)
+
+        archived = ArchivedAsset.objects.get(asset_id=self.asset.pk)
+        self.assertEqual(archived.related['stocktake_entries'], [self.entry.pk])
+        counts = restore_assets([archived])
+        self.assertEqual((counts['assets'], counts['movements'], counts['stocktake_entries']), (1, 1, 1))
+
+        restored = Asset.objects.get(pk=self.asset.pk)
+        self.assertEqual((restored.serial_number, restored.status, restored.location_id), ('ARC-1', 'retired', self.location.pk))
+        self.assertEqual(restored.created_at, at(1, 1))
+        self.assertEqual(Movement.objects.get(pk=self.movement.pk).asset_id, self.asset.pk)
+        self.assertEqual(AssetCheckpoint.objects.get(pk=self.checkpoint.pk).taken_at, at(2, 1))
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.asset_id, self.asset.pk)
+        self.assertFalse(ArchivedAsset.objects.exists())
+
+    def test_active_assets_are_not_archived(self):
+        Asset.objects.filter(pk=self.asset.pk).update(status='active')
+        self.assertEqual(archive_assets(Asset.objects.all())['assets'], 0)
+        self.assertTrue(Asset.objects.filter(pk=self.asset.pk).exists())
+
+    def test_restore_conflict(self):
+        archive_assets(Asset.objects.filter(pk=self.asset.pk))
+        Asset.objects.create(name='Reemplazo', serial_number='ARC-1', category='laptop')
+        with self.assertRaises(RestoreError):
+            restore_assets(ArchivedAsset.objects.all())
+        self.assertTrue(ArchivedAsset.objects.filter(asset_id=self.asset.pk).exists())
+
+
+class RecordScansTests(TestCase):
+    def setUp(self):
+        self.store = Location.objects.create(name='Tienda', location_type='office')
+        self.other = Location.objects.create(name='Depósito', location_type='warehouse')
+        Asset.objects.create(name='Laptop', serial_number='sc-1', category='laptop', location=self.store)
+        Asset.objects.create(name='Monitor', serial_number='SC-2', category='monitor', location=self.store)
+        Asset.objects.create(name='Baja', serial_number='SC-3', category='monitor', location=self.store, status='retired')
+        self.elsewhere = Asset.objects.create(name='Impresora', serial_number='SC-4', category='printer', location=self.other)
+        self.session = open_session(self.store)
+
+    def test_snapshot_excludes_retired_assets(self):
+        self.assertEqual(sorted(self.session.entries.values_list('serial_key', flat=True)), ['SC-1', 'SC-2'])
+
+    def test_record_scans_counts(self):
+        counts = record_scans(self.session, ['SC-1', 'SC-4', 'NUEVO', 'SC-1', 'X' * 101])
+        self.assertEqual(counts, {'found': 1, 'misplaced': 1, 'unexpected': 1, 'duplicate': 1, 'invalid': 1})
+
+        # Una serie ya leída en otro lote también es duplicada
+        counts = record_scans(self.session, ['SC-1', 'SC-4', 'NUEVO', 'SC-2'])
+        self.assertEqual(counts, {'found': 1, 'duplicate': 3})
+
+        self.assertEqual(stocktake_summary(self.session), {'found': 2, 'missing': 0, 'misplaced': 1, 'unexpected': 1})
+        misplaced = stocktake_entries(self.session, 'misplaced').get()
+        self.assertEqual((misplaced.asset_id, misplaced.location_id), (self.elsewhere.pk, self.other.pk))
+
+    def test_text_serials_split_on_lines_and_cells(self):
+        lines = [b'sc-1\r\n', 'SC 2\tsc-3, a\n', b'\n']
+        self.assertEqual(list(iter_text_serials(lines)), ['SC-1', 'SC 2', 'SC-3, A'])
+        self.assertEqual(list(iter_serial_batches(['A', 'B', 'C'], batch_size=2)), [['A', 'B'], ['C']])
+
+
+class ParallelImportTests(SimpleTestCase):
+    def workbook(self, rows):
+        sink = io.BytesIO()
+        write_xlsx(sink, ASSET_DATASET, (
+            ['', f'Activo {index}', 'Laptop', f'SN{index:05d}', date(2020, 1, 1) + timedelta(days=index), 'Activo',
+             'Bodega', '', '', '', index % 3, 36, '']
+            for index in range(rows)
+        ))
+        return sink.getvalue()
+
+    def serial(self, data):
+        return list(ASSET_DATASET.parse_rows(read_rows(io.BytesIO(data), ASSET_DATASET, 'xlsx')))
+
+    @mock.patch('FA01.parallel_import.MIN_PARALLEL_ROWS', 10)
+    def test_parallel_parse_matches_serial_parse(self):
+        data = self.workbook(50)
+        with mock.patch('FA01.parallel_import.SheetSplit', wraps=SheetSplit) as split:
+            parsed = parse_xlsx_parallel(data, 'ASSET_DATASET', workers=2)
+        split.assert_called_once()
+        self.assertEqual(parsed, self.serial(data))
+        self.assertEqual([row_number for row_number, _, _ in parsed], list(range(2, 52)))
+
+    @mock.patch('FA01.parallel_import.MIN_PARALLEL_ROWS', 10)
+    def test_falls_back_without_the_openpyxl_parser(self):
+        data = self.workbook(20)
+        with mock.patch('FA01.parallel_import.WorkSheetParser', None), \
+                mock.patch('FA01.parallel_import.ProcessPoolExecutor') as pool:
+            parsed = parse_xlsx_parallel(data, 'ASSET_DATASET', workers=2)
+        pool.assert_not_called()
+        self.assertEqual(parsed, self.serial(data))
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        staging = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, staging)
+        patcher = mock.patch('FA01.uploads.STAGING_DIR', staging)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(User.objects.create_user('subidas'))
+
+    def create(self, size):
+        response = self.client.post(reverse('upload_create'), {'kind': 'image', 'filename': 'foto.jpg', 'size': size})
+        self.assertEqual(response.status_code, 201)
+        return reverse('upload_chunk', args=[response.json()['id']])
+
+    def put(self, url, offset, data):
+        return self.client.put(url, data, content_type='application/octet-stream', headers={'Upload-Offset': str(offset)})
+
+    def test_failed_validation_closes_the_session(self):
+        url = self.create(12)
+        response = self.put(url, 0, b'no es imagen')
+        self.assertEqual(response.status_code, 415)
+
+        # Un reintento no reabre la subida: el cliente consulta el estado y debe detenerse
+        self.assertEqual(self.put(url, 0, b'no es imagen').status_code, 409)
+        state = self.client.get(url).json()
+        self.assertEqual((state['status'], state['offset']), ('failed', 0))
+        self.assertEqual(state['error'], 'El archivo foto.jpg no es una imagen válida')
+
+    def test_resume_from_the_server_offset(self):
+        data = b'\xff\xd8\xff' + b'x' * 9
+        url = self.create(len(data))
+        self.assertEqual(self.put(url, 0, data[:6]).json()['offset'], 6)
+        self.assertEqual(self.put(url, 0, data[:6]).status_code, 409)
+        self.assertEqual(self.client.get(url).json(), {
+            'id': url.rstrip('/').rsplit('/', 1)[1], 'offset': 6, 'size': 12, 'status': 'uploading', 'error': '',
+        })
+        self.assertEqual(self.put(url, 6, data[6:]).json()['status'], 'complete')
+
+
+class ColumnarExportWatermarkTests(TestCase):
+    def test_incremental_export_uses_settled_updated_at(self):
+        now = timezone.now()
+        asset = Asset.objects.create(name='Laptop', serial_number='CX-1', category='laptop')
+        edited = Movement.objects.create(asset=asset, movement='location', notes='antes')
+        recent = Movement.objects.create(asset=asset, movement='location')
+        # Movimiento registrado hace tiempo y editado después de la última exportación
+        Movement.objects.filter(pk=edited.pk).update(
+            movement_date=now - timedelta(days=30), updated_at=now - timedelta(minutes=1), notes='después',
+        )
+        Movement.objects.filter(pk=recent.pk).update(updated_at=now - timedelta(seconds=1))
+
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            export = ColumnarExport('movements', ARROW, since=now - timedelta(days=1))
+        sink = io.BytesIO()
+        export.write(sink)
+        table = pa.ipc.open_file(io.BytesIO(sink.getvalue())).read_all()
+        self.assertEqual(table.column('id').to_pylist(), [edited.pk])
+        self.assertEqual(table.column('notes').to_pylist(), ['después'])
+        self.assertEqual(export.watermark, now - timedelta(minutes=1))
+
+
+class SpecificationParserTests(SimpleTestCase):
+    def test_documented_examples(self):
+        cases = [
+            ('Intel i5, 8GB RAM, 256GB SSD', 'laptop',
+             {'cpu': 'Intel i5', 'ram_gb': 8, 'storage_gb': 256, 'storage_type': 'SSD'}),
+            ('Core i7-1165G7, 16 GB DDR4, 1TB HDD', 'pc',
+             {'cpu': 'Core i7-1165G7', 'ram_gb': 16, 'storage_gb': 1024, 'storage_type': 'HDD'}),
+            ('RAM: 512 MB, disco duro de 1,5 TB', 'server', {'ram_gb': 0.5, 'storage_gb': 1536, 'storage_type': 'HDD'}),
+            ('1.5 kVA', 'nobreak', {'capacity_va': 1500}),
+            ('UPS 800VA', 'nobreak', {'capacity_va': 800}),
+            ('24 pulgadas, Full HD', 'monitor', {'screen_in': 24, 'resolution': '1920x1080'}),
+            ('27" 2560 x 1440', 'monitor', {'screen_in': 27, 'resolution': '2560x1440'}),
+            ('Láser, monocromática', 'printer', {'printer_technology': 'laser', 'color': False}),
+            ('Inyección de tinta color', 'printer', {'printer_technology': 'inkjet', 'color': True}),
+            ('Switch 24 puertos', 'network', {'ports': 24}),
+            ('', 'laptop', {}),
+        ]
+        for text, category, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(parse_specifications(text, category), expected)
+
+    def test_category_whitelist(self):
+        text = 'Intel i5, 8GB RAM, 256GB SSD, 15.6"'
+        self.assertEqual(parse_specifications(text, 'monitor'), {'screen_in': 15.6})
+        self.assertEqual(parse_specifications(text, 'peripheral'), {})
+        self.assertEqual(parse_specifications(text, 'desconocida'), parse_specifications(text, 'other'))
+        self.assertEqual(set(parse_specifications(text, 'laptop')), {'cpu', 'ram_gb', 'storage_gb', 'storage_type', 'screen_in'})
+
+    def test_numeric_keys_only_hold_numbers(self):
+        with mock.patch('FA01.specs.parse_all', return_value={'ram_gb': 'ocho', 'storage_gb': True, 'cpu': 'Intel i5'}):
+            self.assertEqual(parse_specifications('texto sin caché', 'pc'), {'cpu': 'Intel i5'})
+
+    def test_filter_by_specs_parses_parameters(self):
+        _, applied = filter_by_specs(Asset.objects.all(), {'ram_gb_min': '4', 'ram_gb_max': '8,5', 'storage_type': 'SSD'})
+        self.assertEqual(applied, [('ram_gb_min', 4.0), ('ram_gb_max', 8.5), ('specs', '{"storage_type": "SSD"}')])
+
+    def test_filter_by_specs_rejects_invalid_values(self):
+        for params in [
+            {'ram_gb_min': 'ocho'}, {'storage_type': 'cinta'}, {'color': 'quizás'},
+            {'specs': '{no es json'}, {'specs': '[1, 2]'},
+        ]:
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                filter_by_specs(Asset.objects.all(), params)
+
+
+class OuiLookupTests(SimpleTestCase):
+    entries = [
+        (24, 0x001122, 'Bloque MA-L'),
+        (28, 0x0011223, 'Bloque MA-M'),
+        (36, 0x001122334, 'Bloque MA-S'),
+        (24, 0xAABBCC, 'Otro'),
+        (24, 0x00AA00, 'Otro'),
+    ]
+    macs = [
+        '00:11:22:33:44:55', '00-11-22-35-00-01', '001122400000', 'AA:BB:CC:00:00:01', '00:aa:00:12:34:56',
+        'ff:ff:ff:ff:ff:ff', '00:00:00:00:00:00', 'no es mac', '00:11:22:33:44', '', None,
+    ]
+    expected = [
+        'Bloque MA-S', 'Bloque MA-M', 'Bloque MA-L', 'Otro', 'Otro', '', '', '', '', '', '',
+    ]
+
+    def test_lookup_prefers_the_most_specific_prefix(self):
+        database = OuiDatabase(self.entries)
+        self.assertEqual(len(database), 5)
+        self.assertEqual([database.lookup(mac) for mac in self.macs], self.expected)
+
+    def test_lookup_many_matches_lookup(self):
+        database = OuiDatabase(self.entries)
+        self.assertEqual(database.lookup_many(self.macs), self.expected)
+        self.assertEqual(database.lookup_many([]), [])
+        # Tablas vacías (sin bloques MA-S ni MA-M)
+        only_24 = OuiDatabase([entry for entry in self.entries if entry[0] == 24])
+        self.assertEqual(only_24.lookup_many(self.macs), [only_24.lookup(mac) for mac in self.macs])
+        self.assertEqual(OuiDatabase([]).lookup_many(self.macs[:2]), ['', ''])
+
+    def test_load_reads_the_bundled_format(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'oui.tsv.gz')
+            with gzip.open(path, 'wt', encoding='utf-8') as file:
+                file.write('001122\tBloque MA-L\n0011223\tBloque MA-M\n001122334\tBloque MA-S\n')
+            database = OuiDatabase.load(path)
+        self.assertEqual(database.lookup_many(self.macs[:3]), self.expected[:3])
+
+
+class StreamAssetUpsertsTests(TestCase):
+    lines = [
+        '{"serial_number": "N-1", "name": "Uno"}',
+        '{no es json',
+        '{"serial_number": "N-1", "name": "Uno bis"}',
+        '',
+        '{"serial_number": "N-2", "name": "Dos", "location": "Nueva"}',
+        '{"name": "Sin serie"}',
+        '[1, 2]',
+        '{"serial_number": "N-1", "name": "Uno final", "category": "Laptop"}',
+    ]
+
+    def upsert(self, fail_batch=None):
+        original = AssetImportPlan.apply
+        calls = []
+
+        def apply(plan):
+            calls.append(plan)
+            if len(calls) != fail_batch:
+                return original(plan)
+            # Falla al final del lote: lo ya escrito en su transacción debe revertirse
+            with transaction.atomic():
+                original(plan)
+                raise DatabaseError('valor demasiado largo')
+
+        with mock.patch.object(AssetImportPlan, 'apply', autospec=True, side_effect=apply):
+            *results, summary = stream_asset_upserts(self.lines, batch_size=3)
+        return {result['line']: result for result in results}, summary['summary']
+
+    def test_statuses_per_line(self):
+        results, summary = self.upsert()
+        self.assertEqual({line: result['status'] for line, result in results.items()}, {
+            1: 'skipped', 2: 'error', 3: 'created', 5: 'created', 6: 'error', 7: 'error', 8: 'updated',
+        })
+        self.assertEqual(results[1]['error'], 'reemplazada por la línea 3')
+        self.assertTrue(results[2]['error'].startswith('JSON inválido'))
+        self.assertEqual(results[6]['error'], 'falta Número de Serie')
+        self.assertEqual(summary, {'created': 2, 'updated': 1, 'unchanged': 0, 'skipped': 1, 'error': 3})
+        asset = Asset.objects.get(serial_number='N-1')
+        self.assertEqual((asset.name, asset.category), ('Uno final', 'laptop'))
+
+    def test_failed_batch_keeps_earlier_batches(self):
+        results, summary = self.upsert(fail_batch=2)
+        self.assertEqual(results[3]['status'], 'created')
+        self.assertEqual(results[5], {
+            'line': 5, 'serial_number': 'N-2', 'status': 'error', 'error': 'lote no guardado: valor demasiado largo',
+        })
+        self.assertEqual(results[8]['status'], 'updated')
+        self.assertEqual(summary['error'], 4)
+        self.assertEqual(list(Asset.objects.values_list('serial_number', flat=True)), ['N-1'])
+        self.assertFalse(Location.objects.filter(name='Nueva').exists())
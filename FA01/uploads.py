@@ -0,0 +1,134 @@
+import os
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from .models import AssetImage, Responsibility, UploadSession
+
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+READ_BLOCK_SIZE = 64 * 1024
+
+STAGING_DIR = os.path.join(settings.MEDIA_ROOT, 'uploads', 'tmp')
+
+# Firmas (magic bytes) de los formatos de imagen aceptados
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff_image_type(header):
+    """Detecta el tipo de imagen a partir de los primeros bytes del archivo"""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def staging_path(session):
+    return os.path.join(STAGING_DIR, f'{session.pk}.part')
+
+
+def create_session(user, kind, filename, total_size, asset=None):
+    if kind not in dict(UploadSession.KINDS):
+        raise UploadError(f'Tipo de archivo desconocido: {kind}')
+    if total_size <= 0:
+        raise UploadError('El archivo está vacío')
+    if total_size > MAX_UPLOAD_SIZE:
+        raise UploadError(f'El archivo {filename} es demasiado grande (máximo 5MB)', status=413)
+    return UploadSession.objects.create(
+        user=user,
+        asset=asset,
+        kind=kind,
+        filename=os.path.basename(filename)[:255] or 'archivo',
+        total_size=total_size,
+    )
+
+
+def append_chunk(session_id, user, offset, stream):
+    """
+    Escribe en disco la parte recibida a partir de `offset`.
+
+    El offset debe coincidir con lo ya recibido, de modo que un cliente interrumpido
+    consulta el offset actual y reanuda desde ahí. El tipo se valida con la primera parte.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id, user=user)
+        if session.status != 'uploading':
+            raise UploadError('La subida ya fue finalizada', status=409)
+        if offset != session.received_size:
+            raise UploadError(f'Offset esperado: {session.received_size}', status=409)
+
+        os.makedirs(STAGING_DIR, exist_ok=True)
+        written = 0
+        invalid = False
+        with open(staging_path(session), 'r+b' if offset else 'wb') as f:
+            f.seek(offset)
+            f.truncate()
+            while True:
+                block = stream.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                if offset == 0 and written == 0:
+                    session.content_type = sniff_image_type(block[:16]) or ''
+                    if not session.content_type:
+                        invalid = True
+                        break
+                written += len(block)
+                if written > MAX_CHUNK_SIZE or offset + written > session.total_size:
+                    raise UploadError('La parte excede el tamaño declarado', status=413)
+                f.write(block)
+
+        if invalid:
+            session.status = 'failed'
+            session.error = f'El archivo {session.filename} no es una imagen válida'
+        else:
+            session.received_size = offset + written
+            if session.received_size == session.total_size:
+                session.status = 'complete'
+        session.save()
+
+    if session.status == 'failed':
+        discard(session)
+        raise UploadError(session.error, status=415)
+    if session.status == 'complete' and session.asset_id:
+        attach(session, session.asset)
+    return session
+
+
+def discard(session):
+    path = staging_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def attach(session, asset):
+    """Mueve el archivo completo al almacenamiento definitivo y lo asocia al activo"""
+    with open(staging_path(session), 'rb') as f:
+        if session.kind == 'image':
+            attachment = AssetImage(asset=asset)
+            attachment.image.save(session.filename, File(f), save=True)
+        else:
+            attachment = Responsibility(asset=asset)
+            attachment.letter_responsibility.save(session.filename, File(f), save=True)
+    discard(session)
+    session.asset = asset
+    session.status = 'attached'
+    session.save(update_fields=['asset', 'status', 'updated_at'])
+    return attachment
+
+
+def attach_completed(user, asset, session_ids):
+    """Adjunta al activo las subidas completas enviadas junto con el formulario"""
+    sessions = UploadSession.objects.filter(pk__in=session_ids, user=user, status='complete')
+    return [attach(session, asset) for session in sessions]
@@ -1,29 +1,53 @@
 from django.urls import path
 from . import views
-from .views import RegistroDispositivosAPIView, SucursalDispositivosAPIView
+from .views import (
+    RegistroDispositivosAPIView, SucursalDispositivosAPIView, InventoryStateAPIView, ChangesFeedAPIView, AssetBulkAPIView,
+    StocktakeScansAPIView,
+)
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('assets/', views.asset_list, name='asset_list'),
+    path('assets/search/', views.asset_search, name='asset_search'),
     path('assets/<int:pk>/', views.asset_detail, name='asset_detail'),
     path('assets/create/', views.asset_create, name='asset_create'),
     path('assets/<int:pk>/update/', views.asset_update, name='asset_update'),
+    path('assets/archive/', views.archived_asset_list, name='archived_asset_list'),
+    path('assets/archive/<int:pk>/restore/', views.archived_asset_restore, name='archived_asset_restore'),
     path('locations/', views.location_list, name='location_list'),
     path('locations/create/', views.location_create, name='location_create'),
     path('locations/<int:pk>/update/', views.location_update, name='location_update'),
+    path('locations/move/', views.location_move, name='location_move'),
     path('locations/export/', views.export_locations_excel, name='export_locations_excel'),
     path('locations/import/', views.import_locations_excel, name='import_locations_excel'),
     path('movements/create/', views.movement_create, name='movement_create'),
+    path('stocktakes/', views.stocktake_list, name='stocktake_list'),
+    path('stocktakes/<int:pk>/', views.stocktake_detail, name='stocktake_detail'),
+    path('stocktakes/<int:pk>/close/', views.stocktake_close, name='stocktake_close'),
     path('profile/', views.user_profile, name='user_profile'),
     path('assets/export/', views.export_assets_excel, name='export_assets_excel'),
     path('assets/template/', views.export_assets_template, name='export_assets_template'),
+    path('export/columnar/<str:dataset>/', views.export_columnar, name='export_columnar'),
+    path('reports/lifecycle/', views.lifecycle_report, name='lifecycle_report'),
+    path('reports/lifecycle/csv/', views.lifecycle_report_csv, name='lifecycle_report_csv'),
     path('assets/import/', views.import_assets_excel, name='import_assets_excel'),
+    path('assets/import/apply/', views.import_assets_apply, name='import_assets_apply'),
+    path('uploads/', views.upload_create, name='upload_create'),
+    path('uploads/<uuid:upload_id>/', views.upload_chunk, name='upload_chunk'),
     path('assets/image/<int:image_id>/delete/', views.delete_asset_image, name='delete_asset_image'),
     path('logout/', views.custom_logout, name='logout'),
     path('network-scan/', views.network_scan, name='network_scan'),
+    path('network-scan/stream/', views.network_scan_stream, name='network_scan_stream'),
     path('network-devices/', views.network_devices, name='network_devices'),
+    path('network-devices/stream/', views.network_devices_stream, name='network_devices_stream'),
     path('add-network-device/', views.add_network_device, name='add_network_device'),
+    path('network-devices/reconciliation/', views.device_reconciliation, name='device_reconciliation'),
     path('api/registro/', RegistroDispositivosAPIView.as_view(), name='api_registro'),
     path('api/sucursal/<str:codigo>/', SucursalDispositivosAPIView.as_view(), name='api_sucursal_dispositivos'),
+    path('api/changes/<str:resource>/', ChangesFeedAPIView.as_view(), name='api_changes'),
+    path('api/assets/bulk/', AssetBulkAPIView.as_view(), name='api_assets_bulk'),
+    path('api/stocktakes/<int:pk>/scans/', StocktakeScansAPIView.as_view(), name='api_stocktake_scans'),
+    path('api/inventory-state/', InventoryStateAPIView.as_view(), name='api_inventory_state'),
+    path('assets/history/export/', views.export_inventory_state_excel, name='export_inventory_state_excel'),
     path('assets/letter_responsibility/<int:image_id>/delete/', views.delete_asset_letter_responsibility, name='delete_asset_letter_responsibility'),
 ]
\ No newline at end of file
@@ -3,25 +3,69 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.db.models import Q
-from .models import Asset, Location, Movement, UserProfile, Sucursal, DispositivoSucursal, AssetImage, Responsibility
+from django.db.models import Count, F, Q
+from .models import (
+    Asset, Location, Movement, UserProfile, Sucursal, DispositivoSucursal, AssetImage, Responsibility, UploadSession,
+    ArchivedAsset, StocktakeSession,
+)
 from django.utils import timezone
 import csv
-from django.http import HttpResponse, JsonResponse
-from openpyxl import Workbook, load_workbook
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill
-from datetime import datetime
-import nmap
+from datetime import datetime, timedelta
+import numpy as np
 from django.views.decorators.csrf import csrf_exempt
-from .network_scanner import NetworkScanner
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_http_methods
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from .serializers import DispositivoSucursalSerializer, SucursalSerializer
 from django.contrib.auth import logout
+from django.utils.dateparse import parse_date, parse_datetime
+from django.core.cache import cache
+from django.core.files.storage import InvalidStorageError
+from .archive import ARCHIVED_STATUSES, RestoreError, restore_assets
+from .history import inventory_state_at
+from .locations import location_tree, move_locations, rolled_up_counts, subtree_asset_counts
+from .specs import BOOLEAN, NUMBER, filter_by_specs, spec_filters
+from .columnar_export import ColumnarExport, DATASETS, PARQUET
+from .changes import RESOURCES, DEFAULT_LIMIT, InvalidCursor, get_changes
+from . import uploads
+from .tabular import BULK_BATCH_SIZE, NDJSON_CONTENT_TYPE, WRITERS, ImportReport, export_response, measure_widths, read_rows
+from .datasets import (
+    ASSET_DATASET, ASSET_TEMPLATE_ROWS, LOCATION_DATASET, AssetImportPlan, import_locations,
+    asset_api_rows, display_change, plan_asset_import, stream_asset_upserts,
+)
+from .discovery import iter_device_events, new_scanner
+from .media import media_response
+from .oui import vendors_for
+from .stocktake import (
+    RESULT_LABELS, close_session, iter_serial_batches, iter_text_serials, open_session, record_scans, serial_key,
+    stocktake_entries, stocktake_summary,
+)
+from .reconciliation import (
+    MISSING_AFTER_DAYS, UNKNOWN_VALUES, AssetIndex, missing_assets, normalize_ip, normalize_mac,
+    reconcile, unknown_devices,
+)
+from .lifecycle import (
+    LifecycleArrays, WARRANTY_LABELS, compute_lifecycle, replacement_forecast, upcoming_quarters,
+)
+import contextlib
+from collections import Counter
+import hashlib
+import ipaddress
+import json
+import itertools
 import logging
 import os
+import time
+import uuid
 
 
 logger = logging.getLogger(__name__)
@@ -42,6 +86,62 @@ def index(request):
     }
     return render(request, 'FA01/index.html', context)
 
+ASSET_LIST_END_OF_LIFE = [
+    ('soon', 'Próximo a fin de vida'),
+    ('ok', 'Dentro del período de uso'),
+]
+
+ASSET_LIST_WARRANTY = [
+    ('expired', 'Garantía vencida'),
+    ('expiring', 'Garantía por vencer'),
+    ('active', 'Garantía vigente'),
+    ('none', 'Sin garantía'),
+]
+
+ASSET_LIST_SORTS = {
+    'end_of_life_date': 'Fin de vida (más próximo)',
+    '-end_of_life_date': 'Fin de vida (más lejano)',
+    'warranty_expiration': 'Garantía (vence primero)',
+    '-warranty_expiration': 'Garantía (vence al final)',
+}
+
+ASSET_LIST_SPEC_BOOLEAN = [('si', 'Sí'), ('no', 'No')]
+
+# Filtros con conteo por opción; el resto (q, fin de vida, garantía, especificaciones) acota el conjunto contado
+ASSET_LIST_FACETS = ('category', 'status', 'location_id')
+ASSET_FACETS_CACHE_TIMEOUT = 30
+
+def asset_list_facets(assets, signature, selected):
+    """
+    Conteos por categoría, estado y ubicación de los activos que cumplen los filtros.
+
+    Cada faceta se cuenta con los filtros de las otras dos, no con el suyo: así una opción
+    muestra cuántos activos quedarían al cambiar la selección actual. Los conteos salen de un
+    solo GROUP BY sobre las tres columnas, que solo depende de los filtros que no son facetas
+    y se guarda en caché unos segundos por esa combinación.
+
+    `selected` indica para cada faceta los valores aceptados (para la ubicación, los ids de su
+    subárbol) o None si no se filtra por ella.
+    """
+    cache_key = 'asset_facets:' + hashlib.md5(json.dumps(signature).encode()).hexdigest()
+    groups = cache.get(cache_key)
+    if groups is None:
+        groups = list(
+            assets.order_by().values_list(*ASSET_LIST_FACETS).annotate(total=Count('id'))
+        )
+        cache.set(cache_key, groups, ASSET_FACETS_CACHE_TIMEOUT)
+
+    counts = {facet: {} for facet in ASSET_LIST_FACETS}
+    for *values, total in groups:
+        values = dict(zip(ASSET_LIST_FACETS, values))
+        for facet in ASSET_LIST_FACETS:
+            if all(
+                selected[other] is None or values[other] in selected[other]
+                for other in ASSET_LIST_FACETS if other != facet
+            ):
+                counts[facet][values[facet]] = counts[facet].get(values[facet], 0) + total
+    return counts
+
 @login_required
 def asset_list(request):
     """Lista todos los activos con opciones de filtrado"""
@@ -56,21 +156,88 @@ def asset_list(request):
             Q(name__icontains=query) |
             Q(serial_number__icontains=query)
         )
-    
+
+    # Filtros sobre las columnas indexadas end_of_life_date y warranty_expiration
+    today = timezone.now().date()
+    end_of_life = request.GET.get('end_of_life')
+    if end_of_life == 'soon':
+        assets = assets.filter(end_of_life_date__lt=Asset.end_of_life_soon_cutoff(today))
+    elif end_of_life == 'ok':
+        assets = assets.filter(end_of_life_date__gte=Asset.end_of_life_soon_cutoff(today))
+
+    warranty = request.GET.get('warranty')
+    warning_date = today + timedelta(days=Asset.WARRANTY_WARNING_DAYS)
+    if warranty == 'expired':
+        assets = assets.filter(warranty_expiration__lt=today)
+    elif warranty == 'expiring':
+        assets = assets.filter(warranty_expiration__gte=today, warranty_expiration__lte=warning_date)
+    elif warranty == 'active':
+        assets = assets.filter(warranty_expiration__gt=warning_date)
+    elif warranty == 'none':
+        assets = assets.filter(warranty_expiration__isnull=True)
+
+    # Especificaciones estructuradas: rangos (ram_gb_max=8) y contención (storage_type=HDD) sobre specs
+    try:
+        assets, applied_specs = filter_by_specs(assets, request.GET)
+    except ValueError as e:
+        messages.warning(request, f'Filtro de especificaciones ignorado: {e}')
+        applied_specs = []
+
+    # Filtrar por una ubicación incluye sus sububicaciones: un rango sobre la ruta materializada
+    location_tree_rows = location_tree(Location.objects.only('id', 'name', 'parent', 'path'))
+    paths = {node.pk: node.path for node, _ in location_tree_rows}
+    location_path = paths.get(int(location)) if location and location.isdigit() else None
+    facets = asset_list_facets(
+        assets,
+        [(query or '').upper(), end_of_life, warranty, today.isoformat(), applied_specs],
+        {
+            'category': {category} if category else None,
+            'status': {status} if status else None,
+            'location_id': (
+                {pk for pk, path in paths.items() if path.startswith(location_path)} if location_path else None
+            ),
+        },
+    )
+    location_counts = rolled_up_counts(facets['location_id'], paths)
+
     if category:
         assets = assets.filter(category=category)
     
     if status:
         assets = assets.filter(status=status)
 
-    if location:
-        assets = assets.filter(location_id=location)
+    if location_path:
+        assets = assets.filter(location__path__startswith=location_path)
+
+    sort = request.GET.get('sort')
+    if sort in ASSET_LIST_SORTS:
+        field = sort.lstrip('-')
+        order = F(field).desc(nulls_last=True) if sort.startswith('-') else F(field).asc(nulls_last=True)
+        assets = assets.order_by(order, 'id')
 
     context = {
-        'assets': assets,
-        'categories': Asset.CATEGORIES,
-        'status_choices': Asset.STATUS_CHOICES,
-        'locations': Location.objects.all(),
+        'assets': assets.select_related('location', 'assigned_to'),
+        'categories': [
+            (value, label, facets['category'].get(value, 0)) for value, label in Asset.CATEGORIES
+        ],
+        'status_choices': [
+            (value, label, facets['status'].get(value, 0)) for value, label in Asset.STATUS_CHOICES
+        ],
+        'locations': [
+            (str(node.pk), '— ' * depth + node.name, location_counts.get(node.pk, 0))
+            for node, depth in location_tree_rows
+        ],
+        'end_of_life_choices': ASSET_LIST_END_OF_LIFE,
+        'warranty_choices': ASSET_LIST_WARRANTY,
+        'sort_choices': ASSET_LIST_SORTS.items(),
+        'spec_ranges': [
+            (field, request.GET.get(f'{field.key}_min', ''), request.GET.get(f'{field.key}_max', ''))
+            for field in spec_filters() if field.kind == NUMBER
+        ],
+        'spec_choices': [
+            (field, ASSET_LIST_SPEC_BOOLEAN if field.kind == BOOLEAN else field.choices, request.GET.get(field.key, ''))
+            for field in spec_filters() if field.kind != NUMBER
+        ],
     }
     return render(request, 'FA01/asset_list.html', context)
 
@@ -104,7 +271,10 @@ def asset_create(request):
                 specifications=request.POST.get('specifications', ''),
                 quantity=int(request.POST.get('quantity', 1)),
                 preferred_usage_period=int(request.POST.get('preferred_usage_period', 36)),
-                notes=request.POST.get('notes', '')
+                notes=request.POST.get('notes', ''),
+                mac_address=normalize_mac(request.POST.get('mac_address', '')),
+                hostname=request.POST.get('hostname', '').strip(),
+                ip_address=normalize_ip(request.POST.get('ip_address', '')) or None,
             )
             
             # Asignar ubicación si se proporcionó
@@ -161,6 +331,9 @@ def asset_create(request):
                     except Exception as resp_e:
                         messages.error(request, f'Error al subir la responsiva {resp_file.name}: {str(resp_e)}')
             
+            # Adjuntar los archivos subidos previamente por partes
+            attach_uploaded_files(request, asset)
+            
             # Registrar el movimiento inicial
             if location_id:
                 Movement.objects.create(
@@ -224,6 +397,12 @@ def asset_update(request, pk):
                 asset.preferred_usage_period = int(request.POST.get('preferred_usage_period', asset.preferred_usage_period))
             if request.POST.get('notes') is not None:
                 asset.notes = request.POST.get('notes', asset.notes)
+            if request.POST.get('mac_address') is not None:
+                asset.mac_address = normalize_mac(request.POST['mac_address'])
+            if request.POST.get('hostname') is not None:
+                asset.hostname = request.POST['hostname'].strip()
+            if request.POST.get('ip_address') is not None:
+                asset.ip_address = normalize_ip(request.POST['ip_address']) or None
 
             # Actualizar ubicación
             location_id = request.POST.get('location')
@@ -294,6 +473,9 @@ def asset_update(request, pk):
                     except Exception as resp_e:
                         messages.error(request, f'Error al subir la responsiva {resp_file.name}: {str(resp_e)}')
 
+            # Adjuntar los archivos subidos previamente por partes
+            attach_uploaded_files(request, asset)
+
             # Actualizar fecha de vencimiento de garantía
             warranty_expiration = request.POST.get('warranty_expiration')
             if warranty_expiration:
@@ -314,16 +496,88 @@ def asset_update(request, pk):
     }
     return render(request, 'FA01/asset_form.html', context)
 
+def attach_uploaded_files(request, asset):
+    """Adjunta al activo las subidas por partes indicadas en upload_ids"""
+    session_ids = []
+    for value in request.POST.getlist('upload_ids'):
+        try:
+            session_ids.append(uuid.UUID(value))
+        except ValueError:
+            continue
+    if not session_ids:
+        return
+    try:
+        uploads.attach_completed(request.user, asset, session_ids)
+    except Exception as e:
+        messages.error(request, f'Error al adjuntar los archivos: {str(e)}')
+
+@login_required
+@require_POST
+def upload_create(request):
+    """Inicia una subida por partes de una imagen o responsiva"""
+    try:
+        asset = None
+        if request.POST.get('asset'):
+            asset = get_object_or_404(Asset, pk=request.POST['asset'])
+        session = uploads.create_session(
+            request.user,
+            request.POST.get('kind', ''),
+            request.POST.get('filename', ''),
+            int(request.POST.get('size', 0)),
+            asset=asset,
+        )
+    except uploads.UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    except ValueError:
+        return JsonResponse({'error': 'Tamaño inválido'}, status=400)
+    return JsonResponse({
+        'id': str(session.pk),
+        'offset': 0,
+        'chunk_size': uploads.MAX_CHUNK_SIZE,
+    }, status=201)
+
+@login_required
+@require_http_methods(['GET', 'PUT'])
+def upload_chunk(request, upload_id):
+    """Consulta el avance de una subida (GET) o recibe la siguiente parte (PUT)"""
+    if request.method == 'GET':
+        session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    else:
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            session = uploads.append_chunk(upload_id, request.user, offset, request)
+        except UploadSession.DoesNotExist:
+            return JsonResponse({'error': 'Subida no encontrada'}, status=404)
+        except uploads.UploadError as e:
+            return JsonResponse({'error': str(e)}, status=e.status)
+        except ValueError:
+            return JsonResponse({'error': 'Encabezado Upload-Offset inválido'}, status=400)
+    return JsonResponse({
+        'id': str(session.pk),
+        'offset': session.received_size,
+        'size': session.total_size,
+        'status': session.status,
+        'error': session.error,
+    })
+
 @login_required
 def location_list(request):
-    """Lista todas las ubicaciones"""
-    locations = Location.objects.all()
+    """Lista las ubicaciones en orden de árbol con los activos de cada subárbol"""
+    counts = subtree_asset_counts()
     context = {
-        'locations': locations,
+        # (ubicación, nombre con sangría según la profundidad, activos del subárbol)
+        'locations': [
+            (location, '— ' * depth + location.name, counts.get(location.pk, 0))
+            for location, depth in location_tree(Location.objects.select_related('parent'))
+        ],
         'location_types': Location.LOCATION_TYPES,
     }
     return render(request, 'FA01/location_list.html', context)
 
+def parent_location_from(request):
+    parent_id = request.POST.get('parent')
+    return Location.objects.get(id=parent_id) if parent_id else None
+
 @login_required
 def location_create(request):
     """Crea una nueva ubicación"""
@@ -332,7 +586,8 @@ def location_create(request):
             location = Location(
                 name=request.POST['name'],
                 location_type=request.POST['location_type'],
-                description=request.POST.get('description', '')
+                description=request.POST.get('description', ''),
+                parent=parent_location_from(request),
             )
             location.save()
             messages.success(request, 'Ubicación creada exitosamente')
@@ -349,12 +604,28 @@ def location_update(request, pk):
             location.name = request.POST['name']
             location.location_type = request.POST['location_type']
             location.description = request.POST.get('description', '')
+            location.parent = parent_location_from(request)
             location.save()
             messages.success(request, 'Ubicación actualizada exitosamente')
         except Exception as e:
             messages.error(request, f'Error al actualizar la ubicación: {str(e)}')
     return redirect('location_list')
 
+@login_required
+@require_POST
+def location_move(request):
+    """Mueve varias ubicaciones, con sus sububicaciones, bajo otra ubicación o a la raíz"""
+    try:
+        locations = list(Location.objects.filter(id__in=request.POST.getlist('locations')))
+        if not locations:
+            messages.warning(request, 'Seleccione al menos una ubicación')
+            return redirect('location_list')
+        moved = move_locations(locations, parent_location_from(request))
+        messages.success(request, f'{moved} ubicaciones movidas')
+    except Exception as e:
+        messages.error(request, f'Error al mover las ubicaciones: {str(e)}')
+    return redirect('location_list')
+
 @login_required
 def movement_create(request):
     """Registra un nuevo movimiento de activo"""
@@ -405,13 +676,120 @@ def movement_create(request):
             return redirect('asset_detail', pk=asset.pk)
         except Exception as e:
             messages.error(request, f'Error al registrar el movimiento: {str(e)}')
+    # El activo se elige con el buscador (asset_search); solo se carga el preseleccionado
+    selected_asset = None
+    selected_asset_id = request.GET.get('asset')
+    if selected_asset_id and selected_asset_id.isdigit():
+        selected_asset = Asset.objects.filter(id=selected_asset_id).only('id', 'name', 'serial_number').first()
     context = {
-        'assets': Asset.objects.all(),
-        'locations': Location.objects.all(),
+        'selected_asset': selected_asset,
+        'locations': Location.objects.only('id', 'name').order_by('name'),
         'movement_types': Movement.MOVEMENT_TYPES,
     }
     return render(request, 'FA01/movement_form.html', context)
 
+ASSET_SEARCH_LIMIT = 20
+ASSET_SEARCH_CACHE_TIMEOUT = 60
+
+@login_required
+def asset_search(request):
+    """Búsqueda de activos por nombre o número de serie para el autocompletado"""
+    query = request.GET.get('q', '').strip()
+    if len(query) < 2:
+        return JsonResponse({'results': []})
+
+    cache_key = 'asset_search:' + hashlib.md5(query.upper().encode()).hexdigest()
+    results = cache.get(cache_key)
+    if results is None:
+        assets = Asset.objects.filter(
+            Q(name__icontains=query) |
+            Q(serial_number__icontains=query)
+        ).order_by('name', 'id').values('id', 'name', 'serial_number')[:ASSET_SEARCH_LIMIT]
+        results = list(assets)
+        cache.set(cache_key, results, ASSET_SEARCH_CACHE_TIMEOUT)
+    return JsonResponse({'results': results})
+
+ARCHIVE_LIST_LIMIT = 200
+
+@login_required
+def archived_asset_list(request):
+    """Activos retirados o perdidos que se sacaron del inventario con archive_assets"""
+    archived = ArchivedAsset.objects.defer('data', 'related').select_related('location')
+    query = request.GET.get('q', '').strip()
+    status = request.GET.get('status')
+    if query:
+        archived = archived.filter(Q(name__icontains=query) | Q(serial_number__icontains=query))
+    if status:
+        archived = archived.filter(status=status)
+    archived = archived.order_by('-archived_at', '-id')
+    return render(request, 'FA01/archived_asset_list.html', {
+        'archived_assets': archived[:ARCHIVE_LIST_LIMIT],
+        'archived_count': archived.count(),
+        'status_choices': [choice for choice in Asset.STATUS_CHOICES if choice[0] in ARCHIVED_STATUSES],
+        'list_limit': ARCHIVE_LIST_LIMIT,
+    })
+
+@login_required
+@require_POST
+def archived_asset_restore(request, pk):
+    """Devuelve un activo archivado al inventario"""
+    archived = get_object_or_404(ArchivedAsset, pk=pk)
+    try:
+        restore_assets([archived])
+    except (RestoreError, InvalidStorageError) as e:
+        messages.error(request, f'No se pudo restaurar el activo: {e}')
+        return redirect('archived_asset_list')
+    messages.success(request, f'Activo {archived.name} restaurado al inventario')
+    return redirect('asset_detail', pk=archived.asset_id)
+
+STOCKTAKE_LIST_LIMIT = 200
+
+@login_required
+def stocktake_list(request):
+    """Inventarios físicos abiertos y cerrados; POST abre uno nuevo para una ubicación"""
+    if request.method == 'POST':
+        try:
+            location = Location.objects.get(id=request.POST['location'])
+            session = open_session(location, request.user, include_sublocations=bool(request.POST.get('include_sublocations')))
+            return redirect('stocktake_detail', pk=session.pk)
+        except Exception as e:
+            messages.error(request, f'Error al abrir el inventario: {str(e)}')
+            return redirect('stocktake_list')
+
+    return render(request, 'FA01/stocktake_list.html', {
+        'sessions': StocktakeSession.objects.select_related('location', 'opened_by').order_by('-opened_at')[:STOCKTAKE_LIST_LIMIT],
+        'locations': [
+            (location.pk, '— ' * depth + location.name)
+            for location, depth in location_tree(Location.objects.only('id', 'name', 'parent', 'path'))
+        ],
+    })
+
+@login_required
+def stocktake_detail(request, pk):
+    """Resultado de un inventario físico y captura de las lecturas"""
+    session = get_object_or_404(StocktakeSession.objects.select_related('location'), pk=pk)
+    result = request.GET.get('result')
+    if result not in RESULT_LABELS:
+        result = 'missing'
+    entries = stocktake_entries(session, result).select_related('location').order_by('serial_key')
+    summary = stocktake_summary(session)
+    return render(request, 'FA01/stocktake_detail.html', {
+        'session': session,
+        'summary': [(key, label, summary[key]) for key, label in RESULT_LABELS.items()],
+        'result': result,
+        'result_count': summary[result],
+        'entries': entries[:STOCKTAKE_LIST_LIMIT],
+        'list_limit': STOCKTAKE_LIST_LIMIT,
+    })
+
+@login_required
+@require_POST
+def stocktake_close(request, pk):
+    session = get_object_or_404(StocktakeSession, pk=pk)
+    close_session(session)
+    messages.success(request, 'Inventario cerrado')
+    return redirect('stocktake_detail', pk=pk)
+
 @login_required
 def user_profile(request):
     """Muestra y permite editar el perfil del usuario"""
@@ -434,266 +812,189 @@ def user_profile(request):
 
 @login_required
 def export_assets_excel(request):
-    """Export assets to Excel file"""
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-    )
-    response['Content-Disposition'] = f'attachment; filename=inventario_{datetime.now().strftime("%Y%m%d")}.xlsx'
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Inventario"
-
-    # Define headers
-    headers = [
-        'ID', 'Nombre', 'Categoría', 'Número de Serie', 'Fecha de Compra',
-        'Estado', 'Ubicación', 'Responsable', 'Descripción', 'Especificaciones',
-        'Cantidad', 'Período de Uso Preferente', 'Vencimiento de Garantía'
-    ]
-
-    # Style for headers
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-    # Write headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-
-    # Write data
+    """Export assets to Excel file (or CSV / JSON Lines with ?format=)"""
+    fmt = request.GET.get('format', 'xlsx')
+    if fmt not in WRITERS:
+        return HttpResponse(status=400)
     assets = Asset.objects.all()
-    for row, asset in enumerate(assets, 2):
-        ws.cell(row=row, column=1, value=asset.id)
-        ws.cell(row=row, column=2, value=asset.name)
-        ws.cell(row=row, column=3, value=asset.get_category_display())
-        ws.cell(row=row, column=4, value=asset.serial_number)
-        ws.cell(row=row, column=5, value=asset.purchase_date.strftime('%d/%m/%Y') if asset.purchase_date else '')
-        ws.cell(row=row, column=6, value=asset.get_status_display())
-        ws.cell(row=row, column=7, value=asset.location.name if asset.location else '')
-        ws.cell(row=row, column=8, value=asset.assigned_to.username if asset.assigned_to else '')
-        ws.cell(row=row, column=9, value=asset.description)
-        ws.cell(row=row, column=10, value=asset.specifications)
-        ws.cell(row=row, column=11, value=asset.quantity)
-        ws.cell(row=row, column=12, value=asset.preferred_usage_period)
-        ws.cell(row=row, column=13, value=asset.warranty_expiration.strftime('%d/%m/%Y') if asset.warranty_expiration else '')
-
-    # Adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column = [cell for cell in column]
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column[0].column_letter].width = adjusted_width
-
-    wb.save(response)
-    return response
+    widths = ASSET_DATASET.column_widths(assets) if fmt == 'xlsx' else None
+    rows = ASSET_DATASET.export_rows(ASSET_DATASET.export_values(assets))
+    return export_response(ASSET_DATASET, fmt, rows, f'inventario_{datetime.now().strftime("%Y%m%d")}', widths)
 
 @login_required
 def export_assets_template(request):
     """Export assets template Excel file"""
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    fmt = request.GET.get('format', 'xlsx')
+    if fmt not in WRITERS:
+        return HttpResponse(status=400)
+    return export_response(
+        ASSET_DATASET, fmt, ASSET_TEMPLATE_ROWS, f'plantilla_activos_{datetime.now().strftime("%Y%m%d")}',
+        measure_widths(ASSET_DATASET.headers, ASSET_TEMPLATE_ROWS), title='Plantilla Activos',
     )
-    response['Content-Disposition'] = f'attachment; filename=plantilla_activos_{datetime.now().strftime("%Y%m%d")}.xlsx'
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Plantilla Activos"
+@login_required
+def export_columnar(request, dataset):
+    """Exporta un dataset en formato columnar (Parquet o Arrow IPC) para análisis"""
+    if dataset not in DATASETS:
+        return JsonResponse({'error': f'Dataset desconocido: {dataset}'}, status=404)
+
+    since = None
+    if request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return JsonResponse({'error': 'Parámetro since inválido'}, status=400)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
 
-    # Define headers
-    headers = [
-        'ID', 'Nombre', 'Categoría', 'Número de Serie', 'Fecha de Compra',
-        'Estado', 'Ubicación', 'Responsable', 'Descripción', 'Especificaciones',
-        'Cantidad', 'Período de Uso Preferente', 'Vencimiento de Garantía'
-    ]
+    try:
+        export = ColumnarExport(dataset, request.GET.get('format', PARQUET), since)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-    # Style for headers
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    response = StreamingHttpResponse(export.stream(), content_type=export.content_type)
+    response['Content-Disposition'] = f'attachment; filename={export.filename}'
+    return response
 
-    # Write headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
+# Los activos dados de baja o perdidos no participan en el análisis de ciclo de vida
+LIFECYCLE_EXCLUDED_STATUS = ['retired', 'lost']
+
+@login_required
+def lifecycle_report(request):
+    """Reporte de ciclo de vida: fin de vida por trimestre, ubicación y categoría, y estado de garantías"""
+    arrays = LifecycleArrays.from_queryset(Asset.objects.exclude(status__in=LIFECYCLE_EXCLUDED_STATUS))
+    metrics = compute_lifecycle(arrays)
+    quarters = upcoming_quarters()
+    forecast = replacement_forecast(arrays, metrics, quarters=len(quarters))
+
+    category_labels = dict(Asset.CATEGORIES)
+    location_names = dict(Location.objects.values_list('id', 'name'))
+    by_category = {}
+    by_location = {}
+    for row in forecast:
+        category = category_labels.get(row['category'], row['category'])
+        location = location_names.get(row['location_id'], 'Sin ubicación')
+        by_category.setdefault(category, dict.fromkeys(quarters, 0))[row['quarter']] += row['count']
+        by_location.setdefault(location, dict.fromkeys(quarters, 0))[row['quarter']] += row['count']
+
+    warranty_counts = dict.fromkeys(WARRANTY_LABELS, 0)
+    statuses, counts = np.unique(metrics['warranty_status'].astype(str), return_counts=True)
+    warranty_counts.update(zip(statuses.tolist(), counts.tolist()))
+
+    ages = metrics['age'][metrics['has_purchase']]
+    context = {
+        'total_assets': len(arrays),
+        'nearing_end_of_life': int(metrics['nearing_end_of_life'].sum()),
+        'average_age': round(float(ages.mean()), 1) if len(ages) else 0,
+        'warranty': [(WARRANTY_LABELS[key], count) for key, count in warranty_counts.items()],
+        'quarters': quarters,
+        'by_category': sorted((label, list(values.values())) for label, values in by_category.items()),
+        'by_location': sorted((label, list(values.values())) for label, values in by_location.items()),
+    }
+    return render(request, 'FA01/lifecycle_report.html', context)
+
+class Echo:
+    """Pseudo-buffer para escribir el CSV directamente en la respuesta"""
+    def write(self, value):
+        return value
 
-    # Write example data
-    example_data = [
-        ['', 'Laptop Dell Inspiron', 'Laptop', 'DELL123456', '15/01/2023', 'Activo', 'Oficina Principal', 'Juan Pérez', 'Laptop para desarrollo', 'Intel i5, 8GB RAM, 256GB SSD', 1, 36, '15/01/2026'],
-        ['', 'Monitor HP 24"', 'Monitor', 'HP789012', '20/02/2023', 'En Uso', 'Sala de Reuniones', 'María García', 'Monitor para presentaciones', '24 pulgadas, Full HD', 1, 48, '20/02/2026'],
-        ['', 'Impresora HP LaserJet', 'Impresora', 'HP345678', '10/03/2023', 'Activo', 'Recepción', 'Carlos López', 'Impresora principal', 'Láser, monocromática', 1, 60, '10/03/2026'],
+@login_required
+def lifecycle_report_csv(request):
+    """Exporta a CSV las métricas de ciclo de vida de cada activo"""
+    arrays = LifecycleArrays.from_queryset(Asset.objects.exclude(status__in=LIFECYCLE_EXCLUDED_STATUS))
+    metrics = compute_lifecycle(arrays)
+    end_of_life = np.where(metrics['has_purchase'], metrics['end_of_life_month'].astype(str), '')
+    category_labels = dict(Asset.CATEGORIES)
+    columns = zip(
+        arrays.ids.tolist(),
+        arrays.serial_number.tolist(),
+        [category_labels.get(category, category) for category in arrays.category.tolist()],
+        metrics['age'].tolist(),
+        metrics['months_since_purchase'].tolist(),
+        metrics['remaining_months'].tolist(),
+        end_of_life.tolist(),
+        np.where(metrics['nearing_end_of_life'], 'Sí', 'No').tolist(),
+        metrics['warranty_days_left'].tolist(),
+        [WARRANTY_LABELS[status] for status in metrics['warranty_status'].tolist()],
+    )
+    headers = [
+        'ID', 'Número de Serie', 'Categoría', 'Edad (años)', 'Meses de Uso', 'Vida Restante (meses)',
+        'Fin de Vida', 'Próximo a Fin de Vida', 'Días de Garantía', 'Estado de Garantía',
     ]
+    writer = csv.writer(Echo())
+    rows = (writer.writerow(row) for row in itertools.chain([headers], columns))
+    response = StreamingHttpResponse(rows, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename=ciclo_de_vida_{datetime.now().strftime("%Y%m%d")}.csv'
+    return response
 
-    for row, data in enumerate(example_data, 2):
-        for col, value in enumerate(data, 1):
-            ws.cell(row=row, column=col, value=value)
+IMPORT_PREVIEW_TIMEOUT = 30 * 60
+IMPORT_PREVIEW_ROWS = 500
 
-    # Adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column = [cell for cell in column]
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column[0].column_letter].width = adjusted_width
 
-    wb.save(response)
-    return response
+def import_report_messages(request, report):
+    messages.success(
+        request,
+        f'Archivo importado exitosamente: {report.created} activos creados, {report.updated} actualizados, '
+        f'{report.unchanged} sin cambios',
+    )
+    if report.errors:
+        messages.warning(request, 'Filas con observaciones: ' + '; '.join(report.error_lines()))
 
 @login_required
 def import_assets_excel(request):
-    """Import assets from Excel file"""
+    """Import assets from Excel, CSV or JSON Lines file, optionally previewing the changes first"""
     if request.method == 'POST' and request.FILES.get('excel_file'):
         try:
             excel_file = request.FILES['excel_file']
-            wb = load_workbook(excel_file)
-            ws = wb.active
-
-            # Skip header row
-            for row in ws.iter_rows(min_row=2):
-                # Validar que tenemos datos mínimos
-                if not row[1].value or not row[3].value:  # name y serial_number son obligatorios
-                    continue
-                
-                # Procesar fecha de compra
-                purchase_date = None
-                if row[4].value:
-                    if isinstance(row[4].value, str):
-                        try:
-                            # Intentar parsear diferentes formatos de fecha
-                            for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d']:
-                                try:
-                                    purchase_date = datetime.strptime(row[4].value, fmt).date()
-                                    break
-                                except ValueError:
-                                    continue
-                        except:
-                            purchase_date = None
-                    elif hasattr(row[4].value, 'date'):
-                        purchase_date = row[4].value.date()
-                
-                # Procesar fecha de vencimiento de garantía
-                warranty_expiration = None
-                if row[12].value:  # Cambiado de 11 a 12
-                    if isinstance(row[12].value, str):
-                        try:
-                            from datetime import datetime
-                            for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d']:
-                                try:
-                                    warranty_expiration = datetime.strptime(row[12].value, fmt).date()
-                                    break
-                                except ValueError:
-                                    continue
-                        except:
-                            warranty_expiration = None
-                    elif hasattr(row[12].value, 'date'):
-                        warranty_expiration = row[12].value.date()
-                
-                # Mapear categoría
-                category_mapping = {
-                    'PC': 'pc',
-                    'Laptop': 'laptop', 
-                    'Monitor': 'monitor',
-                    'Nobreak': 'nobreak',
-                    'Impresora': 'printer',
-                    'Equipo de Red': 'network',
-                    'Periférico': 'peripheral',
-                    'Servidor': 'server',
-                    'Otro': 'other'
-                }
-                
-                category = 'other'  # default
-                if row[2].value:
-                    category_display = str(row[2].value).strip()
-                    category = category_mapping.get(category_display, 'other')
-                
-                # Mapear estado
-                status_mapping = {
-                    'Activo': 'active',
-                    'En Uso': 'in_use',
-                    'En Mantenimiento': 'maintenance',
-                    'En Reparación': 'repair',
-                    'Retirado': 'retired',
-                    'Perdido': 'lost'
-                }
-                
-                status = 'active'  # default
-                if row[5].value:
-                    status_display = str(row[5].value).strip()
-                    status = status_mapping.get(status_display, 'active')
-                
-                # Procesar cantidad
-                quantity = 1
-                if row[10].value:
-                    try:
-                        quantity = int(row[10].value)
-                        if quantity < 1:
-                            quantity = 1
-                    except (ValueError, TypeError):
-                        quantity = 1
-                
-                # Procesar período de uso preferente
-                preferred_usage_period = 36  # default
-                if row[11].value:  # Nueva columna
-                    try:
-                        preferred_usage_period = int(row[11].value)
-                        if preferred_usage_period < 1:
-                            preferred_usage_period = 36
-                    except (ValueError, TypeError):
-                        preferred_usage_period = 36
-                
-                # Procesar ubicación
-                location = None
-                if row[6].value:  # Columna G - Ubicación
-                    location_name = str(row[6].value).strip()
-                    if location_name:
-                        location, created = Location.objects.get_or_create(
-                            name=location_name,
-                            defaults={'location_type': 'office', 'description': ''}
-                        )
-                
-                # Procesar responsable (solo como texto, no como usuario)
-                assigned_to_name = None
-                if row[7].value:  # Columna H - Responsable
-                    assigned_to_name = str(row[7].value).strip()
-                
-                asset_data = {
-                    'name': str(row[1].value).strip(),
-                    'category': category,
-                    'serial_number': str(row[3].value).strip(),
-                    'purchase_date': purchase_date,
-                    'status': status,
-                    'description': str(row[8].value).strip() if row[8].value else '',
-                    'specifications': str(row[9].value).strip() if row[9].value else '',
-                    'quantity': quantity,
-                    'preferred_usage_period': preferred_usage_period,
-                    'warranty_expiration': warranty_expiration,
-                    'location': location,
-                    'assigned_to_name': assigned_to_name,
-                }
-
-                # Create or update asset
-                asset, created = Asset.objects.update_or_create(
-                    serial_number=asset_data['serial_number'],
-                    defaults=asset_data
-                )
+            # En la petición se lee en un solo proceso; los libros muy grandes se importan en
+            # paralelo con el comando import_assets
+            plan = plan_asset_import(ASSET_DATASET.parse_rows(read_rows(excel_file, ASSET_DATASET)))
+
+            if request.POST.get('dry_run'):
+                # Los registros ya convertidos se guardan para aplicarlos sin volver a subir el archivo
+                token = uuid.uuid4().hex
+                cache.set(f'asset_import:{request.user.pk}:{token}', {
+                    'records': plan.records,
+                    'errors': plan.report.errors,
+                }, IMPORT_PREVIEW_TIMEOUT)
+                return render(request, 'FA01/import_preview.html', {
+                    'token': token,
+                    'plan': plan,
+                    'new_assets': plan.new[:IMPORT_PREVIEW_ROWS],
+                    'changed_assets': [
+                        (record, [display_change(field, old, new) for field, (old, new) in changes.items()])
+                        for _, record, changes in plan.changed[:IMPORT_PREVIEW_ROWS]
+                    ],
+                    'preview_rows': IMPORT_PREVIEW_ROWS,
+                    'errors': plan.report.error_lines(limit=IMPORT_PREVIEW_ROWS),
+                })
 
-            messages.success(request, 'Archivo Excel importado exitosamente')
+            import_report_messages(request, plan.apply())
         except Exception as e:
             messages.error(request, f'Error al importar el archivo: {str(e)}')
 
     return redirect('asset_list')
 
+@login_required
+@require_POST
+def import_assets_apply(request):
+    """Aplica una importación revisada en la vista previa"""
+    key = f'asset_import:{request.user.pk}:{request.POST.get("token", "")}'
+    preview = cache.get(key)
+    if preview is None:
+        messages.error(request, 'La vista previa expiró, vuelva a cargar el archivo')
+        return redirect('asset_list')
+
+    try:
+        # Se recalcula la diferencia por si los activos cambiaron desde la vista previa
+        report = ImportReport()
+        report.errors = preview['errors']
+        import_report_messages(request, AssetImportPlan(preview['records'], report).apply())
+        cache.delete(key)
+    except Exception as e:
+        messages.error(request, f'Error al importar el archivo: {str(e)}')
+
+    return redirect('asset_list')
+
 @login_required
 @csrf_exempt
 def network_scan(request):
@@ -702,49 +1003,154 @@ def network_scan(request):
     if request.method == 'POST':
         network = request.POST.get('network', '192.168.1.0/24')
         try:
-            nm = nmap.PortScanner()
-            nm.scan(hosts=network, arguments='-sn')
-            for host in nm.all_hosts():
-                devices.append({
-                    'ip': host,
-                    'mac': nm[host]['addresses'].get('mac', ''),
-                    'hostname': nm[host].hostname() if nm[host].hostname() else '',
-                })
+            devices = list(new_scanner().iter_ping_sweep(network))
         except Exception as e:
             error = str(e)
     return render(request, 'FA01/network_scan.html', {'devices': devices, 'error': error})
 
 def network_devices(request):
-    scanner = NetworkScanner()
-    devices = scanner.scan_network()
-    return render(request, 'FA01/network_devices.html', {'devices': devices})
+    # La página se muestra de inmediato; las filas llegan por network_devices_stream
+    return render(request, 'FA01/network_devices.html', {'active': bool(request.GET.get('active'))})
+
+SSE_CONTENT_TYPE = 'text/event-stream'
+
+def sse_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n'
+
+def scan_events(events, label):
+    """
+    Envía los eventos de un escaneo como Server-Sent Events y termina con "done".
+
+    Si el cliente se desconecta, el servidor cierra el generador (GeneratorExit) y el escaneo
+    se detiene antes del siguiente host en lugar de seguir ejecutando nmap para nadie.
+    """
+    started = time.monotonic()
+    count = 0
+    # Un primer comentario envía los encabezados sin esperar al primer host
+    yield ': scan started\n\n'
+    with contextlib.closing(events):
+        try:
+            for event, data in events:
+                count += 1
+                yield sse_event(event, data)
+        except GeneratorExit:
+            logger.info('%s cancelado: el cliente se desconectó tras %d eventos', label, count)
+            raise
+        except Exception as e:
+            logger.exception('%s falló', label)
+            yield sse_event('scan-error', {'error': str(e)})
+            return
+    yield sse_event('done', {'events': count, 'seconds': round(time.monotonic() - started, 1)})
+
+async def iterate_in_thread(iterator):
+    """Recorre un generador síncrono desde ASGI sin consumirlo completo antes de enviarlo"""
+    finished = object()
+    try:
+        while (part := await sync_to_async(next)(iterator, finished)) is not finished:
+            yield part
+    finally:
+        # Al desconectarse el cliente ASGI cancela la respuesta: se cierra el escaneo
+        await sync_to_async(iterator.close)()
+
+def sse_response(request, events):
+    if isinstance(request, ASGIRequest):
+        events = iterate_in_thread(events)
+    response = StreamingHttpResponse(events, content_type=SSE_CONTENT_TYPE)
+    response['Cache-Control'] = 'no-cache'
+    # Evita que nginx acumule la respuesta antes de enviarla
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def network_devices_stream(request):
+    """Dispositivos de la red como Server-Sent Events: "device" por host y "update" tras sondearlo"""
+    events = iter_device_events(active=bool(request.GET.get('active')))
+    return sse_response(request, scan_events(events, 'Escaneo de dispositivos'))
+
+@login_required
+def network_scan_stream(request):
+    """Barrido de descubrimiento (-sn) como Server-Sent Events, un evento "device" por host"""
+    network = request.GET.get('network', '192.168.1.0/24')
+    try:
+        ipaddress.ip_network(network, strict=False)
+    except ValueError:
+        return HttpResponse(f'Rango de red inválido: {network}', status=400)
+
+    def events():
+        for host in new_scanner().iter_ping_sweep(network):
+            yield 'device', host
+
+    return sse_response(request, scan_events(events(), 'Barrido de red'))
+
+# Tipos que detecta NetworkScanner y su categoría en el inventario
+NETWORK_DEVICE_CATEGORIES = {
+    'Impresora': 'printer',
+    'Router': 'network',
+    'Cámara IP': 'peripheral',
+    'Computadora': 'pc',
+    'Servidor': 'server',
+    'Dispositivo de Red': 'network',
+}
 
 @login_required
 @require_POST
 def add_network_device(request):
     try:
-        # Obtener datos del formulario
-        ip = request.POST.get('ip')
-        hostname = request.POST.get('hostname')
-        device_type = request.POST.get('type')
-        vendor = request.POST.get('vendor')
-        model = request.POST.get('model')
-        location = request.POST.get('location')
-        department = request.POST.get('department')
-        notes = request.POST.get('notes')
+        # Obtener datos del formulario; el escáner usa "Unknown" cuando no conoce un dato
+        def field(name):
+            value = request.POST.get(name, '').strip()
+            return '' if value.lower() in UNKNOWN_VALUES else value
+
+        ip = normalize_ip(field('ip'))
+        hostname = field('hostname')
+        mac = normalize_mac(field('mac'))
+        serial_number = field('serial_number') or mac.replace(':', '').upper()
+        if not serial_number:
+            return JsonResponse({
+                'success': False,
+                'error': 'Se requiere el número de serie cuando no se conoce la MAC del dispositivo',
+            })
+
+        asset_id, _ = AssetIndex.for_devices([(mac, serial_number, hostname, ip)]).match(mac, serial_number, hostname, ip)
+        if asset_id:
+            return JsonResponse({
+                'success': False,
+                'error': f'El dispositivo ya está en el inventario: {Asset.objects.get(pk=asset_id)}',
+            })
+
+        location = None
+        location_name = field('location')
+        if location_name:
+            location = Location.objects.filter(name=location_name).order_by('id').first()
+            if location is None:
+                location = Location.objects.create(name=location_name, location_type='office')
+
+        notes = field('notes')
+        department = field('department')
+        if department:
+            notes = f'Departamento: {department}\n{notes}'.strip()
 
         # Crear nuevo activo en el inventario
         asset = Asset.objects.create(
-            name=hostname,
-            type=device_type,
-            manufacturer=vendor,
-            model=model,
-            ip_address=ip,
+            name=hostname or ip or serial_number,
+            category=NETWORK_DEVICE_CATEGORIES.get(field('type'), 'network'),
+            serial_number=serial_number,
+            brand=field('vendor'),
+            model=field('model'),
             location=location,
-            department=department,
+            mac_address=mac,
+            hostname=hostname,
+            ip_address=ip or None,
             notes=notes,
-            status='Activo'
+            status='active',
+            last_seen_at=timezone.now(),
         )
+        if location:
+            Movement.objects.create(
+                asset=asset,
+                to_location=location,
+                notes='Registro inicial del activo desde el escaneo de red',
+            )
 
         return JsonResponse({
             'success': True,
@@ -756,6 +1162,37 @@ def add_network_device(request):
             'error': str(e)
         })
 
+RECONCILIATION_LIST_LIMIT = 200
+
+@login_required
+def device_reconciliation(request):
+    """Dispositivos reportados sin activo y activos que dejaron de verse en la red"""
+    if request.method == 'POST':
+        started = time.perf_counter()
+        result = reconcile()
+        messages.success(
+            request,
+            f'{result.total} reportes conciliados en {time.perf_counter() - started:.1f}s: '
+            f'{result.matched} vinculados, {result.unknown} desconocidos',
+        )
+        return redirect('device_reconciliation')
+
+    try:
+        days = int(request.GET.get('days', MISSING_AFTER_DAYS))
+    except ValueError:
+        days = MISSING_AFTER_DAYS
+    unknown = unknown_devices().select_related('sucursal').order_by('-fecha_envio')
+    missing = missing_assets(days).select_related('location').order_by('last_seen_at', 'name')
+    return render(request, 'FA01/device_reconciliation.html', {
+        'days': days,
+        'pending_count': DispositivoSucursal.objects.filter(reconciled_at__isnull=True).count(),
+        'unknown_count': unknown.count(),
+        'missing_count': missing.count(),
+        'unknown_devices': unknown[:RECONCILIATION_LIST_LIMIT],
+        'missing_assets': missing[:RECONCILIATION_LIST_LIMIT],
+        'list_limit': RECONCILIATION_LIST_LIMIT,
+    })
+
 class RegistroDispositivosAPIView(APIView):
     def post(self, request):
         # Validar token
@@ -770,15 +1207,30 @@ class RegistroDispositivosAPIView(APIView):
 
         dispositivos = request.data.get('dispositivos', [])
         fecha_envio = request.data.get('fecha_envio', timezone.now())
-        for d in dispositivos:
-            DispositivoSucursal.objects.create(
+        fabricantes = vendors_for([d['mac'] for d in dispositivos])
+        reportes = DispositivoSucursal.objects.bulk_create([
+            DispositivoSucursal(
                 sucursal=sucursal,
                 fecha_envio=fecha_envio,
                 ip=d['ip'],
                 mac=d['mac'],
-                hostname=d['hostname']
+                vendor=fabricante,
+                hostname=d['hostname'],
+                serial_number=d.get('serial_number', ''),
             )
-        return Response({'mensaje': 'Datos registrados exitosamente'})
+            for d, fabricante in zip(dispositivos, fabricantes)
+        ])
+        # Los reportes nuevos se vinculan de inmediato con los activos del inventario
+        # con un índice de solo los activos candidatos: no se recorre todo el inventario por envío
+        resultado = reconcile(
+            DispositivoSucursal.objects.filter(pk__in=[r.pk for r in reportes]),
+            index=AssetIndex.for_devices((r.mac, r.serial_number, r.hostname, r.ip) for r in reportes),
+        )
+        return Response({
+            'mensaje': 'Datos registrados exitosamente',
+            'vinculados': resultado.matched,
+            'desconocidos': resultado.unknown,
+        })
 
 class SucursalDispositivosAPIView(APIView):
     def get(self, request, codigo):
@@ -792,6 +1244,185 @@ class SucursalDispositivosAPIView(APIView):
             'dispositivos': serializer.data
         })
 
+def parse_point_in_time(value):
+    """Convierte el parámetro `at` (fecha o fecha y hora ISO) en un datetime con zona horaria"""
+    if not value:
+        return timezone.now()
+    day = parse_date(value)
+    if day is not None:
+        # Una fecha sin hora se refiere al final de ese día
+        at = datetime.combine(day, datetime.max.time())
+    else:
+        at = parse_datetime(value)
+        if at is None:
+            raise ValueError(f'Fecha inválida: {value}')
+    if timezone.is_naive(at):
+        at = timezone.make_aware(at)
+    return at
+
+class InventoryStateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            at = parse_point_in_time(request.query_params.get('at'))
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=400)
+        return Response({
+            'at': at.isoformat(),
+            'activos': inventory_state_at(at),
+        })
+
+class ChangesFeedAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, resource):
+        if resource not in RESOURCES:
+            return Response({'detail': f'Recurso desconocido: {resource}'}, status=404)
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+            return Response(get_changes(resource, request.query_params.get('cursor'), limit))
+        except (InvalidCursor, ValueError) as e:
+            return Response({'detail': str(e)}, status=400)
+
+class LengthRequired(Exception):
+    pass
+
+
+def body_lines(request):
+    """
+    Cuerpo de la petición para leerlo línea por línea a medida que llega.
+
+    DRF deja request.stream en None si no hay Content-Length; con Transfer-Encoding: chunked el
+    cuerpo no se puede leer (el servidor WSGI no lo entrega) y se lanza LengthRequired en vez de
+    tratarlo como vacío.
+    """
+    if request.stream is not None:
+        return request.stream
+    if 'chunked' in request.headers.get('Transfer-Encoding', '').lower():
+        raise LengthRequired('Se requiere Content-Length: no se aceptan cuerpos con Transfer-Encoding: chunked')
+    return []
+
+
+class AssetBulkAPIView(APIView):
+    """
+    Carga y lectura masiva de activos en JSON Lines (application/x-ndjson).
+
+    POST recibe un activo completo por línea y responde, también por línea, si fue creado,
+    actualizado, sin cambios o con error. GET devuelve todos los activos, uno por línea; acepta
+    since y los filtros de especificaciones de asset_list (ram_gb_max=8, storage_type=HDD, specs={...}).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        assets = Asset.objects.all()
+        if request.query_params.get('since'):
+            since = parse_datetime(request.query_params['since'])
+            if since is None:
+                return Response({'detail': 'Fecha inválida'}, status=400)
+            assets = assets.filter(updated_at__gte=since)
+        try:
+            assets, _ = filter_by_specs(assets, request.query_params)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=400)
+        lines = (json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in asset_api_rows(assets))
+        return StreamingHttpResponse(lines, content_type=NDJSON_CONTENT_TYPE)
+
+    def post(self, request):
+        try:
+            batch_size = max(1, min(int(request.query_params.get('batch_size', BULK_BATCH_SIZE)), 10000))
+        except ValueError:
+            return Response({'detail': 'batch_size inválido'}, status=400)
+        # El cuerpo se lee línea por línea sin cargarlo completo en memoria
+        try:
+            lines = body_lines(request)
+        except LengthRequired as e:
+            return Response({'detail': str(e)}, status=411)
+        results = (
+            json.dumps(result, ensure_ascii=False) + '\n'
+            for result in stream_asset_upserts(lines, batch_size)
+        )
+        return StreamingHttpResponse(results, content_type=NDJSON_CONTENT_TYPE)
+
+class StocktakeScansAPIView(APIView):
+    """
+    Lecturas de un inventario físico.
+
+    Acepta texto plano con una serie por línea (lector de código de barras o texto pegado),
+    leído por partes a medida que llega, o JSON {"serials": [...]}. Responde cuántas
+    lecturas resultaron encontradas, mal ubicadas, no registradas o repetidas, y el resumen
+    actualizado de la sesión.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        session = get_object_or_404(StocktakeSession, pk=pk)
+        if session.status != 'open':
+            return Response({'detail': 'El inventario está cerrado'}, status=409)
+
+        if request.content_type.startswith('application/json'):
+            serials = request.data.get('serials', [])
+            if not isinstance(serials, list):
+                return Response({'detail': 'serials debe ser una lista'}, status=400)
+            # Cada elemento es una serie completa: no se divide aunque tenga espacios o comas
+            batches = iter_serial_batches(key for key in (serial_key(str(serial)) for serial in serials) if key)
+        else:
+            try:
+                batches = iter_serial_batches(iter_text_serials(body_lines(request)))
+            except LengthRequired as e:
+                return Response({'detail': str(e)}, status=411)
+
+        counts = Counter()
+        for batch in batches:
+            counts += record_scans(session, batch)
+        return Response({'counts': counts, 'summary': stocktake_summary(session)})
+
+@login_required
+def export_inventory_state_excel(request):
+    """Exporta a Excel el estado del inventario en una fecha determinada"""
+    try:
+        at = parse_point_in_time(request.GET.get('at'))
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('asset_list')
+
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    response['Content-Disposition'] = f'attachment; filename=inventario_al_{timezone.localtime(at).strftime("%Y%m%d")}.xlsx'
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Inventario")
+
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    headers = []
+    for header in ['ID', 'Nombre', 'Número de Serie', 'Ubicación', 'Responsable', 'Estado']:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        headers.append(cell)
+    ws.append(headers)
+
+    for row in inventory_state_at(at):
+        ws.append([
+            row['asset_id'],
+            row['name'],
+            row['serial_number'],
+            row['location'] or 'Sin registro',
+            row['assigned_to_name'] or 'Sin registro',
+            row['status_display'] or 'Sin registro',
+        ])
+
+    wb.save(response)
+    return response
+
+@login_required
+@require_http_methods(['GET', 'HEAD'])
+def serve_media(request, path):
+    """Fotos de activos y responsivas: solo para usuarios autenticados; el envío lo hace el proxy si está configurado"""
+    return media_response(request, path)
+
 @login_required
 def delete_asset_image(request, image_id):
     """Elimina una imagen específica de un activo"""
@@ -832,89 +1463,28 @@ def delete_asset_letter_responsibility(request, image_id):
 
 @login_required
 def export_locations_excel(request):
-    """Export locations to Excel file"""
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-    )
-    response['Content-Disposition'] = f'attachment; filename=ubicaciones_{datetime.now().strftime("%Y%m%d")}.xlsx'
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ubicaciones"
-
-    # Define headers
-    headers = ['Nombre', 'Tipo de Ubicación', 'Descripción']
-
-    # Style for headers
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-    # Write headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-
-    # Write data
+    """Export locations to Excel file (or CSV / JSON Lines with ?format=)"""
+    fmt = request.GET.get('format', 'xlsx')
+    if fmt not in WRITERS:
+        return HttpResponse(status=400)
     locations = Location.objects.all()
-    for row, location in enumerate(locations, 2):
-        ws.cell(row=row, column=1, value=location.name)
-        ws.cell(row=row, column=2, value=location.get_location_type_display())
-        ws.cell(row=row, column=3, value=location.description)
-
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    wb.save(response)
-    return response
+    widths = LOCATION_DATASET.column_widths(locations) if fmt == 'xlsx' else None
+    rows = LOCATION_DATASET.export_rows(LOCATION_DATASET.export_values(locations))
+    return export_response(LOCATION_DATASET, fmt, rows, f'ubicaciones_{datetime.now().strftime("%Y%m%d")}', widths)
 
 @login_required
 def import_locations_excel(request):
-    """Import locations from Excel file"""
+    """Import locations from Excel, CSV or JSON Lines file"""
     if request.method == 'POST' and request.FILES.get('excel_file'):
         try:
-            excel_file = request.FILES['excel_file']
-            wb = load_workbook(excel_file)
-            ws = wb.active
-
-            # Skip header row
-            for row in ws.iter_rows(min_row=2):
-                location_data = {
-                    'name': row[0].value,
-                    'location_type': row[1].value,
-                    'description': row[2].value or '',
-                }
-
-                # Map location type display names to values
-                location_type_mapping = {
-                    'Almacén': 'warehouse',
-                    'Oficina': 'office', 
-                    'Farmacia': 'drugstore'
-                }
-                
-                if location_data['location_type'] in location_type_mapping:
-                    location_data['location_type'] = location_type_mapping[location_data['location_type']]
-                else:
-                    # Default to office if type not recognized
-                    location_data['location_type'] = 'office'
-
-                # Create or update location
-                location, created = Location.objects.update_or_create(
-                    name=location_data['name'],
-                    defaults=location_data
-                )
-
-            messages.success(request, 'Archivo Excel de ubicaciones importado exitosamente')
+            report = import_locations(read_rows(request.FILES['excel_file'], LOCATION_DATASET))
+            messages.success(
+                request,
+                f'Archivo de ubicaciones importado exitosamente: '
+                f'{report.created} creadas, {report.updated} actualizadas',
+            )
+            if report.errors:
+                messages.warning(request, 'Filas con observaciones: ' + '; '.join(report.error_lines()))
         except Exception as e:
             messages.error(request, f'Error al importar el archivo: {str(e)}')
 
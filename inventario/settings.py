@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'FA01',
 ]
@@ -141,6 +142,24 @@ STATICFILES_DIRS = [
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Quién envía los archivos subidos: 'nginx' (X-Accel-Redirect), 'sendfile' (X-Sendfile de Apache/lighttpd)
+# o vacío para que Django los envíe (desarrollo). Con nginx, MEDIA_ACCEL_PREFIX debe ser una location
+# interna que apunte a MEDIA_ROOT:  location /protected-media/ { internal; alias /app/media/; }
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Los archivos subidos se guardan con el hash del contenido en el nombre para poder cachearlos sin revalidar
+STORAGES = {
+    'default': {'BACKEND': 'FA01.media.HashedMediaStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Almacenamiento frío para los archivos de los activos archivados (archive_assets --move-media)
+ARCHIVE_MEDIA_ROOT = os.getenv('ARCHIVE_MEDIA_ROOT', '')
+if ARCHIVE_MEDIA_ROOT:
+    STORAGES['archive'] = {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': ARCHIVE_MEDIA_ROOT, 'base_url': None},
+    }
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -161,3 +180,13 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
 
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS','').split(',')
+
+# Procesos para convertir libros grandes al importar activos (0 = uno por núcleo)
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '0'))
+
+# Descubrimiento pasivo de dispositivos: fuentes "nombre" o "nombre:ruta" (arp, neigh, isc, dnsmasq)
+DISCOVERY_SOURCES = [source for source in os.getenv('DISCOVERY_SOURCES', 'arp').split(',') if source.strip()]
+# Redes a considerar (CIDR separados por coma); vacío incluye todas las de las fuentes
+DISCOVERY_NETWORKS = [network for network in os.getenv('DISCOVERY_NETWORKS', '').split(',') if network.strip()]
+# Hosts desconocidos que se sondean activamente con nmap en cada consulta
+DISCOVERY_MAX_PROBES = int(os.getenv('DISCOVERY_MAX_PROBES', '10'))
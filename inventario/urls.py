@@ -18,11 +18,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from django.conf import settings
-from django.conf.urls.static import static
+from FA01.views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('FA01.urls')),
     path('login/', auth_views.LoginView.as_view(template_name='FA01/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Archivos subidos: la vista valida la sesión y delega el envío al proxy (X-Accel-Redirect / X-Sendfile)
+    path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>', serve_media, name='serve_media'),
+]